@@ -0,0 +1,31 @@
+#!/usr/bin/env python3
+"""
+Script to move tasks completed more than a given number of days ago into tasks_archive
+
+Usage: python archive_tasks.py [age in days, default 90]
+
+Tasks move in small batches, each in its own transaction with a short
+pause in between, so it can run while the app serves traffic. Archived
+tasks are still listed with include_archived=true. Run periodically, e.g.
+nightly from cron. Every task shard is archived in turn.
+"""
+
+import sys
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from datetime import timedelta
+from sqlmodel import Session
+from phase5.backend.app.database import shard_map
+from phase5.backend.app.services.task_archive import TaskArchiver
+
+if __name__ == "__main__":
+    days = int(sys.argv[1]) if len(sys.argv) > 1 else 90
+
+    archiver = TaskArchiver(older_than=timedelta(days=days))
+    for shard in shard_map.shards.values():
+        with Session(shard.engine) as session:
+            moved = archiver.run_once(session)
+        print(f"Archived {moved} tasks completed more than {days} days ago on shard {shard.name}")
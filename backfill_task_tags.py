@@ -0,0 +1,26 @@
+#!/usr/bin/env python3
+"""
+Script to fill the normalized task_tags table from the JSON tags column of existing tasks
+"""
+
+import sys
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from sqlmodel import Session
+from phase5.backend.app.database import engine
+from phase5.backend.app.services.task_tags import backfill_task_tags
+from shared.models.task import TaskTag
+
+if __name__ == "__main__":
+    batch_size = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+
+    # Make sure the table exists on databases created before it was added
+    TaskTag.__table__.create(engine, checkfirst=True)
+
+    with Session(engine) as session:
+        processed = backfill_task_tags(session, batch_size=batch_size)
+
+    print(f"Backfilled task_tags for {processed} tasks")
@@ -0,0 +1,70 @@
+"""
+Shared fixtures for the task tests: new in-memory SQLite databases with the
+task tables and two users (1 and 2).
+
+The fixtures hand out factories, so a test can open several databases. The
+test modules' __main__ blocks pass the plain functions (task_session, ...)
+in their place.
+"""
+
+import pytest
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel import SQLModel, Session, create_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
+from shared.models.user import User
+from shared.models.task import Task, TaskTag, UserTaskVersion, UserTaskCounter, TaskTombstone, TaskArchive
+
+
+TASK_TABLES = [
+    User.__table__, Task.__table__, TaskTag.__table__, UserTaskVersion.__table__, UserTaskCounter.__table__,
+    TaskTombstone.__table__, TaskArchive.__table__
+]
+
+
+def task_users() -> list:
+    return [
+        User(id=1, email="tasks@example.com", hashed_password="x"),
+        User(id=2, email="other@example.com", hashed_password="x"),
+    ]
+
+
+def task_engine(returning: bool = True) -> Engine:
+    """An in-memory database with the task tables and users; returning=False turns off UPDATE/DELETE RETURNING"""
+    engine = create_engine("sqlite:///:memory:")
+    if not returning:
+        engine.dialect.update_returning = engine.dialect.delete_returning = False
+    SQLModel.metadata.create_all(engine, tables=TASK_TABLES)
+    with Session(engine) as db:
+        db.add_all(task_users())
+        db.commit()
+    return engine
+
+
+def task_session(returning: bool = True) -> Session:
+    return Session(task_engine(returning))
+
+
+async def async_task_session() -> AsyncSession:
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all, tables=TASK_TABLES)
+    db = AsyncSession(engine, expire_on_commit=False)
+    db.add_all(task_users())
+    await db.commit()
+    return db
+
+
+@pytest.fixture
+def make_engine():
+    return task_engine
+
+
+@pytest.fixture
+def make_session():
+    return task_session
+
+
+@pytest.fixture
+def make_async_session():
+    return async_task_session
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Script to bulk import tasks for a user from an NDJSON or CSV file
+
+Usage: python import_tasks.py <user email> <file> [batch size]
+
+Progress is checkpointed to <file>.checkpoint after every batch; running the
+same command again resumes after the last committed batch.
+"""
+
+import sys
+import os
+import time
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from sqlmodel import Session, select
+from phase5.backend.app.database import engine, shard_map
+from phase5.backend.app.services.task_import import (
+    TaskImporter, ImportCheckpoint, parse_csv, parse_ndjson
+)
+from shared.models.user import User
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        print(__doc__)
+        sys.exit(1)
+
+    email, path = sys.argv[1], sys.argv[2]
+    batch_size = int(sys.argv[3]) if len(sys.argv) > 3 else 5000
+    checkpoint = ImportCheckpoint(path + ".checkpoint")
+
+    with Session(engine) as session:
+        user = session.exec(select(User).where(User.email == email)).first()
+    if not user:
+        print(f"User {email} not found!")
+        sys.exit(1)
+
+    # Tasks go to the shard holding the user's tasks
+    with Session(shard_map.shard_for(user.id).engine) as session:
+        started = time.monotonic()
+
+        def report(summary):
+            elapsed = max(time.monotonic() - started, 1e-6)
+            print(f"line {summary.last_line}: {summary.imported} imported, "
+                  f"{summary.failed} failed ({summary.imported / elapsed:.0f} tasks/s)")
+
+        with open(path, encoding="utf-8-sig", newline="") as f:
+            records = parse_csv(f) if path.lower().endswith(".csv") else parse_ndjson(f)
+            importer = TaskImporter(session, user.id, batch_size=batch_size,
+                                    checkpoint=checkpoint, on_progress=report)
+            summary = importer.run(records)
+
+    for error in summary.errors:
+        print(f"✗ line {error['line']}: {error['error']}")
+    if summary.unresolved_parents:
+        print(f"✗ {summary.unresolved_parents} tasks reference a parent that is not in the file")
+
+    os.remove(checkpoint.path)
+    print(f"✓ Imported {summary.imported} tasks for {email} ({summary.failed} failed)")
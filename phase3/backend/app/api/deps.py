@@ -4,7 +4,7 @@ from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlmodel import Session
 from shared.core.config import settings
 from shared.models.user import User
-from ..database import get_session
+from ..database import engine, get_session
 from shared.core.security import verify_token
 
 
@@ -33,4 +33,25 @@ def get_current_user(
             detail="User not found",
         )
 
-    return user
\ No newline at end of file
+    return user
+
+
+def get_conversation_db() -> Generator[Session, None, None]:
+    """Session for the chat routes' conversation and message writes"""
+    with Session(engine) as session:
+        yield session
+
+
+def get_conversation_read_db() -> Generator[Session, None, None]:
+    """
+    Session for reading conversation history. The same database as
+    get_conversation_db here; apps with read replicas override it.
+    """
+    with Session(engine) as session:
+        yield session
+
+
+def get_task_db() -> Generator[Session, None, None]:
+    """Session for the assistant's task tools in the chat routes"""
+    with Session(engine) as session:
+        yield session
@@ -5,7 +5,8 @@ from ...models.conversation import Conversation, ConversationCreate
 from ...models.message import Message, MessageCreate
 from ...services.conversation_service import create_conversation, get_conversation_by_id, add_message_to_conversation, get_messages_for_conversation
 from ...ai.runner import run_chat_completion
-from phase2.backend.app.api.deps import get_db, get_current_user
+from ...api.deps import get_conversation_db, get_conversation_read_db, get_task_db
+from phase2.backend.app.api.deps import get_current_user
 from shared.models.user import User
 from pydantic import BaseModel
 
@@ -27,7 +28,7 @@ class ChatResponse(BaseModel):
 @router.post("/start")
 def start_conversation(
     conv_data: ConversationCreate,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_conversation_db),
     current_user: User = Depends(get_current_user)
 ):
     """
@@ -42,7 +43,8 @@ def start_conversation(
 def chat_endpoint(
     user_id: int,
     chat_request: ChatRequest,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_conversation_db),
+    task_db: Session = Depends(get_task_db),
     current_user: User = Depends(get_current_user)
 ):
     """
@@ -82,7 +84,7 @@ def chat_endpoint(
     )
 
     # Process the message with the OpenAI agent and get response
-    result = run_chat_completion(chat_request.message, user_id, db)
+    result = run_chat_completion(chat_request.message, user_id, task_db)
 
     # Add AI response to conversation
     ai_message = add_message_to_conversation(
@@ -104,7 +106,8 @@ def chat_endpoint(
 def send_message(
     conversation_id: int,
     message_data: MessageCreate,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_conversation_db),
+    task_db: Session = Depends(get_task_db),
     current_user: User = Depends(get_current_user)
 ):
     """
@@ -128,7 +131,7 @@ def send_message(
     )
 
     # Process the message with the OpenAI agent and get response
-    result = run_chat_completion(message_data.content, current_user.id, db)
+    result = run_chat_completion(message_data.content, current_user.id, task_db)
 
     # Add AI response to conversation
     ai_message = add_message_to_conversation(
@@ -149,7 +152,7 @@ def send_message(
 @router.get("/{conversation_id}")
 def get_conversation(
     conversation_id: int,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_conversation_read_db),
     current_user: User = Depends(get_current_user)
 ):
     """
@@ -1,10 +1,16 @@
 from typing import List, Optional
 from sqlmodel import Session, select
+from sqlalchemy import case
 from datetime import datetime, timedelta
 from ..models.task import Task, TaskCreate, TaskUpdate, TaskRead
 import json
 
 
+# Same low < medium < high < urgent order as shared.models.task.PRIORITY_RANKS
+# (not imported: that module maps a second "tasks" table on the same metadata)
+PRIORITY_RANKS = {"low": 1, "medium": 2, "high": 3, "urgent": 4}
+
+
 class TaskService:
     def create_task(self, db: Session, task_data: TaskCreate, user_id: int) -> TaskRead:
         """Create a new task with advanced features"""
@@ -111,10 +117,12 @@ class TaskService:
             else:
                 statement = statement.order_by(Task.due_date.asc())
         elif sort_by == "priority":
+            # Rank the priority strings instead of comparing them alphabetically
+            priority_rank = case(PRIORITY_RANKS, value=Task.priority, else_=None)
             if sort_order == "desc":
-                statement = statement.order_by(Task.priority.desc())
+                statement = statement.order_by(priority_rank.desc().nulls_first(), Task.id.desc())
             else:
-                statement = statement.order_by(Task.priority.asc())
+                statement = statement.order_by(priority_rank.asc().nulls_last(), Task.id.asc())
         elif sort_by == "created_at":
             if sort_order == "desc":
                 statement = statement.order_by(Task.created_at.desc())
@@ -1,9 +1,12 @@
-from typing import Generator
+from typing import AsyncGenerator, Generator
 from fastapi import Depends, HTTPException, status
+from starlette.concurrency import run_in_threadpool
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlmodel import Session
+from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
 from shared.core.settings import settings
-from ..database import engine
+from ..database import engine, get_async_session, shard_map
+from ..sharding import Shard
 from shared.models.user import User
 from shared.core.security import verify_token
 
@@ -13,11 +16,11 @@ def get_db() -> Generator[Session, None, None]:
     with Session(engine) as session:
         yield session
 
-def get_current_user(
+async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_session)
 ) -> User:
-    """Get current user from JWT token"""
+    """Get current user from JWT token (users live on the main database, not on the task shards)"""
     token = credentials.credentials
     payload = verify_token(token)  # Use the imported function from shared
     user_email = payload.get("sub")  # Changed from "email" to "sub" to match token creation
@@ -28,11 +31,92 @@ def get_current_user(
             detail="Could not validate credentials",
         )
 
-    user = db.query(User).filter(User.email == user_email).first()
+    user = (await db.exec(select(User).where(User.email == user_email))).first()
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="User not found",
         )
 
-    return user
\ No newline at end of file
+    return user
+
+
+async def get_user_shard(current_user: User = Depends(get_current_user)) -> Shard:
+    """The database shard holding the current user's tasks (see sharding)"""
+    return await shard_map.shard_for_async(current_user.id)
+
+
+async def get_read_session(
+    current_user: User = Depends(get_current_user),
+    shard: Shard = Depends(get_user_shard)
+) -> AsyncGenerator[AsyncSession, None]:
+    """
+    Session for read-only handlers on the user's shard: on a healthy read
+    replica, or on the primary when there is none or the user wrote
+    recently (see read_replicas).
+    """
+    pool = shard.pool
+    if pool.check_due():
+        await run_in_threadpool(pool.check)
+    async with AsyncSession(pool.read_engine(current_user.id), expire_on_commit=False) as session:
+        yield session
+
+
+async def get_write_session(
+    current_user: User = Depends(get_current_user),
+    shard: Shard = Depends(get_user_shard)
+) -> AsyncGenerator[AsyncSession, None]:
+    """
+    Session on the primary of the user's shard for handlers that write. The
+    user is pinned to the primary from the start of the request until
+    sticky_seconds after it ends, so their next reads see the write.
+    """
+    shard.pool.pin(current_user.id)
+    try:
+        async with shard.pool.write_session() as session:
+            yield session
+    finally:
+        shard.pool.pin(current_user.id)
+
+
+def get_write_db(
+    current_user: User = Depends(get_current_user),
+    shard: Shard = Depends(get_user_shard)
+) -> Generator[Session, None, None]:
+    """Blocking get_write_session, for the routes that stay sync"""
+    shard.pool.pin(current_user.id)
+    try:
+        with Session(shard.engine) as session:
+            yield session
+    finally:
+        shard.pool.pin(current_user.id)
+
+
+def get_directory_shard() -> Shard:
+    """The default shard, which holds users and their chat conversations (messages reference users)"""
+    return shard_map.default
+
+
+def get_conversation_read_db(
+    current_user: User = Depends(get_current_user),
+    shard: Shard = Depends(get_directory_shard)
+) -> Generator[Session, None, None]:
+    """Blocking session for conversation history, on a replica like get_read_session"""
+    pool = shard.pool
+    if pool.check_due():
+        pool.check()
+    with Session(pool.sync_engine(pool.read_engine(current_user.id))) as session:
+        yield session
+
+
+def get_conversation_db(
+    current_user: User = Depends(get_current_user),
+    shard: Shard = Depends(get_directory_shard)
+) -> Generator[Session, None, None]:
+    """Session on the primary for conversation writes, pinning the user like get_write_session"""
+    shard.pool.pin(current_user.id)
+    try:
+        with Session(shard.engine) as session:
+            yield session
+    finally:
+        shard.pool.pin(current_user.id)
@@ -1,17 +1,38 @@
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, BackgroundTasks, Depends, File, HTTPException, Query, Request, Response, UploadFile
 from sqlmodel import Session
-from ...database import get_session
-from shared.models.task import TaskRead, TaskCreate, TaskUpdate
-from ...services.task_service import TaskService
-from ...api.deps import get_current_user
+from sqlmodel.ext.asyncio.session import AsyncSession
+from ...database import shard_map
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, StreamingResponse
+from shared.models.task import (
+    TaskRead, TaskCreate, TaskUpdate, TaskBulkResult, TaskCalendarEntry, TaskChanges, TaskStats, TaskTreeNode
+)
+from ...services.async_task_service import AsyncTaskService
+from ...services.task_service import EXPORT_FIELDS
+from ...services.task_changes import CursorAheadError, ExpiredCursorError
+from ...services.task_import import TaskImporter, ImportSummary, parse_csv, parse_ndjson
+from ...services.task_serialization import encode_json, encode_tasks, select_fields, task_tree
+from ...services.task_cache import task_read_cache
+from ...services.task_events import task_events
+from ...api.deps import get_current_user, get_read_session, get_user_shard, get_write_db, get_write_session
+from ...sharding import Shard
 from shared.models.user import User
-from pydantic import BaseModel
-from datetime import datetime
+from pydantic import BaseModel, Field
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+import csv
+import hashlib
+import io
+import json
 
 
 router = APIRouter()
-task_service = TaskService()
+task_service = AsyncTaskService(cache=task_read_cache)
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+MAX_BULK_SIZE = 1000
 
 
 class TaskFilterRequest(BaseModel):
@@ -21,109 +42,561 @@ class TaskFilterRequest(BaseModel):
     due_date_from: Optional[datetime] = None
     due_date_to: Optional[datetime] = None
     search_query: Optional[str] = None
-    sort_by: str = "created_at"
+    sort_by: Optional[str] = None  # created_at, due_date, priority, relevance
     sort_order: str = "asc"
+    tag_match: str = "all"  # any, all
+    min_priority: Optional[str] = None  # lowest priority to include
+    max_priority: Optional[str] = None  # highest priority to include
+    include_archived: bool = False  # also list tasks moved to tasks_archive
+
+
+class TaskBulkCreateRequest(BaseModel):
+    tasks: List[TaskCreate] = Field(..., min_length=1, max_length=MAX_BULK_SIZE)
+    atomic: bool = True  # write nothing if any item fails
+
+
+class TaskBulkUpdateRequest(BaseModel):
+    ids: List[int] = Field(..., min_length=1, max_length=MAX_BULK_SIZE)
+    changes: TaskUpdate
+    atomic: bool = True
+
+
+class TaskBulkIdsRequest(BaseModel):
+    ids: List[int] = Field(..., min_length=1, max_length=MAX_BULK_SIZE)
+    atomic: bool = True
+
+
+def filter_kwargs(filter_request: TaskFilterRequest, tags: Optional[List[str]]) -> dict:
+    """
+    TaskService filter arguments from the query parameters.
+
+    List parameters on a Depends() model are read from the body, so routes
+    declare tags as a repeated query parameter (?tags=a&tags=b) and pass it in.
+    """
+    filters = filter_request.model_dump()
+    filters["tags"] = tags or filter_request.tags
+    return filters
+
+
+EXPORT_CHUNK_SIZE = 64 * 1024
+
+
+def _export_value(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def encode_ndjson_rows(rows):
+    """Encode export rows as newline-delimited JSON, yielding ~64KB chunks"""
+    buffer = []
+    size = 0
+    for row in rows:
+        line = json.dumps({key: _export_value(value) for key, value in row.items()}) + "\n"
+        buffer.append(line)
+        size += len(line)
+        if size >= EXPORT_CHUNK_SIZE:
+            yield "".join(buffer)
+            buffer, size = [], 0
+    if buffer:
+        yield "".join(buffer)
+
+
+def encode_csv_rows(rows):
+    """Encode export rows as CSV with a header line, yielding ~64KB chunks"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_FIELDS)
+    for row in rows:
+        row["tags"] = json.dumps(row["tags"])
+        writer.writerow([_export_value(row[field]) for field in EXPORT_FIELDS])
+        if buffer.tell() >= EXPORT_CHUNK_SIZE:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+FIELDS_DESCRIPTION = (
+    "Comma-separated task fields to return, e.g. id,title,completed,due_date,priority "
+    "(id is always included); only those columns are read. Default: all fields"
+)
+
+
+def parse_fields(fields: Optional[str]):
+    """The select_fields of a ?fields= value, answering unknown names with 400"""
+    try:
+        return select_fields(fields.split(",")) if fields else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def task_list_response(rows, headers: Optional[dict] = None, fields=None) -> Response:
+    """
+    JSON list response encoded directly from READ_COLUMNS rows, or from
+    read_columns(fields) rows with only those keys.
+
+    Returning a Response skips FastAPI's response_model validation, which
+    would otherwise validate every task a second time; response_model is
+    kept on the routes for the OpenAPI schema.
+    """
+    return Response(content=encode_tasks(rows, fields), media_type="application/json", headers=headers)
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """If-None-Match comparison: any listed tag (weak or strong) or * matches"""
+    if if_none_match.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
+
+
+def not_modified(request: Request, etag: str, last_modified: Optional[datetime]) -> bool:
+    """
+    Evaluate the request's conditional headers against the current validators.
+
+    If-None-Match takes precedence; If-Modified-Since is only consulted
+    without it, at the one-second precision of HTTP dates.
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return etag_matches(if_none_match, etag)
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if not if_modified_since or last_modified is None:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is not None:
+        since = since.astimezone(timezone.utc).replace(tzinfo=None)
+    return last_modified.replace(microsecond=0) <= since
+
+
+def validator_headers(etag: str, last_modified: Optional[datetime]) -> dict:
+    # no-cache: clients may store the response but must revalidate each time
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if last_modified is not None:
+        headers["Last-Modified"] = format_datetime(last_modified.replace(tzinfo=timezone.utc), usegmt=True)
+    return headers
+
+
+def list_etag(request: Request, user_id: int, version: int) -> str:
+    """Strong ETag of a list response: the user's task version plus the normalized query"""
+    query = sorted(request.query_params.multi_items())
+    digest = hashlib.sha1(f"{user_id}?{query}".encode()).hexdigest()[:16]
+    return f'"{version}-{digest}"'
+
+
+def naive_utc(value: datetime) -> datetime:
+    """A query datetime as the naive UTC that due dates are stored in"""
+    if value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def bulk_response(result: TaskBulkResult):
+    """Atomic batches that were not written are answered with 422 and the per-item results"""
+    if not result.committed:
+        return JSONResponse(status_code=422, content=jsonable_encoder(result))
+    return result
 
 
 @router.post("/", response_model=TaskRead)
-def create_task(
+async def create_task(
     task: TaskCreate,
+    background_tasks: BackgroundTasks,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_session)
+    shard: Shard = Depends(get_user_shard),
+    db: AsyncSession = Depends(get_write_session)
 ):
     """Create a new task with advanced features"""
-    return task_service.create_task(db, task, current_user.id)
+    try:
+        created = await task_service.create_task(db, task, current_user.id)
+    except ValueError as e:
+        # Parent task not owned by the user
+        raise HTTPException(status_code=400, detail=str(e))
+    background_tasks.add_task(task_events.publish, "task_created", [created], shard.name)
+    return created
+
+
+@router.post("/bulk", response_model=TaskBulkResult)
+async def bulk_create_tasks(
+    request: TaskBulkCreateRequest,
+    background_tasks: BackgroundTasks,
+    current_user: User = Depends(get_current_user),
+    shard: Shard = Depends(get_user_shard),
+    db: AsyncSession = Depends(get_write_session)
+):
+    """Create many tasks in one transaction"""
+    result = await task_service.bulk_create_tasks(db, request.tasks, current_user.id, request.atomic)
+    background_tasks.add_task(task_events.publish_bulk, "task_created", result, shard.name)
+    return bulk_response(result)
+
+
+@router.patch("/bulk", response_model=TaskBulkResult)
+async def bulk_update_tasks(
+    request: TaskBulkUpdateRequest,
+    background_tasks: BackgroundTasks,
+    current_user: User = Depends(get_current_user),
+    shard: Shard = Depends(get_user_shard),
+    db: AsyncSession = Depends(get_write_session)
+):
+    """Apply the same changes to many tasks in one transaction"""
+    result = await task_service.bulk_update_tasks(db, request.ids, request.changes, current_user.id, request.atomic)
+    background_tasks.add_task(task_events.publish_bulk, "task_updated", result, shard.name)
+    return bulk_response(result)
+
+
+@router.post("/bulk/complete", response_model=TaskBulkResult)
+async def bulk_complete_tasks(
+    request: TaskBulkIdsRequest,
+    background_tasks: BackgroundTasks,
+    current_user: User = Depends(get_current_user),
+    shard: Shard = Depends(get_user_shard),
+    db: AsyncSession = Depends(get_write_session)
+):
+    """Mark many tasks as complete in one transaction"""
+    result = await task_service.bulk_complete_tasks(db, request.ids, current_user.id, request.atomic)
+    background_tasks.add_task(task_events.publish_bulk, "task_completed", result, shard.name)
+    return bulk_response(result)
+
+
+@router.delete("/bulk", response_model=TaskBulkResult)
+async def bulk_delete_tasks(
+    request: TaskBulkIdsRequest,
+    background_tasks: BackgroundTasks,
+    current_user: User = Depends(get_current_user),
+    shard: Shard = Depends(get_user_shard),
+    db: AsyncSession = Depends(get_write_session)
+):
+    """Delete many tasks in one transaction"""
+    result = await task_service.bulk_delete_tasks(db, request.ids, current_user.id, request.atomic)
+    background_tasks.add_task(task_events.publish_bulk, "task_deleted", result, shard.name)
+    return bulk_response(result)
+
+
+@router.get("/stats", response_model=TaskStats)
+async def get_task_stats(
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_session)
+):
+    """
+    Task counts for the dashboard: total, open, completed, overdue and per priority.
+
+    Totals are read from per-user counters that every write adjusts, so
+    the cost does not grow with the number of tasks.
+    """
+    return await task_service.get_stats(db, current_user.id)
+
+
+@router.get("/calendar", response_model=List[TaskCalendarEntry])
+async def get_task_calendar(
+    start: datetime = Query(..., alias="from"),
+    end: datetime = Query(..., alias="to"),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_session)
+):
+    """
+    Everything due between `from` and `to` (at most 400 days), sorted by due date.
+
+    Recurring tasks are expanded into one entry per occurrence without
+    storing them (`virtual: true`, no `id`). Occurrences already stored as
+    instances are returned as those tasks instead.
+    """
+    try:
+        entries = await task_service.get_calendar(db, current_user.id, naive_utc(start), naive_utc(end))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return Response(content=encode_json(entries), media_type="application/json")
+
+
+@router.get("/changes", response_model=TaskChanges)
+async def get_task_changes(
+    since: int = Query(0, ge=0),
+    limit: int = Query(DEFAULT_PAGE_SIZE * 10, ge=1, le=MAX_PAGE_SIZE),
+    current_user: User = Depends(get_current_user),
+    shard: Shard = Depends(get_user_shard),
+    db: AsyncSession = Depends(get_read_session)
+):
+    """
+    Delta sync: tasks created or updated (`changed`) and ids of tasks
+    deleted (`deleted`) since the cursor `since`.
+
+    Start with since=0, which returns every task, then pass the returned
+    `cursor` on each call; while `has_more` is true another page is waiting.
+    A cursor older than the kept delete history is answered with 410, after
+    which the client starts over at since=0. A cursor ahead of the read
+    replica serving the request is answered from the primary.
+    """
+    try:
+        try:
+            changes = await task_service.get_changes(db, current_user.id, since, limit)
+        except CursorAheadError:
+            if db.bind is shard.pool.primary_reader:
+                raise
+            # The cursor came from a write the replica has not replayed yet
+            async with AsyncSession(shard.pool.primary_reader, expire_on_commit=False) as primary:
+                changes = await task_service.get_changes(primary, current_user.id, since, limit)
+    except ExpiredCursorError as e:
+        raise HTTPException(status_code=410, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return Response(content=encode_json(changes), media_type="application/json")
+
+
+@router.get("/export")
+async def export_tasks(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    filter_request: TaskFilterRequest = Depends(),
+    tags: Optional[List[str]] = Query(None),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_session)
+):
+    """
+    Export the current user's tasks as NDJSON or CSV, with the same filters as the list.
+
+    Rows are streamed from the database as they are encoded, so memory use
+    does not grow with the number of tasks. Tags are a JSON array in both
+    formats.
+    """
+    try:
+        statement = await task_service.export_statement(db, current_user.id, **filter_kwargs(filter_request, tags))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    encode = encode_csv_rows if format == "csv" else encode_ndjson_rows
+
+    def stream():
+        # The request session may be closed before the body is sent, so the
+        # stream reads through its own session; Starlette iterates this sync
+        # generator in the threadpool, where the blocking engine (of the
+        # database the request session reads from) is fine
+        with Session(shard_map.sync_engine(db.bind)) as export_db:
+            yield from encode(task_service.sync.iter_export_rows(export_db, statement))
+
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    return StreamingResponse(
+        stream(),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="tasks.{format}"'}
+    )
+
+
+@router.post("/import", response_model=ImportSummary)
+def import_tasks(
+    file: UploadFile = File(...),
+    format: Optional[str] = Query(None, pattern="^(ndjson|csv)$"),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_write_db)
+):
+    """
+    Import tasks from an NDJSON or CSV upload (the export format is accepted).
+
+    The upload is parsed line by line and written in committed batches.
+    Invalid rows are skipped and reported with their line number. The
+    format defaults to the file extension.
+
+    Unlike the other routes this one stays sync on the blocking engine: COPY
+    needs the psycopg2 connection, and a long import belongs in the
+    threadpool rather than on the event loop.
+    """
+    if format is None:
+        format = "csv" if (file.filename or "").lower().endswith(".csv") else "ndjson"
+
+    stream = io.TextIOWrapper(file.file, encoding="utf-8-sig", newline="")
+    records = parse_csv(stream) if format == "csv" else parse_ndjson(stream)
+    try:
+        return TaskImporter(db, current_user.id).run(records)
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="Upload must be UTF-8 text")
+    finally:
+        # Batches are committed as they go, so even a failed import changed data
+        task_service.invalidate(current_user.id)
 
 
 @router.get("/{task_id}", response_model=TaskRead)
-def get_task(
+async def get_task(
     task_id: int,
+    request: Request,
+    response: Response,
+    include_archived: bool = False,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_session)
+    db: AsyncSession = Depends(get_read_session)
 ):
-    """Get a specific task"""
-    task = task_service.get_task(db, task_id, current_user.id)
+    """
+    Get a specific task; with include_archived also an archived one.
+
+    The ETag is derived from the task id and its last modification, so a
+    conditional request for an unchanged task is answered with 304.
+    """
+    task = await task_service.get_task(db, task_id, current_user.id, include_archived)
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
+
+    last_modified = task.updated_at or task.created_at
+    headers = validator_headers(f'"{task.id}-{last_modified:%Y%m%d%H%M%S%f}"', last_modified)
+    if not_modified(request, headers["ETag"], last_modified):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
     return task
 
 
+@router.get("/{task_id}/tree", response_model=TaskTreeNode)
+async def get_task_tree(
+    task_id: int,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_session)
+):
+    """
+    Get a task with all of its subtasks, nested under `children`.
+
+    The hierarchy is fetched with one recursive query. Every node carries
+    `subtasks_total` and `subtasks_completed`, counted over its whole
+    subtree and kept up to date by each write rather than computed here.
+    """
+    root = task_tree(await task_service.get_task_tree_rows(db, task_id, current_user.id))
+    if root is None:
+        raise HTTPException(status_code=404, detail="Task not found")
+    return Response(content=encode_json(root), media_type="application/json")
+
+
 @router.get("/", response_model=List[TaskRead])
-def get_tasks(
+async def get_tasks(
+    request: Request,
     filter_request: TaskFilterRequest = Depends(),
+    tags: Optional[List[str]] = Query(None),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_session)
-):
-    """Get all tasks for the current user with filters and sorting"""
-    tasks = task_service.get_tasks(
-        db=db,
-        user_id=current_user.id,
-        completed=filter_request.completed,
-        priority=filter_request.priority,
-        tags=filter_request.tags,
-        due_date_from=filter_request.due_date_from,
-        due_date_to=filter_request.due_date_to,
-        search_query=filter_request.search_query,
-        sort_by=filter_request.sort_by,
-        sort_order=filter_request.sort_order
-    )
-    return tasks
+    db: AsyncSession = Depends(get_read_session)
+):
+    """
+    Get all tasks for the current user with filters and sorting.
+
+    Passing `limit` switches to keyset pagination: the response carries the
+    token for the following page in the X-Next-Cursor header (absent on the
+    last page), to be sent back as `cursor` with the same sort parameters.
+
+    Completed tasks are moved to an archive some time after completion;
+    `include_archived=true` lists them too, merged into the same order.
+
+    `fields` (e.g. `fields=id,title,completed`) returns only those keys and
+    reads only those columns, leaving out descriptions a list screen does
+    not show.
+
+    Responses carry an ETag built from the user's task version, which every
+    write increments. A matching If-None-Match (or an If-Modified-Since not
+    older than the last write) is answered with 304 after a single version
+    lookup, without running the list query. Cached rows are only served for
+    that same version, so a body never goes out under an ETag newer than
+    its rows.
+    """
+    selected = parse_fields(fields)
+    version, last_modified = await task_service.get_version(db, current_user.id)
+    headers = validator_headers(list_etag(request, current_user.id, version), last_modified)
+    if not_modified(request, headers["ETag"], last_modified):
+        return Response(status_code=304, headers=headers)
+
+    filters = filter_kwargs(filter_request, tags)
+
+    try:
+        if limit is None and cursor is None:
+            rows = await task_service.get_task_rows(
+                db=db, user_id=current_user.id, fields=selected, version=version, **filters
+            )
+            return task_list_response(rows, headers, selected)
+
+        rows, next_cursor = await task_service.get_task_rows_page(
+            db=db,
+            user_id=current_user.id,
+            limit=limit or DEFAULT_PAGE_SIZE,
+            cursor=cursor,
+            fields=selected,
+            version=version,
+            **filters
+        )
+    except ValueError as e:
+        # Malformed cursor (InvalidCursorError) or unknown priority bound
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if next_cursor:
+        headers["X-Next-Cursor"] = next_cursor
+    return task_list_response(rows, headers, selected)
 
 
 @router.put("/{task_id}", response_model=TaskRead)
-def update_task(
+async def update_task(
     task_id: int,
     task_update: TaskUpdate,
+    background_tasks: BackgroundTasks,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_session)
+    shard: Shard = Depends(get_user_shard),
+    db: AsyncSession = Depends(get_write_session)
 ):
     """Update a specific task"""
-    updated_task = task_service.update_task(db, task_id, task_update, current_user.id)
+    try:
+        updated_task = await task_service.update_task(db, task_id, task_update, current_user.id)
+    except ValueError as e:
+        # Parent task not found, or inside the task's own subtree
+        raise HTTPException(status_code=400, detail=str(e))
     if not updated_task:
         raise HTTPException(status_code=404, detail="Task not found")
+    background_tasks.add_task(task_events.publish, "task_updated", [updated_task], shard.name)
     return updated_task
 
 
 @router.delete("/{task_id}")
-def delete_task(
+async def delete_task(
     task_id: int,
+    background_tasks: BackgroundTasks,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_session)
+    shard: Shard = Depends(get_user_shard),
+    db: AsyncSession = Depends(get_write_session)
 ):
     """Delete a specific task"""
-    success = task_service.delete_task(db, task_id, current_user.id)
+    success = await task_service.delete_task(db, task_id, current_user.id)
     if not success:
         raise HTTPException(status_code=404, detail="Task not found")
+    background_tasks.add_task(task_events.publish, "task_deleted", [{"id": task_id}], shard.name)
     return {"message": "Task deleted successfully"}
 
 
 @router.post("/{task_id}/complete", response_model=TaskRead)
-def mark_task_complete(
+async def mark_task_complete(
     task_id: int,
+    background_tasks: BackgroundTasks,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_session)
+    shard: Shard = Depends(get_user_shard),
+    db: AsyncSession = Depends(get_write_session)
 ):
     """Mark a task as complete"""
-    task = task_service.mark_complete(db, task_id, current_user.id)
+    task = await task_service.mark_complete(db, task_id, current_user.id)
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
+    background_tasks.add_task(task_events.publish, "task_completed", [task], shard.name)
     return task
 
 
 @router.get("/due-soon/", response_model=List[TaskRead])
-def get_due_soon_tasks(
+async def get_due_soon_tasks(
     days_ahead: int = 3,
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_session)
+    db: AsyncSession = Depends(get_read_session)
 ):
     """Get tasks that are due soon"""
-    return task_service.get_due_soon_tasks(db, current_user.id, days_ahead)
+    selected = parse_fields(fields)
+    rows = await task_service.get_due_soon_task_rows(db, current_user.id, days_ahead, selected)
+    return task_list_response(rows, fields=selected)
 
 
 @router.get("/recurring/", response_model=List[TaskRead])
-def get_recurring_tasks(
+async def get_recurring_tasks(
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_session)
+    db: AsyncSession = Depends(get_read_session)
 ):
     """Get all recurring tasks"""
-    return task_service.get_recurring_tasks(db, current_user.id)
\ No newline at end of file
+    selected = parse_fields(fields)
+    rows = await task_service.get_recurring_task_rows(db, current_user.id, selected)
+    return task_list_response(rows, fields=selected)
\ No newline at end of file
@@ -1,7 +1,16 @@
 from sqlmodel import create_engine, Session, SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from shared.models.user import User
 from shared.models.task import Task
+from .services.task_search import install_task_search
+from .services.task_statements import compiled_cache_stats
+from .read_replicas import Replica, ReplicaPool
+from .sharding import DEFAULT_SHARD, Shard, ShardMap, parse_shard_urls
+from .sqlite_profile import SQLiteWriter, apply_sqlite_profile, is_sqlite_file
 from shared.core.settings import settings
+from typing import Any, Dict
 import os
 
 # Use the same database configuration as the main app
@@ -9,11 +18,102 @@ DATABASE_URL = os.getenv("DATABASE_URL", settings.DATABASE_URL)
 
 engine = create_engine(DATABASE_URL, echo=False)
 
+# Compiled-cache hits and misses of every engine below (/health/statement-cache)
+compiled_cache_stats.track(Engine)
+
+# Async drivers used for each backend by the async engine
+ASYNC_DRIVERS = {"sqlite": "sqlite+aiosqlite", "postgresql": "postgresql+asyncpg"}
+
+
+def async_database_url(url: str) -> str:
+    """The same database URL with its async driver (aiosqlite / asyncpg)"""
+    parsed = make_url(url)
+    driver = ASYNC_DRIVERS.get(parsed.get_backend_name())
+    if driver:
+        parsed = parsed.set(drivername=driver)
+    return parsed.render_as_string(hide_password=False)
+
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL", async_database_url(DATABASE_URL))
+
+async_engine = create_async_engine(ASYNC_DATABASE_URL, echo=False)
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, expire_on_commit=False)
+
+
+def sqlite_profile(url: str, engine, async_engine) -> Dict[str, Any]:
+    """
+    Set up the SQLite production profile on a SQLite file database's
+    engines, when SQLITE_PRODUCTION_PROFILE is on. Returns the ReplicaPool
+    options for it: a read-only reader pool and the single writer.
+    """
+    if not (settings.SQLITE_PRODUCTION_PROFILE and is_sqlite_file(url)):
+        return {}
+    options = dict(
+        mmap_size=settings.SQLITE_MMAP_SIZE,
+        cache_size_kib=settings.SQLITE_CACHE_SIZE_KIB,
+        busy_timeout_ms=settings.SQLITE_BUSY_TIMEOUT_MS,
+    )
+    apply_sqlite_profile(engine, **options)
+    apply_sqlite_profile(async_engine.sync_engine, **options)
+    reader = create_async_engine(
+        async_engine.url.render_as_string(hide_password=False), echo=False, pool_size=settings.SQLITE_READ_POOL_SIZE, max_overflow=0
+    )
+    apply_sqlite_profile(reader.sync_engine, read_only=True, **options)
+    return {"primary_reader": reader, "writer": SQLiteWriter(engine, max_batch=settings.SQLITE_WRITE_BATCH)}
+
+
+REPLICA_URLS = [url.strip() for url in settings.DATABASE_REPLICA_URLS.split(",") if url.strip()]
+
+replica_pool = ReplicaPool(
+    engine,
+    async_engine,
+    [
+        Replica(url, create_engine(url, echo=False), create_async_engine(async_database_url(url), echo=False))
+        for url in REPLICA_URLS
+    ],
+    sticky_seconds=settings.REPLICA_STICKY_SECONDS,
+    max_lag_seconds=settings.REPLICA_MAX_LAG_SECONDS,
+    check_seconds=settings.REPLICA_CHECK_SECONDS,
+    **sqlite_profile(DATABASE_URL, engine, async_engine),
+)
+
+
+def shard_pool(url: str) -> ReplicaPool:
+    """Engines of a shard from DATABASE_SHARD_URLS"""
+    shard_engine = create_engine(url, echo=False)
+    shard_async_engine = create_async_engine(async_database_url(url), echo=False)
+    return ReplicaPool(
+        shard_engine,
+        shard_async_engine,
+        [],
+        sticky_seconds=settings.REPLICA_STICKY_SECONDS,
+        **sqlite_profile(url, shard_engine, shard_async_engine),
+    )
+
+
+# The default shard is DATABASE_URL with its replicas; further shards have
+# none of their own
+shard_map = ShardMap(
+    [Shard(DEFAULT_SHARD, replica_pool)] + [
+        Shard(name, shard_pool(url)) for name, url in parse_shard_urls(settings.DATABASE_SHARD_URLS)
+    ],
+    directory_ttl=settings.SHARD_DIRECTORY_TTL_SECONDS,
+)
+
 def create_tables():
-    """Create all tables in the database"""
-    SQLModel.metadata.create_all(engine)
+    """Create all tables in the database and on every shard"""
+    for shard in shard_map.shards.values():
+        SQLModel.metadata.create_all(shard.engine)
+        # Databases created before full-text search existed need the index added
+        with shard.engine.begin() as connection:
+            install_task_search(connection)
 
 def get_session():
     """Get a database session"""
     with Session(engine) as session:
-        yield session
\ No newline at end of file
+        yield session
+
+async def get_async_session():
+    """Get an async database session"""
+    async with AsyncSessionLocal() as session:
+        yield session
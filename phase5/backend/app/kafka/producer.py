@@ -1,5 +1,5 @@
 import json
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional
 from aiokafka import AIOKafkaProducer
 import asyncio
 import os
@@ -11,25 +11,32 @@ class KafkaProducer:
         self.bootstrap_servers = os.getenv("KAFKA_BOOTSTRAP_SERVERS", "localhost:9092")
 
     async def start(self):
-        """Initialize the Kafka producer"""
-        self.producer = AIOKafkaProducer(
+        """Initialize the Kafka producer; left unset when the brokers cannot be reached"""
+        producer = AIOKafkaProducer(
             bootstrap_servers=self.bootstrap_servers,
             value_serializer=lambda v: json.dumps(v).encode('utf-8')
         )
-        await self.producer.start()
+        try:
+            await producer.start()
+        except Exception:
+            await producer.stop()
+            raise
+        self.producer = producer
 
     async def stop(self):
         """Stop the Kafka producer"""
         if self.producer:
             await self.producer.stop()
 
-    async def send_task_event(self, event_type: str, task_data: Dict[Any, Any]):
-        """Send a task-related event to Kafka"""
+    async def send_task_event(self, event_type: str, task_data: Dict[Any, Any], shard: Optional[str] = None):
+        """Send a task-related event to Kafka, naming the task's shard when given"""
         event = {
             "event_type": event_type,
             "timestamp": asyncio.get_event_loop().time(),
             "data": task_data
         }
+        if shard is not None:
+            event["shard"] = shard
 
         await self.producer.send_and_wait("task-events", event)
         print(f"Sent {event_type} event to Kafka: {event}")
@@ -48,6 +55,21 @@ class KafkaProducer:
         await self.producer.send_and_wait("reminder-events", event)
         print(f"Sent reminder event to Kafka: {event}")
 
+    async def send_reminder_events(self, reminders: List[Dict[str, Any]]):
+        """
+        Send a batch of reminder events (task_id, user_id, due_date, message).
+
+        All events are queued before waiting, so the producer packs them into
+        as few requests as its batching allows; returns once all are acknowledged.
+        """
+        timestamp = asyncio.get_event_loop().time()
+        deliveries = [
+            await self.producer.send("reminder-events", {"event_type": "reminder", **reminder, "timestamp": timestamp})
+            for reminder in reminders
+        ]
+        await asyncio.gather(*deliveries)
+        print(f"Sent {len(reminders)} reminder events to Kafka")
+
 
 # Global producer instance
 kafka_producer = KafkaProducer()
\ No newline at end of file
@@ -1,11 +1,26 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from phase2.backend.app.api.routes.auth import router as auth_router
 from phase5.backend.app.api.routes.tasks import router as task_router
+from phase5.backend.app.services.task_cache import task_read_cache
+from phase5.backend.app.services.task_statements import compiled_cache_stats, list_statements
+from phase5.backend.app.database import replica_pool, shard_map
+from phase5.backend.app.services.task_versions import UserMovedError
+from phase5.backend.app.api.deps import get_conversation_db, get_conversation_read_db, get_write_db
 # Handle the chat router import carefully to avoid table conflicts
 try:
     from phase3.backend.app.api.routes.chat import router as chat_router
+    from phase3.backend.app.api import deps as chat_deps
+    # The Phase 3 chat routes' sessions: history from the replicas, writes on the
+    # primary, and the assistant's task tools on the user's shard
+    chat_sessions = {
+        chat_deps.get_conversation_db: get_conversation_db,
+        chat_deps.get_conversation_read_db: get_conversation_read_db,
+        chat_deps.get_task_db: get_write_db,
+    }
 except Exception as e:
+    chat_sessions = {}
     print(f"Warning: Could not import Phase 3 chat router: {e}")
     print("Falling back to simple chat router...")
     try:
@@ -35,12 +50,37 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag", "Last-Modified"],
 )
 
+@app.exception_handler(UserMovedError)
+async def user_moved(request: Request, exc: UserMovedError):
+    # The user's tasks are moving to another shard; the retry looks the shard up again
+    shard_map.forget(exc.user_id)
+    return JSONResponse(status_code=503, content={"detail": str(exc)}, headers={"Retry-After": "1"})
+
+@app.on_event("startup")
+async def start_task_events():
+    # Task events are best effort: without Kafka the write routes skip them
+    try:
+        from phase5.backend.app.kafka.producer import kafka_producer
+        await kafka_producer.start()
+    except Exception as e:
+        print(f"Warning: Kafka unavailable, task events are not published: {e}")
+
+@app.on_event("shutdown")
+async def stop_task_events():
+    try:
+        from phase5.backend.app.kafka.producer import kafka_producer
+    except ImportError:
+        return
+    await kafka_producer.stop()
+
 # Include API routes
 app.include_router(auth_router, prefix="/auth", tags=["auth"])
 app.include_router(task_router, prefix="/tasks", tags=["tasks"])
 app.include_router(chat_router, prefix="/chat", tags=["chat"])
+app.dependency_overrides.update(chat_sessions)
 
 @app.get("/")
 def read_root():
@@ -48,4 +88,24 @@ def read_root():
 
 @app.get("/health")
 def health_check():
-    return {"status": "healthy", "features": ["advanced_tasks", "recurring", "due_dates", "priorities", "tags", "search", "filters", "kafka", "dapr"]}
\ No newline at end of file
+    return {"status": "healthy", "features": ["advanced_tasks", "recurring", "due_dates", "priorities", "tags", "search", "filters", "kafka", "dapr"]}
+
+@app.get("/health/task-cache")
+def task_cache_stats():
+    """Hit/miss/eviction counters and size of this process's task read cache"""
+    return task_read_cache.stats()
+
+@app.get("/health/replicas")
+def replica_stats():
+    """Health and lag of the read replicas as of the last check, and users pinned to the primary"""
+    return replica_pool.stats()
+
+@app.get("/health/sqlite-writer")
+def sqlite_writer_stats():
+    """Group-commit counters of each shard's SQLite writer (SQLITE_PRODUCTION_PROFILE)"""
+    return {name: shard.pool.writer.stats() for name, shard in shard_map.shards.items() if shard.pool.writer}
+
+@app.get("/health/statement-cache")
+def statement_cache_stats():
+    """Reuse of the task list statement templates and SQLAlchemy's compiled-SQL cache hit ratio"""
+    return {"templates": list_statements.stats(), "compiled": compiled_cache_stats.stats()}
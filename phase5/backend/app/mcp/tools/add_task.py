@@ -1,7 +1,8 @@
 from typing import Optional, List
 from datetime import datetime
-from ...services.task_service import TaskService
-from ...models.task import TaskCreate
+from ...services.async_task_service import AsyncTaskService
+from ...services.task_cache import task_read_cache
+from shared.models.task import TaskCreate
 
 
 async def add_task(
@@ -27,15 +28,16 @@ async def add_task(
         recurrence_pattern: Recurrence pattern (daily, weekly, monthly, yearly)
         parent_task_id: ID of parent task if this is a subtask
     """
-    from ...database import get_session
+    from ...database import shard_map
     from ...api.deps import get_current_user
 
     # Get current user (in a real implementation, this would come from context)
     # For now, assuming user_id 1 for demonstration
     user_id = 1
 
-    async with get_session() as session:
-        task_service = TaskService()
+    shard = await shard_map.shard_for_async(user_id)
+    async with shard.pool.write_session() as session:
+        task_service = AsyncTaskService(cache=task_read_cache)
 
         task_create = TaskCreate(
             title=title,
@@ -48,7 +50,8 @@ async def add_task(
             parent_task_id=parent_task_id
         )
 
-        created_task = task_service.create_task(session, task_create, user_id)
+        created_task = await task_service.create_task(session, task_create, user_id)
+        shard.pool.pin(user_id)
 
         # Send event to Kafka
         from ..kafka.producer import kafka_producer
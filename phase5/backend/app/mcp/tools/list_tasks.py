@@ -1,6 +1,18 @@
 from typing import Optional, List
 from datetime import datetime
-from ...services.task_service import TaskService
+from ...services.async_task_service import AsyncTaskService
+from ...services.task_cache import task_read_cache
+from ...services.task_serialization import READ_FIELDS, select_fields, task_record
+
+# Keys of each listed task when no fields are requested
+LIST_FIELDS = [
+    "id", "title", "description", "completed", "priority", "tags", "due_date", "recurring",
+    "recurrence_pattern", "parent_task_id", "created_at", "updated_at"
+]
+
+
+def _json_value(value):
+    return value.isoformat() if isinstance(value, datetime) else value
 
 
 async def list_tasks(
@@ -10,8 +22,13 @@ async def list_tasks(
     due_date_from: Optional[datetime] = None,
     due_date_to: Optional[datetime] = None,
     search_query: Optional[str] = None,
-    sort_by: str = "created_at",
-    sort_order: str = "asc"
+    sort_by: Optional[str] = None,
+    sort_order: str = "asc",
+    tag_match: str = "all",
+    min_priority: Optional[str] = None,
+    max_priority: Optional[str] = None,
+    include_archived: bool = False,
+    fields: Optional[List[str]] = None
 ):
     """
     List tasks with advanced filtering and sorting
@@ -19,24 +36,35 @@ async def list_tasks(
     Args:
         completed: Filter by completion status
         priority: Filter by priority level
-        tags: Filter by tags
+        tags: Filter by tags (exact match)
         due_date_from: Filter tasks with due date after this date
         due_date_to: Filter tasks with due date before this date
-        search_query: Search in title and description
-        sort_by: Field to sort by (created_at, due_date, priority)
+        search_query: Full-text search in title and description
+        sort_by: Field to sort by (created_at, due_date, priority, relevance),
+            defaults to relevance when searching and created_at otherwise
         sort_order: Sort order (asc, desc)
+        tag_match: Whether tasks must carry all of the tags or any of them (all, any)
+        min_priority: Only include tasks at or above this priority
+        max_priority: Only include tasks at or below this priority
+        include_archived: Also list completed tasks that were moved to the archive
+        fields: Only return (and read) these task fields, id is always included
     """
-    from ...database import get_session
+    from sqlmodel.ext.asyncio.session import AsyncSession
+    from ...database import shard_map
     from ...api.deps import get_current_user
 
     # Get current user (in a real implementation, this would come from context)
     # For now, assuming user_id 1 for demonstration
     user_id = 1
+    selected = select_fields(fields or LIST_FIELDS)
 
-    async with get_session() as session:
-        task_service = TaskService()
+    # The user's shard, on a read replica unless the user wrote recently;
+    # lag checks are left to the routes
+    shard = await shard_map.shard_for_async(user_id)
+    async with AsyncSession(shard.pool.read_engine(user_id), expire_on_commit=False) as session:
+        task_service = AsyncTaskService(cache=task_read_cache)
 
-        tasks = task_service.get_tasks(
+        rows = await task_service.get_task_rows(
             db=session,
             user_id=user_id,
             completed=completed,
@@ -46,26 +74,17 @@ async def list_tasks(
             due_date_to=due_date_to,
             search_query=search_query,
             sort_by=sort_by,
-            sort_order=sort_order
+            sort_order=sort_order,
+            tag_match=tag_match,
+            min_priority=min_priority,
+            max_priority=max_priority,
+            include_archived=include_archived,
+            fields=selected
         )
 
-        return [
-            {
-                "id": task.id,
-                "title": task.title,
-                "description": task.description,
-                "completed": task.completed,
-                "priority": task.priority,
-                "tags": task.tags,
-                "due_date": task.due_date.isoformat() if task.due_date else None,
-                "recurring": task.recurring,
-                "recurrence_pattern": task.recurrence_pattern,
-                "parent_task_id": task.parent_task_id,
-                "created_at": task.created_at.isoformat(),
-                "updated_at": task.updated_at.isoformat() if task.updated_at else None
-            }
-            for task in tasks
-        ]
+        keys = selected if fields else LIST_FIELDS
+        records = (task_record(row, selected) for row in rows)
+        return [{key: _json_value(record[key]) for key in keys} for record in records]
 
 
 # Define the tool schema for MCP
@@ -103,19 +122,47 @@ list_tasks_schema = {
             },
             "search_query": {
                 "type": "string",
-                "description": "Search in title and description"
+                "description": "Full-text search in title and description"
             },
             "sort_by": {
                 "type": "string",
-                "enum": ["created_at", "due_date", "priority"],
-                "description": "Field to sort by",
-                "default": "created_at"
+                "enum": ["created_at", "due_date", "priority", "relevance"],
+                "description": "Field to sort by (priority orders low < medium < high < urgent), defaults to relevance when searching and created_at otherwise"
             },
             "sort_order": {
                 "type": "string",
                 "enum": ["asc", "desc"],
                 "description": "Sort order",
                 "default": "asc"
+            },
+            "tag_match": {
+                "type": "string",
+                "enum": ["all", "any"],
+                "description": "Match tasks carrying all of the tags or any of them",
+                "default": "all"
+            },
+            "min_priority": {
+                "type": "string",
+                "enum": ["low", "medium", "high", "urgent"],
+                "description": "Only include tasks at or above this priority"
+            },
+            "max_priority": {
+                "type": "string",
+                "enum": ["low", "medium", "high", "urgent"],
+                "description": "Only include tasks at or below this priority"
+            },
+            "include_archived": {
+                "type": "boolean",
+                "description": "Also list completed tasks that were moved to the archive",
+                "default": False
+            },
+            "fields": {
+                "type": "array",
+                "items": {
+                    "type": "string",
+                    "enum": READ_FIELDS
+                },
+                "description": "Only return these task fields (id is always included), e.g. for a compact list"
             }
         }
     }
@@ -0,0 +1,174 @@
+from typing import Any, Dict, List, Optional
+from datetime import datetime
+import threading
+import time
+from sqlalchemy import func, select
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlmodel.ext.asyncio.session import AsyncSession
+from shared.models.task import UserTaskVersion
+from .sqlite_profile import SQLiteWriter
+
+
+class Replica:
+    """A read replica's engines and the health found by the last check"""
+
+    def __init__(self, url: str, engine: Engine, async_engine: AsyncEngine):
+        self.url = url
+        self.engine = engine
+        self.async_engine = async_engine
+        # Unhealthy until checked, so a replica is never read unmeasured
+        self.healthy = False
+        self.lag: Optional[float] = None
+        self.error: Optional[str] = None
+
+
+class ReplicaPool:
+    """
+    Routes reads between the primary and a pool of read replicas.
+
+    Writes always go to the primary. Reads go round robin to the replicas
+    found healthy by the last check, and to the primary when there are none
+    or when the user wrote within sticky_seconds (read-your-writes).
+
+    Replication lag is measured on the app's own write clock: every task
+    write stamps user_task_versions.updated_at on the primary, so a replica
+    whose newest stamp is older than the primary's is missing the writes
+    since then, and lags by the age of the oldest of them. Replicas lagging
+    by more than max_lag_seconds, or failing the check, take no reads until
+    a later check finds them caught up. Checks run at most every
+    check_seconds, triggered by reads.
+
+    Pins are per process: with several workers a user is only pinned in the
+    worker that handled the write. Keeping sticky_seconds above
+    max_lag_seconds + check_seconds covers what a replica may fall behind
+    between two checks.
+
+    Under the SQLite production profile the primary's reads use
+    primary_reader, a pool of read-only connections, and write sessions
+    carry the database's SQLiteWriter (see sqlite_profile and
+    AsyncTaskService).
+    """
+
+    def __init__(
+        self,
+        primary: Engine,
+        primary_async: AsyncEngine,
+        replicas: List[Replica],
+        sticky_seconds: float = 15.0,
+        max_lag_seconds: float = 10.0,
+        check_seconds: float = 5.0,
+        primary_reader: Optional[AsyncEngine] = None,
+        writer: Optional[SQLiteWriter] = None
+    ):
+        self.primary = primary
+        self.primary_async = primary_async
+        self.primary_reader = primary_reader or primary_async
+        self.writer = writer
+        self.replicas = replicas
+        self.sticky_seconds = sticky_seconds
+        self.max_lag_seconds = max_lag_seconds
+        self.check_seconds = check_seconds
+        self._pins: Dict[int, float] = {}
+        self._turn = 0
+        self._checked_at: Optional[float] = None
+        self._check_lock = threading.Lock()
+
+    def pin(self, user_id: int) -> None:
+        """Send the user's reads to the primary for the next sticky_seconds"""
+        self._pins[user_id] = time.monotonic() + self.sticky_seconds
+
+    def pinned(self, user_id: int) -> bool:
+        until = self._pins.get(user_id)
+        if until is None:
+            return False
+        if until <= time.monotonic():
+            self._pins.pop(user_id, None)
+            return False
+        return True
+
+    def check_due(self) -> bool:
+        return bool(self.replicas) and (
+            self._checked_at is None or time.monotonic() - self._checked_at >= self.check_seconds
+        )
+
+    def read_replica(self, user_id: Optional[int] = None) -> Optional[Replica]:
+        """The replica to read from next, None for the primary"""
+        if user_id is not None and self.pinned(user_id):
+            return None
+        healthy = [replica for replica in self.replicas if replica.healthy]
+        if not healthy:
+            return None
+        self._turn += 1
+        return healthy[self._turn % len(healthy)]
+
+    def read_engine(self, user_id: Optional[int] = None) -> AsyncEngine:
+        replica = self.read_replica(user_id)
+        return replica.async_engine if replica else self.primary_reader
+
+    def write_session(self) -> AsyncSession:
+        """Session on the primary for writes, carrying the writer when there is one"""
+        return AsyncSession(self.primary_async, expire_on_commit=False, info={"writer": self.writer})
+
+    def sync_engine(self, async_engine: AsyncEngine) -> Engine:
+        """The blocking engine of the same database as async_engine, e.g. for streaming"""
+        for replica in self.replicas:
+            if replica.async_engine is async_engine:
+                return replica.engine
+        return self.primary
+
+    def check(self, now: Optional[datetime] = None) -> None:
+        """
+        Measure every replica's lag and update its health. Blocking; a check
+        already running in another thread makes this a no-op.
+        """
+        if not self._check_lock.acquire(blocking=False):
+            return
+        try:
+            now = now or datetime.utcnow()
+            with self.primary.connect() as primary:
+                latest = primary.execute(select(func.max(UserTaskVersion.updated_at))).scalar()
+                for replica in self.replicas:
+                    try:
+                        replica.lag, replica.error = self._lag(primary, replica, latest, now), None
+                    except SQLAlchemyError as e:
+                        replica.lag, replica.error = None, str(e).splitlines()[0]
+                    replica.healthy = replica.lag is not None and replica.lag <= self.max_lag_seconds
+
+            clock = time.monotonic()
+            for user_id, until in list(self._pins.items()):
+                if until <= clock:
+                    self._pins.pop(user_id, None)
+            self._checked_at = clock
+        finally:
+            self._check_lock.release()
+
+    def _lag(self, primary, replica: Replica, latest: Optional[datetime], now: datetime) -> float:
+        """Seconds since the oldest primary write the replica does not have yet"""
+        with replica.engine.connect() as connection:
+            replica_latest = connection.execute(select(func.max(UserTaskVersion.updated_at))).scalar()
+        if latest is None or (replica_latest is not None and replica_latest >= latest):
+            return 0.0
+        missing = select(func.min(UserTaskVersion.updated_at))
+        if replica_latest is not None:
+            missing = missing.where(UserTaskVersion.updated_at > replica_latest)
+        oldest = primary.execute(missing).scalar()
+        return max(0.0, (now - oldest).total_seconds())
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "replicas": [
+                {
+                    "url": make_url(replica.url).render_as_string(hide_password=True),
+                    "healthy": replica.healthy,
+                    "lag_seconds": replica.lag,
+                    "error": replica.error,
+                }
+                for replica in self.replicas
+            ],
+            "pinned_users": len(self._pins),
+            "checked_seconds_ago": (
+                None if self._checked_at is None else round(time.monotonic() - self._checked_at, 3)
+            ),
+        }
@@ -0,0 +1,115 @@
+from typing import Any, Dict, List, Optional, Tuple
+from datetime import datetime
+from sqlmodel.ext.asyncio.session import AsyncSession
+from shared.models.task import TaskCreate, TaskUpdate, TaskRead, TaskStats, TaskBulkResult
+from .task_service import TaskService
+from .task_cache import TaskReadCache
+
+
+class AsyncTaskService:
+    """
+    TaskService for AsyncSession callers (the phase5 routes and MCP tools).
+
+    Each method runs the sync implementation through AsyncSession.run_sync.
+    SQLAlchemy drives the async driver from inside it, so waiting on the
+    database suspends the coroutine instead of holding a threadpool worker,
+    while query building, caching and versioning stay in TaskService, which
+    scripts keep using directly.
+
+    Writes on a session carrying a SQLiteWriter (info["writer"], see
+    ReplicaPool.write_session) run on the writer's thread instead, in its
+    next group commit.
+    """
+
+    def __init__(self, cache: Optional[TaskReadCache] = None):
+        self.sync = TaskService(cache=cache)
+
+    def invalidate(self, user_id: int) -> None:
+        self.sync.invalidate(user_id)
+
+    async def _write(self, db: AsyncSession, method, user_id: int, *args) -> Any:
+        writer = db.info.get("writer")
+        if writer is None:
+            return await db.run_sync(method, *args)
+        result = await writer.run(method, *args)
+        # Readers may have cached the state from before the batch committed
+        self.invalidate(user_id)
+        return result
+
+    async def create_task(self, db: AsyncSession, task_data: TaskCreate, user_id: int) -> TaskRead:
+        return await self._write(db, self.sync.create_task, user_id, task_data, user_id)
+
+    async def get_task(
+        self, db: AsyncSession, task_id: int, user_id: int, include_archived: bool = False
+    ) -> Optional[TaskRead]:
+        return await db.run_sync(self.sync.get_task, task_id, user_id, include_archived)
+
+    async def get_task_tree_rows(self, db: AsyncSession, task_id: int, user_id: int) -> List[Tuple]:
+        return await db.run_sync(self.sync.get_task_tree_rows, task_id, user_id)
+
+    async def get_version(self, db: AsyncSession, user_id: int) -> Tuple[int, Optional[datetime]]:
+        return await db.run_sync(self.sync.get_version, user_id)
+
+    async def get_stats(self, db: AsyncSession, user_id: int) -> TaskStats:
+        return await db.run_sync(self.sync.get_stats, user_id)
+
+    async def get_calendar(self, db: AsyncSession, user_id: int, start: datetime, end: datetime) -> List[Dict[str, Any]]:
+        return await db.run_sync(self.sync.get_calendar, user_id, start, end)
+
+    async def get_changes(self, db: AsyncSession, user_id: int, since: int, limit: int) -> Dict[str, Any]:
+        return await db.run_sync(self.sync.get_changes, user_id, since, limit)
+
+    async def get_tasks(self, db: AsyncSession, user_id: int, **filters) -> List[TaskRead]:
+        return await db.run_sync(self.sync.get_tasks, user_id, **filters)
+
+    async def get_task_rows(self, db: AsyncSession, user_id: int, **filters) -> List[Tuple]:
+        return await db.run_sync(self.sync.get_task_rows, user_id, **filters)
+
+    async def get_task_rows_page(
+        self, db: AsyncSession, user_id: int, limit: int, cursor: Optional[str] = None, **filters
+    ) -> Tuple[List[Tuple], Optional[str]]:
+        return await db.run_sync(self.sync.get_task_rows_page, user_id, limit, cursor, **filters)
+
+    async def export_statement(self, db: AsyncSession, user_id: int, **filters) -> Any:
+        return await db.run_sync(self.sync.export_statement, user_id, **filters)
+
+    async def update_task(
+        self, db: AsyncSession, task_id: int, task_update: TaskUpdate, user_id: int
+    ) -> Optional[TaskRead]:
+        return await self._write(db, self.sync.update_task, user_id, task_id, task_update, user_id)
+
+    async def delete_task(self, db: AsyncSession, task_id: int, user_id: int) -> bool:
+        return await self._write(db, self.sync.delete_task, user_id, task_id, user_id)
+
+    async def mark_complete(self, db: AsyncSession, task_id: int, user_id: int) -> Optional[TaskRead]:
+        return await self._write(db, self.sync.mark_complete, user_id, task_id, user_id)
+
+    async def bulk_create_tasks(
+        self, db: AsyncSession, tasks_data: List[TaskCreate], user_id: int, atomic: bool = True
+    ) -> TaskBulkResult:
+        return await self._write(db, self.sync.bulk_create_tasks, user_id, tasks_data, user_id, atomic)
+
+    async def bulk_update_tasks(
+        self, db: AsyncSession, task_ids: List[int], task_update: TaskUpdate, user_id: int, atomic: bool = True
+    ) -> TaskBulkResult:
+        return await self._write(db, self.sync.bulk_update_tasks, user_id, task_ids, task_update, user_id, atomic)
+
+    async def bulk_complete_tasks(
+        self, db: AsyncSession, task_ids: List[int], user_id: int, atomic: bool = True
+    ) -> TaskBulkResult:
+        return await self._write(db, self.sync.bulk_complete_tasks, user_id, task_ids, user_id, atomic)
+
+    async def bulk_delete_tasks(
+        self, db: AsyncSession, task_ids: List[int], user_id: int, atomic: bool = True
+    ) -> TaskBulkResult:
+        return await self._write(db, self.sync.bulk_delete_tasks, user_id, task_ids, user_id, atomic)
+
+    async def get_due_soon_task_rows(
+        self, db: AsyncSession, user_id: int, days_ahead: int = 3, fields: Optional[Tuple[str, ...]] = None
+    ) -> List[Tuple]:
+        return await db.run_sync(self.sync.get_due_soon_task_rows, user_id, days_ahead, fields)
+
+    async def get_recurring_task_rows(
+        self, db: AsyncSession, user_id: int, fields: Optional[Tuple[str, ...]] = None
+    ) -> List[Tuple]:
+        return await db.run_sync(self.sync.get_recurring_task_rows, user_id, fields)
@@ -0,0 +1,159 @@
+from typing import Any, Callable, Dict, List, Optional, Sequence, Set
+from datetime import datetime, timedelta
+import asyncio
+from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlalchemy import select
+from shared.models.task import Task
+from .task_recurrence import TEMPLATE_COLUMNS, TEMPLATES, insert_instances, occurrences, set_next_occurrences
+
+
+class RecurrenceMaterializer:
+    """
+    Generates the instances of recurring tasks ahead of time.
+
+    Every recurring task with a due date anchors a series; each occurrence
+    becomes an open subtask carrying series_id and occurrence_date, unique
+    together. The recurring task stores its next occurrence not generated
+    yet, so a pass only reads the series whose next occurrence falls inside
+    the horizon (ix_tasks_recurring_next) and writes their instances with
+    one INSERT per chunk. Series seen for the first time, or whose due date
+    or pattern changed, start from the first occurrence from now on.
+
+    Completing an instance (or the recurring task) makes sure the occurrence
+    after it exists even when it lies beyond the horizon, e.g. for yearly
+    tasks.
+    """
+
+    def __init__(self, horizon: timedelta = timedelta(days=14), chunk_size: int = 500, max_per_series: int = 500):
+        self.horizon = horizon
+        self.chunk_size = chunk_size
+        # Bounds the instances a single series gets per pass
+        self.max_per_series = max_per_series
+        self._completed: Set[int] = set()
+        self._wake = asyncio.Event()
+        self._running = False
+
+    def materialize(
+        self,
+        db: Session,
+        templates: Sequence,
+        now: Optional[datetime] = None,
+        through: Optional[Dict[int, datetime]] = None,
+    ) -> int:
+        """
+        Generate the missing instances of the given TEMPLATE_COLUMNS rows up
+        to now + horizon (or later per series via through) inside the
+        caller's transaction; returns the number created.
+        """
+        now = now or datetime.utcnow()
+        cutoff = now + self.horizon
+        instances, next_at = [], {}
+        for template in templates:
+            until = max(cutoff, (through or {}).get(template.id, cutoff))
+            start = template.next_occurrence_at or now
+            generated = 0
+            for occurs_at in occurrences(template.due_date, template.recurrence_pattern, start):
+                if occurs_at > until or generated == self.max_per_series:
+                    next_at[template.id] = occurs_at
+                    break
+                instances.append((template, occurs_at))
+                generated += 1
+
+        created = insert_instances(db, instances)
+        set_next_occurrences(db, next_at)
+        return created
+
+    def run_once(self, db: Session, now: Optional[datetime] = None) -> int:
+        """
+        Generate every series' instances up to now + horizon, committing per
+        chunk of series; returns the number created.
+
+        Each chunk moves its series' next occurrence past the horizon, so the
+        same query returns the next chunk until none are left.
+        """
+        now = now or datetime.utcnow()
+        cutoff = now + self.horizon
+        pending = (Task.next_occurrence_at.is_(None)) | (Task.next_occurrence_at <= cutoff)
+        created = 0
+        while True:
+            templates = db.execute(
+                select(*TEMPLATE_COLUMNS)
+                .where(*TEMPLATES, pending)
+                .order_by(Task.next_occurrence_at, Task.id)
+                .limit(self.chunk_size)
+            ).all()
+            if not templates:
+                return created
+            created += self.materialize(db, templates, now)
+            db.commit()
+
+    def complete(self, db: Session, task_ids: List[int], now: Optional[datetime] = None) -> int:
+        """
+        Make sure the occurrence after each completed task exists (task_ids
+        may be instances or recurring tasks; others are ignored). Commits,
+        and returns the number of instances created.
+        """
+        if not task_ids:
+            return 0
+        completed = db.execute(
+            select(Task.id, Task.series_id, Task.occurrence_date, Task.due_date)
+            .where(Task.id.in_(task_ids))
+        ).all()
+        # The occurrence each completion stands for, per series
+        completed_at: Dict[int, datetime] = {}
+        for task_id, series_id, occurrence_date, due_date in completed:
+            at = occurrence_date if series_id is not None else due_date
+            if at is not None:
+                series_id = series_id or task_id
+                completed_at[series_id] = max(at, completed_at.get(series_id, at))
+
+        templates = db.execute(
+            select(*TEMPLATE_COLUMNS).where(*TEMPLATES, Task.id.in_(list(completed_at)))
+        ).all() if completed_at else []
+        through = {
+            template.id: next(occurrences(
+                template.due_date, template.recurrence_pattern, completed_at[template.id] + timedelta(microseconds=1)
+            ))
+            for template in templates
+        }
+        created = self.materialize(db, templates, now, through)
+        db.commit()
+        return created
+
+    def on_task_event(self, event: Dict[str, Any]) -> None:
+        """Queue the task of a task_completed message (KafkaProducer.send_task_event) for run()"""
+        task_id = (event.get("data") or {}).get("id")
+        if event.get("event_type") == "task_completed" and task_id is not None:
+            self._completed.add(task_id)
+            self._wake.set()
+
+    async def run(self, session_factory: Callable[[], AsyncSession], interval_seconds: float = 300) -> None:
+        """Run a full pass every interval_seconds, and completions as they arrive, until stop()"""
+        loop = asyncio.get_running_loop()
+        next_pass = loop.time()
+        self._running = True
+        while self._running:
+            self._wake.clear()
+            completed, self._completed = list(self._completed), set()
+            try:
+                async with session_factory() as db:
+                    if completed:
+                        await db.run_sync(self.complete, completed)
+                    if loop.time() >= next_pass:
+                        await db.run_sync(self.run_once)
+                        next_pass = loop.time() + interval_seconds
+            except Exception as e:
+                print(f"Recurrence materializer error: {e}")
+                self._completed.update(completed)
+                next_pass = loop.time() + min(interval_seconds, 30)
+
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=max(next_pass - loop.time(), 0))
+            except asyncio.TimeoutError:
+                pass
+
+    def stop(self) -> None:
+        """Make run() return after its current pass"""
+        self._running = False
+        self._wake.set()
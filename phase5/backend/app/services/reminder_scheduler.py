@@ -0,0 +1,278 @@
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from datetime import datetime, timedelta, timezone
+import asyncio
+import heapq
+from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlalchemy import select, update
+from shared.models.task import Task
+from .task_pagination import keyset_clause
+from .task_versions import bump_task_versions, owner_change_seq
+
+
+# Columns of a claimed reminder, turned into the event by reminder_event()
+REMINDER_COLUMNS = (Task.id, Task.user_id, Task.title, Task.due_date)
+
+# The predicate of ix_tasks_reminder_due: open tasks with a due date whose
+# reminder has not been sent
+PENDING = (Task.completed == False, Task.reminder_sent == False, Task.due_date.is_not(None))
+
+# Receives one batch of reminder events, e.g. KafkaProducer.send_reminder_events
+Publish = Callable[[List[Dict[str, Any]]], Awaitable[None]]
+
+
+def reminder_event(row) -> Dict[str, Any]:
+    """Event payload for a REMINDER_COLUMNS row, as taken by send_reminder_events"""
+    task_id, user_id, title, due_date = row
+    return {
+        "task_id": task_id,
+        "user_id": user_id,
+        "due_date": due_date.isoformat(),
+        "message": f"'{title}' is due at {due_date:%Y-%m-%d %H:%M} UTC",
+    }
+
+
+def _parse_due_date(value: Any) -> Optional[datetime]:
+    """A due date from a task event as the naive UTC datetime stored in tasks"""
+    if value is None or isinstance(value, datetime):
+        due_date = value
+    else:
+        due_date = datetime.fromisoformat(str(value))
+    if due_date is not None and due_date.tzinfo is not None:
+        due_date = due_date.astimezone(timezone.utc).replace(tzinfo=None)
+    return due_date
+
+
+class ReminderScheduler:
+    """
+    Sends one reminder event per open task once its due date is less than
+    lead_time away, and sets reminder_sent.
+
+    Only tasks due within lead_time + horizon are held in memory, in a heap
+    ordered by due date. The window is read from ix_tasks_reminder_due in
+    keyset chunks across all users, and only the slice that newly entered
+    it is read on each refresh, so the cost follows the number of upcoming
+    reminders rather than the number of users or tasks. Task events keep
+    the loaded window current between refreshes; resync() reloads it to
+    pick up changes that came without an event.
+
+    Every batch is claimed with one UPDATE that only matches tasks still
+    pending, so a task completed or re-dated since it was loaded, or claimed
+    by another scheduler, is skipped.
+    """
+
+    def __init__(
+        self,
+        lead_time: timedelta = timedelta(minutes=15),
+        horizon: timedelta = timedelta(minutes=10),
+        chunk_size: int = 5000,
+        batch_size: int = 500,
+        stale_after: timedelta = timedelta(days=1),
+    ):
+        self.lead_time = lead_time
+        self.horizon = horizon
+        self.chunk_size = chunk_size
+        self.batch_size = batch_size
+        # Overdue tasks older than this when the window is (re)loaded get no reminder
+        self.stale_after = stale_after
+        # Due dates up to here are loaded; None before the first load
+        self.loaded_until: Optional[datetime] = None
+        # (due date, task id); entries whose task was rescheduled or dropped
+        # since are skipped when popped (see _scheduled)
+        self._heap: List[Tuple[datetime, int]] = []
+        self._scheduled: Dict[int, datetime] = {}
+        self._wake = asyncio.Event()
+        self._running = False
+
+    def __len__(self) -> int:
+        return len(self._scheduled)
+
+    def load(self, db: Session, now: Optional[datetime] = None) -> int:
+        """Extend the window to due dates up to now + lead_time + horizon; returns the tasks added"""
+        now = now or datetime.utcnow()
+        until = now + self.lead_time + self.horizon
+        if self.loaded_until is None:
+            lower = Task.due_date >= now - self.stale_after
+        else:
+            lower = Task.due_date > self.loaded_until
+
+        added = 0
+        last = None
+        while True:
+            statement = select(Task.id, Task.due_date).where(*PENDING, lower, Task.due_date <= until)
+            if last is not None:
+                statement = statement.where(keyset_clause(Task.due_date, False, "asc", last.due_date, last.id))
+            rows = db.execute(statement.order_by(Task.due_date, Task.id).limit(self.chunk_size)).all()
+            for task_id, due_date in rows:
+                self._schedule(task_id, due_date)
+            added += len(rows)
+            if len(rows) < self.chunk_size:
+                break
+            last = rows[-1]
+
+        self.loaded_until = max(until, self.loaded_until or until)
+        return added
+
+    def resync(self, db: Session, now: Optional[datetime] = None) -> int:
+        """Drop the in-memory window and load it again from the database"""
+        self._heap.clear()
+        self._scheduled.clear()
+        self.loaded_until = None
+        return self.load(db, now)
+
+    def on_task_event(self, event: Dict[str, Any]) -> None:
+        """Apply a task-events message (KafkaProducer.send_task_event) to the loaded window"""
+        event_type = event.get("event_type")
+        data = event.get("data") or {}
+        task_id = data.get("id")
+        if task_id is None:
+            return
+        if event_type in ("task_deleted", "task_completed") or data.get("completed") or data.get("reminder_sent"):
+            self._scheduled.pop(task_id, None)
+            return
+        if "due_date" not in data:
+            return
+
+        due_date = _parse_due_date(data["due_date"])
+        if due_date is not None and self.loaded_until is not None and due_date <= self.loaded_until:
+            if self._schedule(task_id, due_date) and due_date == self._heap[0][0]:
+                # Due before whatever run() is sleeping for
+                self._wake.set()
+        else:
+            # No due date, or beyond the window: picked up by a later load
+            self._scheduled.pop(task_id, None)
+        if len(self._heap) > 2 * len(self._scheduled) + 1024:
+            self._heap = [(due, task_id) for task_id, due in self._scheduled.items()]
+            heapq.heapify(self._heap)
+
+    def _schedule(self, task_id: int, due_date: datetime) -> bool:
+        if self._scheduled.get(task_id) == due_date:
+            return False
+        self._scheduled[task_id] = due_date
+        heapq.heappush(self._heap, (due_date, task_id))
+        return True
+
+    def pop_due(self, now: Optional[datetime] = None) -> List[Tuple[datetime, int]]:
+        """Remove and return the (due date, task id) entries whose reminder is due, earliest first"""
+        cutoff = (now or datetime.utcnow()) + self.lead_time
+        due = []
+        while self._heap and self._heap[0][0] <= cutoff:
+            due_date, task_id = heapq.heappop(self._heap)
+            if self._scheduled.get(task_id) == due_date:
+                del self._scheduled[task_id]
+                due.append((due_date, task_id))
+        return due
+
+    def next_reminder_at(self) -> Optional[datetime]:
+        """When the earliest scheduled reminder is due; None when nothing is scheduled"""
+        while self._heap and self._scheduled.get(self._heap[0][1]) != self._heap[0][0]:
+            heapq.heappop(self._heap)
+        return self._heap[0][0] - self.lead_time if self._heap else None
+
+    def claim(self, db: Session, task_ids: List[int], now: Optional[datetime] = None) -> List[Tuple]:
+        """
+        Set reminder_sent on the given tasks with one UPDATE inside the
+        caller's transaction and return the REMINDER_COLUMNS rows of those
+        that still needed a reminder.
+
+        UPDATE ... RETURNING where the dialect supports it, otherwise a
+        locking SELECT followed by the UPDATE. The owners' task versions are
+        bumped first and become the rows' change_seq, since reminder_sent is
+        part of every task read.
+        """
+        if not task_ids:
+            return []
+        conditions = [Task.id.in_(task_ids), *PENDING, Task.due_date <= (now or datetime.utcnow()) + self.lead_time]
+        owners = db.execute(select(Task.user_id).where(*conditions).distinct()).scalars().all()
+        if not owners:
+            return []
+        bump_task_versions(db, owners)
+        # Only tasks of the bumped owners, should another one turn due meanwhile
+        conditions.append(Task.user_id.in_(owners))
+        values = {"reminder_sent": True, "change_seq": owner_change_seq()}
+        statement = update(Task).where(*conditions).values(**values)
+        if db.get_bind().dialect.update_returning:
+            rows = db.execute(
+                statement.returning(*REMINDER_COLUMNS).execution_options(synchronize_session=False)
+            ).all()
+        else:
+            rows = db.execute(select(*REMINDER_COLUMNS).where(*conditions).with_for_update()).all()
+            if rows:
+                db.execute(
+                    update(Task)
+                    .where(Task.id.in_([row.id for row in rows]))
+                    .values(**values)
+                    .execution_options(synchronize_session=False)
+                )
+        return rows
+
+    async def dispatch(self, db: AsyncSession, publish: Publish, now: Optional[datetime] = None) -> int:
+        """
+        Send every reminder that is due; returns the number sent.
+
+        Each batch is claimed, published and then committed. When publishing
+        fails the claim is rolled back and the batch and the ones after it
+        are put back on the heap before the error propagates, so delivery is
+        at least once.
+        """
+        now = now or datetime.utcnow()
+        due = self.pop_due(now)
+        sent = 0
+        for start in range(0, len(due), self.batch_size):
+            batch = due[start:start + self.batch_size]
+            try:
+                rows = await db.run_sync(self.claim, [task_id for _, task_id in batch], now)
+                if rows:
+                    await publish([reminder_event(row) for row in rows])
+                await db.commit()
+            except Exception:
+                await db.rollback()
+                for due_date, task_id in due[start:]:
+                    self._schedule(task_id, due_date)
+                raise
+            sent += len(rows)
+        return sent
+
+    async def run(
+        self,
+        session_factory: Callable[[], AsyncSession],
+        publish: Publish,
+        refresh_seconds: float = 30,
+        resync_seconds: float = 600,
+    ) -> None:
+        """
+        Load, dispatch and sleep until the next reminder is due, a task event
+        schedules an earlier one, or refresh_seconds pass. Runs until stop().
+        """
+        loop = asyncio.get_running_loop()
+        next_resync = loop.time()
+        self._running = True
+        while self._running:
+            self._wake.clear()
+            wait = refresh_seconds
+            try:
+                async with session_factory() as db:
+                    if loop.time() >= next_resync:
+                        await db.run_sync(self.resync)
+                        next_resync = loop.time() + resync_seconds
+                    else:
+                        await db.run_sync(self.load)
+                    # End the read transaction before the claims
+                    await db.commit()
+                    await self.dispatch(db, publish)
+                next_at = self.next_reminder_at()
+                if next_at is not None:
+                    wait = min(wait, max((next_at - datetime.utcnow()).total_seconds(), 0))
+            except Exception as e:
+                # Failed batches are back on the heap; retry after a refresh interval
+                print(f"Reminder scheduler error: {e}")
+
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=wait)
+            except asyncio.TimeoutError:
+                pass
+
+    def stop(self) -> None:
+        """Make run() return after its current pass"""
+        self._running = False
+        self._wake.set()
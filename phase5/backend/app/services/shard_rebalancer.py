@@ -0,0 +1,318 @@
+from typing import Dict, List, Optional, Sequence, Tuple
+from datetime import datetime
+import time
+from sqlmodel import Session
+from sqlalchemy import bindparam, delete, insert, literal, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import SQLAlchemyError
+from shared.models.task import Task, TaskArchive, TaskTag, TaskTombstone, UserTaskCounter, UserTaskVersion
+from shared.models.user import User
+from ..sharding import ShardMap
+from .task_archive import ARCHIVE_FIELDS
+
+
+_tasks = Task.__table__
+_archive = TaskArchive.__table__
+_users = User.__table__
+
+# (user id, source shard, target shard)
+Move = Tuple[int, str, str]
+# Keeps IN lists below SQLite's bound parameter limit
+CHUNK_SIZE = 500
+
+
+def _chunks(values: Sequence, size: int = CHUNK_SIZE):
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+def freeze_users(db: Session, user_ids: List[int], moved_at: Optional[datetime]) -> None:
+    """
+    Set (or clear, with None) moved_at on the users' version rows, creating
+    missing rows. Taking the row locks waits for the users' writes in flight.
+    """
+    now = datetime.utcnow()
+    rows = [{"user_id": user_id, "version": 0, "updated_at": now, "moved_at": moved_at} for user_id in user_ids]
+    dialect = db.get_bind().dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        dialect_insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+        statement = dialect_insert(UserTaskVersion)
+        statement = statement.on_conflict_do_update(
+            index_elements=[UserTaskVersion.user_id], set_={"moved_at": statement.excluded.moved_at}
+        )
+        db.execute(statement, rows)
+        return
+    for row in rows:
+        updated = db.execute(
+            update(UserTaskVersion).where(UserTaskVersion.user_id == row["user_id"]).values(moved_at=moved_at)
+        ).rowcount
+        if not updated:
+            db.execute(insert(UserTaskVersion).values(**row))
+
+
+def clear_user_tasks(db: Session, user_id: int) -> None:
+    """Delete the user's tasks data from a shard, except the version row, which keeps refusing writes"""
+    db.execute(delete(TaskTag).where(TaskTag.user_id == user_id))
+    db.execute(delete(Task).where(Task.user_id == user_id).execution_options(synchronize_session=False))
+    db.execute(delete(TaskArchive).where(TaskArchive.user_id == user_id))
+    db.execute(delete(UserTaskCounter).where(UserTaskCounter.user_id == user_id))
+    db.execute(delete(TaskTombstone).where(TaskTombstone.user_id == user_id))
+
+
+def copy_user_tasks(source: Session, target: Session, user_id: int) -> int:
+    """
+    Copy the user's tasks, archived tasks, tags and counters from source into
+    target's transaction, replacing whatever target held for them; returns
+    the number of tasks copied.
+
+    Task ids come from the target's own sequence, so they change, and
+    parents and series are relinked. The version moves past the source's
+    with every earlier sync cursor expired: clients fetch everything again
+    and pick up the new ids. Tombstones are not copied.
+    """
+    now = datetime.utcnow()
+    version = source.execute(
+        select(UserTaskVersion.version).where(UserTaskVersion.user_id == user_id)
+    ).scalar() or 0
+    change_seq = version + 1
+
+    clear_user_tasks(target, user_id)
+    target.execute(delete(UserTaskVersion).where(UserTaskVersion.user_id == user_id))
+    target.execute(insert(UserTaskVersion).values(
+        user_id=user_id, version=change_seq, updated_at=now, pruned_seq=change_seq, moved_at=None
+    ))
+
+    live = [dict(row._mapping) for row in source.execute(
+        select(_tasks).where(_tasks.c.user_id == user_id).order_by(_tasks.c.id)
+    )]
+    archived = [dict(row._mapping) for row in source.execute(
+        select(_archive).where(_archive.c.user_id == user_id).order_by(_archive.c.id)
+    )]
+    # Archived tasks pass through tasks too, which hands out their new ids
+    parts = [live, [{field: row[field] for field in ARCHIVE_FIELDS} for row in archived]]
+    links = []
+    ids: Dict[int, int] = {}
+    for rows in parts:
+        if not rows:
+            continue
+        old_ids = []
+        for row in rows:
+            old_ids.append(row.pop("id"))
+            links.append((old_ids[-1], row["parent_task_id"], row["series_id"]))
+            row.update(parent_task_id=None, series_id=None, change_seq=change_seq)
+        new_ids = target.execute(
+            insert(_tasks).returning(_tasks.c.id, sort_by_parameter_order=True), rows
+        ).scalars().all()
+        ids.update(zip(old_ids, new_ids))
+
+    if ids:
+        relinked = [
+            {"_id": ids[old_id], "_parent": ids.get(parent_id), "_series": ids.get(series_id)}
+            for old_id, parent_id, series_id in links
+            if parent_id is not None or series_id is not None
+        ]
+        if relinked:
+            target.execute(
+                update(_tasks)
+                .where(_tasks.c.id == bindparam("_id"))
+                .values(parent_task_id=bindparam("_parent"), series_id=bindparam("_series")),
+                relinked
+            )
+
+        if archived:
+            archived_ids = [ids[row["id"]] for row in archived]
+            for chunk in _chunks(archived_ids):
+                target.execute(insert(_archive).from_select(
+                    [*ARCHIVE_FIELDS, "archived_at"],
+                    select(*[_tasks.c[field] for field in ARCHIVE_FIELDS], literal(now)).where(_tasks.c.id.in_(chunk))
+                ))
+                target.execute(delete(_tasks).where(_tasks.c.id.in_(chunk)))
+            target.execute(
+                update(_archive).where(_archive.c.id == bindparam("_id")).values(archived_at=bindparam("_at")),
+                [{"_id": ids[row["id"]], "_at": row["archived_at"]} for row in archived]
+            )
+
+        tags = [
+            {"task_id": ids[task_id], "tag": tag, "user_id": user_id}
+            for task_id, tag in source.execute(select(TaskTag.task_id, TaskTag.tag).where(TaskTag.user_id == user_id))
+            if task_id in ids
+        ]
+        if tags:
+            target.execute(insert(TaskTag), tags)
+
+    counters = [dict(row._mapping) for row in source.execute(
+        select(UserTaskCounter.__table__).where(UserTaskCounter.user_id == user_id)
+    )]
+    if counters:
+        target.execute(insert(UserTaskCounter), counters)
+    return len(ids)
+
+
+class ShardRebalancer:
+    """
+    Moves users' tasks between shards in batches: by default the users the
+    hash ring places elsewhere than the directory does (after shards were
+    added), or explicit moves.
+
+    A batch is moved in four steps:
+      1. the users are frozen on their source shard (moved_at on their
+         version rows), so writes there fail with UserMovedError and are
+         retried by the client against the new shard once it is recorded;
+      2. each user's data is copied to the target, one transaction each;
+      3. the directory is updated;
+      4. after grace_seconds, which must exceed the shard map's
+         directory_ttl so that no worker still reads the old copy, the
+         source data is deleted.
+    Reads keep working throughout. A user whose copy fails is unfrozen and
+    stays where they were. An interrupted run is picked up by the next one
+    (see recover). pause_seconds are slept between batches.
+    """
+
+    def __init__(
+        self,
+        shard_map: ShardMap,
+        batch_size: int = 100,
+        pause_seconds: float = 1.0,
+        grace_seconds: float = 60.0
+    ):
+        self.shard_map = shard_map
+        self.batch_size = batch_size
+        self.pause_seconds = pause_seconds
+        self.grace_seconds = grace_seconds
+        self._pending: List[Tuple[float, str, List[int]]] = []
+
+    def misplaced(self, after_user_id: int = 0, limit: Optional[int] = None) -> Tuple[List[Move], int]:
+        """
+        Up to limit (batch_size) moves for users after after_user_id whose
+        directory shard differs from the ring's, and the last user id scanned.
+        """
+        limit = limit or self.batch_size
+        moves: List[Move] = []
+        with self.shard_map.directory.connect() as connection:
+            while len(moves) < limit:
+                user_ids = connection.execute(
+                    select(_users.c.id).where(_users.c.id > after_user_id).order_by(_users.c.id).limit(CHUNK_SIZE)
+                ).scalars().all()
+                if not user_ids:
+                    break
+                for user_id, name in self.shard_map.placed_on(connection, user_ids).items():
+                    after_user_id = user_id
+                    target = self.shard_map.ring.shard_name(user_id)
+                    if name != target and name in self.shard_map.shards:
+                        moves.append((user_id, name, target))
+                        if len(moves) == limit:
+                            break
+        return moves, after_user_id
+
+    def run_once(self, max_batches: Optional[int] = None) -> int:
+        """Move the misplaced users batch by batch; returns the number moved"""
+        self.recover()
+        total = 0
+        batches = 0
+        after_user_id = 0
+        while max_batches is None or batches < max_batches:
+            self.purge_due()
+            moves, after_user_id = self.misplaced(after_user_id)
+            if not moves:
+                break
+            total += len(self.move_batch(moves))
+            batches += 1
+            if self.pause_seconds:
+                time.sleep(self.pause_seconds)
+        self.purge_due(wait=True)
+        return total
+
+    def move_users(self, moves: List[Move]) -> List[int]:
+        """Explicit moves, batch by batch, waiting out the grace period; returns the users moved"""
+        moved = []
+        for batch in _chunks(moves, self.batch_size):
+            self.purge_due()
+            moved += self.move_batch(list(batch))
+        self.purge_due(wait=True)
+        return moved
+
+    def move_batch(self, moves: List[Move]) -> List[int]:
+        """Steps 1-3 for one batch; the source data is deleted by purge_due later. Returns the users moved"""
+        shards = self.shard_map.shards
+        moves = [move for move in moves if move[1] != move[2]]
+        by_source: Dict[str, List[int]] = {}
+        for user_id, source, _ in moves:
+            by_source.setdefault(source, []).append(user_id)
+        for source, user_ids in by_source.items():
+            with Session(shards[source].engine) as db:
+                freeze_users(db, user_ids, datetime.utcnow())
+                db.commit()
+
+        placements: Dict[int, str] = {}
+        failed: Dict[str, List[int]] = {}
+        for user_id, source, target in moves:
+            try:
+                with Session(shards[source].engine) as source_db, Session(shards[target].engine) as target_db:
+                    self._ensure_user(target_db, user_id)
+                    copy_user_tasks(source_db, target_db, user_id)
+                    target_db.commit()
+                placements[user_id] = target
+            except SQLAlchemyError as e:
+                print(f"Moving user {user_id} from {source} to {target} failed: {e}")
+                failed.setdefault(source, []).append(user_id)
+        for source, user_ids in failed.items():
+            with Session(shards[source].engine) as db:
+                freeze_users(db, user_ids, None)
+                db.commit()
+
+        self.shard_map.assign(placements)
+        for source, user_ids in by_source.items():
+            done = [user_id for user_id in user_ids if user_id in placements]
+            if done:
+                self._pending.append((time.monotonic() + self.grace_seconds, source, done))
+        return list(placements)
+
+    def purge_due(self, wait: bool = False) -> None:
+        """Delete the source copies whose grace period is over (all of them, sleeping if needed, with wait)"""
+        while self._pending:
+            due, source, user_ids = self._pending[0]
+            delay = due - time.monotonic()
+            if delay > 0:
+                if not wait:
+                    return
+                time.sleep(delay)
+            with Session(self.shard_map.shards[source].engine) as db:
+                for user_id in user_ids:
+                    clear_user_tasks(db, user_id)
+                db.commit()
+            self._pending.pop(0)
+
+    def recover(self) -> None:
+        """
+        Finish what an interrupted run left frozen: users frozen on a shard
+        the directory no longer points to get that copy deleted; users
+        frozen where they still live are unfrozen, unless the ring places
+        them elsewhere, in which case this run moves them.
+        """
+        for name, shard in self.shard_map.shards.items():
+            with Session(shard.engine) as db:
+                frozen = db.execute(
+                    select(UserTaskVersion.user_id).where(UserTaskVersion.moved_at.is_not(None))
+                ).scalars().all()
+                if not frozen:
+                    continue
+                with self.shard_map.directory.connect() as connection:
+                    placed = self.shard_map.placed_on(connection, frozen)
+                stay = [
+                    user_id for user_id in frozen
+                    if placed[user_id] == name and self.shard_map.ring.shard_name(user_id) == name
+                ]
+                for user_id in frozen:
+                    if placed[user_id] != name:
+                        clear_user_tasks(db, user_id)
+                if stay:
+                    freeze_users(db, stay, None)
+                db.commit()
+
+    def _ensure_user(self, target: Session, user_id: int) -> None:
+        """The users row on the target, which the tasks tables reference"""
+        if target.execute(select(_users.c.id).where(_users.c.id == user_id)).first():
+            return
+        with self.shard_map.directory.connect() as connection:
+            user = connection.execute(select(_users).where(_users.c.id == user_id)).one()
+        target.execute(insert(_users).values(**user._mapping))
@@ -0,0 +1,167 @@
+from typing import Any, Iterable, List, Optional, Sequence
+from datetime import datetime, timedelta
+import heapq
+import time
+from sqlmodel import Session
+from sqlalchemy import and_, delete, insert, literal, literal_column, or_, select
+from sqlalchemy.sql import visitors
+from sqlalchemy.sql.elements import ColumnClause
+from shared.models.task import Task, TaskArchive
+from .task_tags import delete_task_tags
+from .task_search import apply_search
+from .task_hierarchy import detach_subtrees
+from .task_versions import bump_task_versions
+
+
+_tasks = Task.__table__
+_archive = TaskArchive.__table__
+
+# Columns copied from tasks into tasks_archive
+ARCHIVE_FIELDS = [column.name for column in _archive.columns if column.name != "archived_at"]
+
+
+def archivable(cutoff: datetime) -> tuple:
+    """
+    Conditions on the tasks the archiver moves: completed before cutoff
+    (tasks created completed and never updated count from created_at), not
+    recurring, since those anchor a series, and without subtasks left in
+    `tasks`, so a completed subtree leaves bottom up.
+    """
+    return (
+        Task.completed == True,
+        or_(Task.updated_at < cutoff, and_(Task.updated_at.is_(None), Task.created_at < cutoff)),
+        Task.recurring == False,
+        Task.subtask_count == 0,
+    )
+
+
+def archive_tasks(db: Session, task_ids: Sequence[int], cutoff: datetime) -> int:
+    """
+    Move the given tasks that are still archivable into tasks_archive inside
+    the caller's transaction; returns the number moved.
+
+    The owners' versions are bumped first, which waits for (and then holds
+    off) their other writes, and changes list ETags: archived tasks drop out
+    of the default lists. Their tags rows are dropped and they leave their
+    ancestors' rollups; the user's counters keep counting them.
+    """
+    if not task_ids:
+        return 0
+    owners = db.execute(select(Task.user_id).where(Task.id.in_(task_ids)).distinct()).scalars().all()
+    bump_task_versions(db, owners)
+    statement = select(Task.id).where(Task.id.in_(task_ids), *archivable(cutoff))
+    if db.get_bind().dialect.name == "postgresql":
+        statement = statement.with_for_update()
+    ids = db.execute(statement).scalars().all()
+    if not ids:
+        return 0
+
+    copy = select(*[_tasks.c[field] for field in ARCHIVE_FIELDS], literal(datetime.utcnow()))
+    db.execute(insert(_archive).from_select(
+        [*ARCHIVE_FIELDS, "archived_at"], copy.where(_tasks.c.id.in_(ids))
+    ))
+    delete_task_tags(db, ids)
+    detach_subtrees(db, ids)
+    db.execute(delete(Task).where(Task.id.in_(ids)).execution_options(synchronize_session=False))
+    return len(ids)
+
+
+class TaskArchiver:
+    """
+    Moves tasks completed more than `older_than` ago from `tasks` into
+    `tasks_archive`, so the hot table (and its indexes) grows with open and
+    recent work rather than with account age.
+
+    Candidates come from ix_tasks_completed_updated in batches of
+    batch_size, each moved and committed in its own short transaction, with
+    pause_seconds between batches to leave room for other writers.
+    """
+
+    def __init__(self, older_than: timedelta = timedelta(days=90), batch_size: int = 1000, pause_seconds: float = 0.5):
+        self.older_than = older_than
+        self.batch_size = batch_size
+        self.pause_seconds = pause_seconds
+
+    def archive_batch(self, db: Session, now: Optional[datetime] = None) -> int:
+        """Move and commit one batch; returns the number moved (0 when nothing is left)"""
+        cutoff = (now or datetime.utcnow()) - self.older_than
+        candidates = db.execute(
+            select(Task.id).where(*archivable(cutoff)).limit(self.batch_size)
+        ).scalars().all()
+        moved = archive_tasks(db, candidates, cutoff)
+        db.commit()
+        return moved
+
+    def run_once(self, db: Session, now: Optional[datetime] = None, max_batches: Optional[int] = None) -> int:
+        """Archive batches until none are left (or max_batches ran); returns the number moved"""
+        total = 0
+        batches = 0
+        while max_batches is None or batches < max_batches:
+            moved = self.archive_batch(db, now)
+            batches += 1
+            if moved == 0:
+                break
+            total += moved
+            if self.pause_seconds:
+                time.sleep(self.pause_seconds)
+        return total
+
+
+# Reads over the archive: the list statements are built against Task as
+# usual and rewritten onto tasks_archive, whose columns share their names
+
+def on_archive(statement):
+    """The statement with every tasks column replaced by its tasks_archive namesake"""
+    def replace(element):
+        if isinstance(element, ColumnClause) and getattr(element, "table", None) is _tasks:
+            return _archive.c[element.key]
+        return None
+
+    return visitors.replacement_traverse(statement, {}, replace)
+
+
+def contains_pattern(text: str) -> str:
+    """LIKE pattern (escape character "/") matching text anywhere, for archived_tag_clause and archived_search"""
+    escaped = text.replace("/", "//").replace("%", "/%").replace("_", "/_")
+    return f"%{escaped}%"
+
+
+def archived_tag_clause(patterns: Sequence[Any], match: str = "all"):
+    """
+    Tag filter for archived tasks, which have no task_tags rows: a match on
+    the JSON tags column, within the user's rows of the archive. patterns
+    are contains_pattern(json.dumps(tag)) per tag, or bind parameters for
+    them.
+    """
+    clauses = [Task.tags.like(pattern, escape="/") for pattern in patterns]
+    return or_(*clauses) if match == "any" else and_(*clauses)
+
+
+def archived_search(statement, dialect: str, query, patterns: Sequence[Any]):
+    """
+    apply_search for archived tasks, which are not in the full-text index:
+    every term must appear in the title or description, patterns being
+    contains_pattern(term) per search term (or bind parameters for them).
+    The rank is 0, so with relevance order archived matches follow the live
+    ones. Without a full-text engine query is matched as apply_search does.
+    """
+    if dialect not in ("sqlite", "postgresql"):
+        return apply_search(statement, dialect, query)
+    for pattern in patterns:
+        statement = statement.where(
+            Task.title.ilike(pattern, escape="/") | Task.description.ilike(pattern, escape="/")
+        )
+    return statement, literal_column("0.0")
+
+
+def merge_rows(parts: Iterable[Sequence[Any]], sort_order: str) -> List[Any]:
+    """
+    Merge lists of task rows (with an id column) followed by their sort value, each
+    ordered by (sort value, id) the way order_by_clauses orders them: NULLs
+    last ascending and first descending.
+    """
+    def key(row):
+        value = row[-1]
+        return (value is None, 0 if value is None else value, row.id)
+
+    return list(heapq.merge(*parts, key=key, reverse=sort_order == "desc"))
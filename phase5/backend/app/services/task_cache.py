@@ -0,0 +1,147 @@
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+from collections import OrderedDict
+from datetime import datetime
+from shared.core.settings import settings
+import sys
+import threading
+import time
+
+
+def _freeze(value: Any) -> Hashable:
+    """Hashable, order-independent form of a filter value"""
+    if isinstance(value, dict):
+        return tuple(sorted((key, _freeze(item)) for key, item in value.items() if item is not None))
+    if isinstance(value, (list, tuple, set)):
+        return tuple(sorted(_freeze(item) for item in value))
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def estimate_size(value: Any) -> int:
+    """Approximate memory held by a cached result (rows of scalars, lists, tuples)"""
+    size = sys.getsizeof(value)
+    if isinstance(value, (list, tuple)):
+        size += sum(estimate_size(item) for item in value)
+    return size
+
+
+class TaskReadCache:
+    """
+    Bounded in-process LRU + TTL cache of task reads.
+
+    Entries are keyed by (user_id, read name, normalized filters) and tagged
+    with the user's task version (user_task_versions) that the caller read
+    from the database before loading them. Every write bumps that version in
+    its own transaction, wherever it runs (another worker, the reminder
+    scheduler, the archiver, the rebalancer), so once it commits all of the
+    user's entries are misses, without scanning the cache; stale entries
+    are dropped when next looked up or evicted as least recently used.
+    invalidate() additionally makes them misses in the writing process
+    right away.
+
+    The cache is bounded by entry count and, when max_bytes is set, by the
+    estimated memory of the cached rows. The TTL only bounds how long an
+    unchanged result is kept.
+    """
+
+    def __init__(self, max_entries: int = 1024, max_bytes: int = 0, ttl: float = 30.0):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries: "OrderedDict[Tuple, Tuple[int, int, float, Any, int]]" = OrderedDict()
+        self._generations: Dict[int, int] = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.ttl > 0
+
+    def key(self, user_id: int, name: str, **filters) -> Tuple:
+        return (user_id, name, _freeze(filters))
+
+    def get_or_load(self, key: Tuple, load: Callable[[], Any], version: int = 0) -> Any:
+        """
+        Return the cached value for key, calling load() and storing its result on a miss.
+
+        version is the user's task version as read from the database before
+        calling; an entry stored under another version is a miss.
+        """
+        if not self.enabled:
+            return load()
+
+        user_id = key[0]
+        with self._lock:
+            generation = self._generations.get(user_id, 0)
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry_generation, entry_version, expires_at, value, _ = entry
+                if entry_generation == generation and entry_version == version and expires_at > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                self._remove(key)
+            self.misses += 1
+
+        value = load()
+
+        with self._lock:
+            # A write in this process during load() invalidated the user; the value may be stale
+            if self._generations.get(user_id, 0) == generation:
+                self._store(key, generation, version, value)
+        return value
+
+    def invalidate(self, user_id: int) -> None:
+        """Make every cached read of the user a miss in this process, before the version is read again"""
+        with self._lock:
+            self._generations[user_id] = self._generations.get(user_id, 0) + 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+    def _store(self, key: Tuple, generation: int, version: int, value: Any) -> None:
+        size = estimate_size(value) if self.max_bytes else 0
+        if self.max_bytes and size > self.max_bytes:
+            return
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (generation, version, time.monotonic() + self.ttl, value, size)
+        self._bytes += size
+        while len(self._entries) > self.max_entries or (self.max_bytes and self._bytes > self.max_bytes):
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def _remove(self, key: Tuple) -> None:
+        self._bytes -= self._entries.pop(key)[4]
+
+
+# Shared by the API routes and MCP tools so a write through either one
+# invalidates the reads cached by the other
+task_read_cache = TaskReadCache(
+    max_entries=settings.TASK_CACHE_MAX_ENTRIES,
+    max_bytes=settings.TASK_CACHE_MAX_BYTES,
+    ttl=settings.TASK_CACHE_TTL_SECONDS,
+)
@@ -0,0 +1,172 @@
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from datetime import datetime, timedelta
+from sqlmodel import Session
+from sqlalchemy import select
+from shared.models.task import Task
+from .task_recurrence import FIXED_STEPS, MONTH_STEPS, TEMPLATES, occurrences
+from .task_serialization import READ_COLUMNS, READ_FIELDS, task_record
+from .task_archive import on_archive
+
+try:
+    import numpy as np
+except ImportError:  # optional, expands all series of a pattern at once when installed
+    np = None
+
+
+# Longest range one calendar request may expand
+MAX_CALENDAR_DAYS = 400
+
+CALENDAR_COLUMNS = [*READ_COLUMNS, Task.series_id, Task.occurrence_date]
+
+
+def expand_occurrences(
+    anchors: Sequence[datetime], patterns: Sequence[Optional[str]], start: datetime, end: datetime
+) -> Tuple[List[int], List[datetime]]:
+    """
+    Every occurrence after its anchor that falls within [start, end], for
+    many series at once, as (series positions, occurrence times) in
+    parallel lists.
+
+    Occurrences match task_recurrence.occurrence(). With numpy installed the
+    series are expanded per pattern as whole arrays, otherwise one by one.
+    """
+    if not anchors:
+        return [], []
+    if np is None:
+        return _expand_each(anchors, patterns, start, end)
+    return _expand_arrays(anchors, patterns, start, end)
+
+
+def _expand_each(anchors, patterns, start, end):
+    positions, times = [], []
+    for position, (anchor, pattern) in enumerate(zip(anchors, patterns)):
+        for occurs_at in occurrences(anchor, pattern, start):
+            if occurs_at > end:
+                break
+            positions.append(position)
+            times.append(occurs_at)
+    return positions, times
+
+
+def _ranges(first, counts):
+    """Series positions and step numbers of first[i] .. first[i] + counts[i] - 1, concatenated"""
+    counts = np.maximum(counts, 0)
+    positions = np.repeat(np.arange(len(counts)), counts)
+    offsets = np.arange(positions.size) - np.repeat(np.cumsum(counts) - counts, counts)
+    return positions, first[positions] + offsets
+
+
+def _expand_arrays(anchors, patterns, start, end):
+    anchors = np.array(anchors, dtype="datetime64[us]")
+    start64, end64 = np.datetime64(start, "us"), np.datetime64(end, "us")
+    # Unknown patterns repeat daily, as in task_recurrence
+    patterns = np.array([p if p in FIXED_STEPS or p in MONTH_STEPS else "daily" for p in patterns])
+
+    position_parts, time_parts = [], []
+    for pattern in np.unique(patterns):
+        series = np.flatnonzero(patterns == pattern)
+        anchor = anchors[series]
+        if pattern in MONTH_STEPS:
+            months = MONTH_STEPS[pattern]
+            anchor_month = anchor.astype("datetime64[M]")
+            day = anchor.astype("datetime64[D]")
+            day_of_month = day - anchor_month.astype("datetime64[D]")
+            time_of_day = anchor - day
+            # From the step in start's month (which may still fall before
+            # start) to the one in end's month; the mask below trims both ends
+            first = np.maximum((start64.astype("datetime64[M]") - anchor_month).astype(np.int64) // months, 1)
+            last = (end64.astype("datetime64[M]") - anchor_month).astype(np.int64) // months
+            positions, steps = _ranges(first, last - first + 1)
+            month = anchor_month[positions] + (steps * months).astype("timedelta64[M]")
+            month_start = month.astype("datetime64[D]")
+            month_length = (month + 1).astype("datetime64[D]") - month_start
+            times = (
+                month_start + np.minimum(day_of_month[positions], month_length - 1)
+            ).astype("datetime64[us]") + time_of_day[positions]
+            keep = (times >= start64) & (times <= end64)
+            positions, times = positions[keep], times[keep]
+        else:
+            step = np.timedelta64(FIXED_STEPS[pattern] // timedelta(microseconds=1), "us")
+            # First step on or after start (ceiling division), last on or before end
+            first = np.maximum(-((anchor - start64) // step), 1)
+            last = (end64 - anchor) // step
+            positions, steps = _ranges(first, last - first + 1)
+            times = anchor[positions] + steps * step
+        position_parts.append(series[positions])
+        time_parts.append(times)
+
+    positions = np.concatenate(position_parts)
+    times = np.concatenate(time_parts)
+    return positions.tolist(), times.astype("datetime64[us]").tolist()
+
+
+def calendar_entries(db: Session, user_id: int, start: datetime, end: datetime) -> List[Dict[str, Any]]:
+    """
+    The user's calendar between start and end, as TaskCalendarEntry dicts
+    sorted by due date.
+
+    Stored tasks due in the range, archived ones included, are returned as
+    they are. Recurring tasks are expanded on the fly into virtual
+    occurrences (id None), shaped like the instances the recurrence
+    materializer would store, except where an instance for that occurrence
+    exists: the stored instance wins, even when it was moved out of the
+    range. Raises ValueError for empty or too long ranges.
+    """
+    if end < start:
+        raise ValueError("'to' must not be before 'from'")
+    if end - start > timedelta(days=MAX_CALENDAR_DAYS):
+        raise ValueError(f"Calendar range is limited to {MAX_CALENDAR_DAYS} days")
+
+    width = len(READ_FIELDS)
+    entries = []
+    stored = select(*CALENDAR_COLUMNS).where(Task.user_id == user_id, Task.due_date >= start, Task.due_date <= end)
+    for statement in (stored, on_archive(stored)):
+        for row in db.execute(statement):
+            entry = task_record(row[:width])
+            entry["series_id"], entry["occurrence_date"], entry["virtual"] = row[width], row[width + 1], False
+            entries.append(entry)
+
+    templates = [
+        task_record(row) for row in db.execute(
+            select(*READ_COLUMNS).where(Task.user_id == user_id, *TEMPLATES, Task.due_date <= end)
+        )
+    ]
+    if not templates:
+        return sorted(entries, key=_entry_order)
+
+    instances = select(Task.series_id, Task.occurrence_date).where(
+        Task.user_id == user_id,
+        Task.series_id.in_([template["id"] for template in templates]),
+        Task.occurrence_date >= start,
+        Task.occurrence_date <= end,
+    )
+    stored = set(db.execute(instances).all()) | set(db.execute(on_archive(instances)).all())
+    positions, times = expand_occurrences(
+        [template["due_date"] for template in templates],
+        [template["recurrence_pattern"] for template in templates],
+        start, end,
+    )
+    for position, occurs_at in zip(positions, times):
+        template = templates[position]
+        if (template["id"], occurs_at) in stored:
+            continue
+        entries.append({
+            **template,
+            "id": None,
+            "completed": False,
+            "due_date": occurs_at,
+            "recurring": False,
+            "recurrence_pattern": None,
+            "parent_task_id": template["id"],
+            "updated_at": None,
+            "reminder_sent": False,
+            "series_id": template["id"],
+            "occurrence_date": occurs_at,
+            "virtual": True,
+        })
+    return sorted(entries, key=_entry_order)
+
+
+def _entry_order(entry: Dict[str, Any]):
+    # Stored tasks before virtual occurrences at the same time
+    return entry["due_date"], entry["virtual"], entry["id"] or 0, entry["series_id"] or 0
@@ -0,0 +1,147 @@
+from typing import Any, Dict, Iterable, List, Tuple
+from datetime import datetime
+from sqlmodel import Session
+from sqlalchemy import bindparam, delete, func, insert, select, update
+from shared.models.task import Task, TaskTombstone, UserTaskVersion
+from .task_serialization import READ_COLUMNS, READ_FIELDS, task_record
+
+
+class ExpiredCursorError(ValueError):
+    """Raised when a sync cursor predates the tombstones still kept; the client must resync in full"""
+
+
+class CursorAheadError(ValueError):
+    """
+    Raised for a sync cursor past the user's version on the database read:
+    a read replica that has not replayed the write yet, or a bogus cursor
+    """
+
+
+_tombstones = TaskTombstone.__table__
+_versions = UserTaskVersion.__table__
+_ID = READ_FIELDS.index("id")
+
+
+def record_tombstones(db: Session, user_id: int, task_ids: Iterable[int], change_seq: int) -> None:
+    """Remember deleted tasks inside the deleting write's transaction"""
+    now = datetime.utcnow()
+    rows = [
+        {"user_id": user_id, "task_id": task_id, "change_seq": change_seq, "deleted_at": now}
+        for task_id in task_ids
+    ]
+    if rows:
+        db.execute(insert(_tombstones), rows)
+
+
+def changes_since(db: Session, user_id: int, since: int, limit: int) -> Dict[str, Any]:
+    """
+    The user's tasks created, updated or deleted after the cursor `since`,
+    as a TaskChanges dict.
+
+    The cursor is a change_seq, which is the user's task version of the
+    write that last touched a row; since=0 is a full sync and leaves out
+    deletes. The version is read first and bounds both queries, so a write
+    committing meanwhile is left for the next call. A page holds at most
+    `limit` entries and ends at a change_seq boundary, so resuming at its
+    cursor neither skips nor repeats a write; only a single write larger
+    than the limit is returned whole.
+
+    Raises ExpiredCursorError when tombstones after `since` may have been
+    pruned, CursorAheadError for a cursor ahead of the user's version and
+    ValueError for a negative one.
+    """
+    state = db.execute(
+        select(UserTaskVersion.version, UserTaskVersion.pruned_seq).where(UserTaskVersion.user_id == user_id)
+    ).first()
+    version, pruned_seq = state if state else (0, 0)
+    if since < 0:
+        raise ValueError("Unknown sync cursor")
+    if since > version:
+        raise CursorAheadError("Unknown sync cursor")
+    if 0 < since < pruned_seq:
+        raise ExpiredCursorError("Sync cursor expired, fetch all tasks again")
+    if since == version:
+        return {"changed": [], "deleted": [], "cursor": version, "has_more": False}
+
+    def load(lower: int, upper: int, row_limit=None) -> Tuple[List, List]:
+        changed = db.execute(
+            select(Task.change_seq, *READ_COLUMNS)
+            .where(Task.user_id == user_id, Task.change_seq > lower, Task.change_seq <= upper)
+            .order_by(Task.change_seq, Task.id)
+            .limit(row_limit)
+        ).all()
+        if since == 0:
+            return changed, []
+        deleted = db.execute(
+            select(TaskTombstone.change_seq, TaskTombstone.task_id)
+            .where(TaskTombstone.user_id == user_id, TaskTombstone.change_seq > lower, TaskTombstone.change_seq <= upper)
+            .order_by(TaskTombstone.change_seq, TaskTombstone.id)
+            .limit(row_limit)
+        ).all()
+        return changed, deleted
+
+    changed, deleted = load(since, version, limit + 1)
+    # Past the last seq of a list that hit its limit, that list may miss rows
+    complete_to = min(
+        [rows[-1][0] - 1 for rows in (changed, deleted) if len(rows) > limit] or [version]
+    )
+    seqs = sorted(row[0] for row in [*changed, *deleted] if row[0] <= complete_to)
+    cursor = complete_to
+    if len(seqs) > limit:
+        # The last seq whose rows all fit in the page
+        cursor = max((seq for seq in seqs[:limit] if seq < seqs[limit]), default=since)
+    if cursor == since:
+        # The first write alone exceeds the page
+        cursor = min(row[0] for row in [*changed, *deleted])
+        changed, deleted = load(since, cursor)
+
+    events = sorted(
+        [(row[0], 1, row[1:]) for row in changed if row[0] <= cursor]
+        + [(seq, 0, task_id) for seq, task_id in deleted if seq <= cursor],
+        key=lambda event: event[:2]
+    )
+    # The latest event of an id wins: SQLite may hand a deleted id to a new task
+    latest: Dict[int, Any] = {}
+    for _, is_row, item in events:
+        task_id = item[_ID] if is_row else item
+        latest.pop(task_id, None)
+        latest[task_id] = task_record(item) if is_row else None
+    return {
+        "changed": [record for record in latest.values() if record is not None],
+        "deleted": [task_id for task_id, record in latest.items() if record is None],
+        "cursor": cursor,
+        "has_more": cursor < version,
+    }
+
+
+def prune_task_tombstones(db: Session, before: datetime) -> int:
+    """
+    Delete tombstones recorded before the given time and commit; returns
+    the number deleted.
+
+    Each affected user's pruned_seq moves up to the newest pruned
+    tombstone, so sync cursors older than that get ExpiredCursorError
+    instead of silently missing deletes.
+    """
+    pruned = db.execute(
+        select(TaskTombstone.user_id, func.max(TaskTombstone.change_seq))
+        .where(TaskTombstone.deleted_at < before)
+        .group_by(TaskTombstone.user_id)
+    ).all()
+    if not pruned:
+        return 0
+    params = [{"owner": user_id, "seq": seq} for user_id, seq in pruned]
+    db.execute(
+        update(_versions)
+        .where(_versions.c.user_id == bindparam("owner"), _versions.c.pruned_seq < bindparam("seq"))
+        .values(pruned_seq=bindparam("seq")),
+        params
+    )
+    deleted = 0
+    for param in params:
+        deleted += db.execute(
+            delete(_tombstones)
+            .where(_tombstones.c.user_id == param["owner"], _tombstones.c.change_seq <= param["seq"])
+        ).rowcount
+    db.commit()
+    return deleted
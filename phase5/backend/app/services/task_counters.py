@@ -0,0 +1,157 @@
+from typing import Dict, Iterable, Optional, Tuple
+from collections import Counter
+from datetime import datetime
+from sqlmodel import Session
+from sqlalchemy import delete, func, insert, select, union_all, update
+from sqlalchemy.dialects import postgresql, sqlite
+from shared.models.task import Task, TaskArchive, TaskStats, UserTaskCounter, UserTaskVersion, PRIORITY_RANKS
+
+
+# (priority rank or 0, completed): the key of a user_task_counters row
+CounterKey = Tuple[int, bool]
+
+PRIORITY_NAMES = {rank: name for name, rank in PRIORITY_RANKS.items()}
+
+_counters = UserTaskCounter.__table__
+_rank = func.coalesce(Task.priority_rank, 0)
+
+
+def counter_key(priority_rank: Optional[int], completed: bool) -> CounterKey:
+    return (priority_rank or 0, bool(completed))
+
+
+def key_counts(db: Session, task_ids: Iterable[int]) -> Counter:
+    """Counter keys of the given tasks, tallied with one GROUP BY"""
+    task_ids = list(task_ids)
+    if not task_ids:
+        return Counter()
+    rows = db.execute(
+        select(_rank, Task.completed, func.count())
+        .where(Task.id.in_(task_ids))
+        .group_by(_rank, Task.completed)
+    )
+    return Counter({counter_key(rank, completed): count for rank, completed, count in rows})
+
+
+def apply_counter_deltas(db: Session, user_id: int, deltas: Dict[CounterKey, int]) -> None:
+    """
+    Add deltas to the user's counters inside the caller's transaction.
+
+    One upsert (executemany) on PostgreSQL and SQLite; other dialects
+    update, then insert the rows that did not exist yet.
+    """
+    rows = [
+        {"user_id": user_id, "priority_rank": rank, "completed": completed, "task_count": delta}
+        for (rank, completed), delta in deltas.items()
+        if delta
+    ]
+    if not rows:
+        return
+
+    dialect = db.get_bind().dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        dialect_insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+        statement = dialect_insert(_counters)
+        statement = statement.on_conflict_do_update(
+            index_elements=[_counters.c.user_id, _counters.c.priority_rank, _counters.c.completed],
+            set_={"task_count": _counters.c.task_count + statement.excluded.task_count},
+        )
+        db.execute(statement, rows)
+        return
+
+    for row in rows:
+        updated = db.execute(
+            update(_counters)
+            .where(
+                _counters.c.user_id == user_id,
+                _counters.c.priority_rank == row["priority_rank"],
+                _counters.c.completed == row["completed"],
+            )
+            .values(task_count=_counters.c.task_count + row["task_count"])
+        ).rowcount
+        if not updated:
+            db.execute(insert(_counters).values(**row))
+
+
+def apply_count_change(db: Session, user_id: int, before: Counter, after: Counter) -> None:
+    """Apply the difference between key_counts taken before and after a write"""
+    apply_counter_deltas(db, user_id, {key: after[key] - before[key] for key in before.keys() | after.keys()})
+
+
+def move_counts(db: Session, user_id: int, before: CounterKey, after: CounterKey) -> None:
+    """Move one task from one counter to another when its key changed"""
+    if before != after:
+        apply_counter_deltas(db, user_id, {before: -1, after: 1})
+
+
+def get_task_stats(db: Session, user_id: int, now: Optional[datetime] = None) -> TaskStats:
+    """
+    The user's task statistics.
+
+    Totals come from the user's counter rows (at most ten). Overdue
+    depends on the clock, so it is counted from the ix_tasks_open_due
+    partial index, which only holds open tasks with a due date.
+    """
+    open_by_priority = {name: 0 for name in [*PRIORITY_RANKS, "none"]}
+    completed_by_priority = dict(open_by_priority)
+    for rank, completed, count in db.execute(
+        select(_counters.c.priority_rank, _counters.c.completed, _counters.c.task_count)
+        .where(_counters.c.user_id == user_id)
+    ):
+        by_priority = completed_by_priority if completed else open_by_priority
+        by_priority[PRIORITY_NAMES.get(rank, "none")] += count
+
+    overdue = db.execute(
+        select(func.count()).select_from(Task).where(
+            Task.user_id == user_id,
+            Task.completed == False,
+            Task.due_date.is_not(None),
+            Task.due_date < (now or datetime.utcnow()),
+        )
+    ).scalar_one()
+
+    completed_total = sum(completed_by_priority.values())
+    open_total = sum(open_by_priority.values())
+    return TaskStats(
+        total=completed_total + open_total,
+        completed=completed_total,
+        open=open_total,
+        overdue=overdue,
+        open_by_priority=open_by_priority,
+        completed_by_priority=completed_by_priority,
+    )
+
+
+def reconcile_task_counters(db: Session, user_id: Optional[int] = None) -> int:
+    """
+    Rebuild user_task_counters from the tasks table and the archive
+    (archived tasks stay counted) with a single GROUP BY.
+
+    Repairs drift, e.g. from tasks written outside TaskService. Every task
+    write bumps the user's user_task_versions row in its own transaction,
+    so locking those rows first makes concurrent writes wait until the
+    rebuild commits. Covers one user, or everyone when user_id is None.
+    Commits, and returns the number of counter rows written.
+    """
+    lock = select(UserTaskVersion.user_id).with_for_update()
+    clear = delete(_counters)
+    live = select(Task.user_id, _rank.label("priority_rank"), Task.completed)
+    archived = select(TaskArchive.user_id, func.coalesce(TaskArchive.priority_rank, 0), TaskArchive.completed)
+    if user_id is not None:
+        lock = lock.where(UserTaskVersion.user_id == user_id)
+        clear = clear.where(_counters.c.user_id == user_id)
+        live = live.where(Task.user_id == user_id)
+        archived = archived.where(TaskArchive.user_id == user_id)
+    tasks = union_all(live, archived).subquery()
+    grouped = (
+        select(tasks.c.user_id, tasks.c.priority_rank, tasks.c.completed, func.count())
+        .group_by(tasks.c.user_id, tasks.c.priority_rank, tasks.c.completed)
+    )
+
+    db.execute(lock).all()
+    db.execute(clear)
+    written = db.execute(
+        insert(_counters).from_select(["user_id", "priority_rank", "completed", "task_count"], grouped)
+    ).rowcount
+    db.commit()
+    return written
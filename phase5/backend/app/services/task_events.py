@@ -0,0 +1,60 @@
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional
+from fastapi.encoders import jsonable_encoder
+from shared.models.task import TaskBulkResult
+from ..sharding import DEFAULT_SHARD
+
+
+# Sends one task-events message, as KafkaProducer.send_task_event(event_type, data, shard=...)
+Send = Callable[..., Awaitable[None]]
+
+# Bulk item statuses that wrote the task
+WRITTEN = ("created", "updated", "completed", "deleted")
+
+
+def event_shard(event: Dict[str, Any]) -> str:
+    """The shard of an event's task; events without one come from before sharding"""
+    return event.get("shard") or DEFAULT_SHARD
+
+
+class TaskEvents:
+    """
+    Publishes task-events messages for writes that committed, for the
+    recurrence materializer and the reminder scheduler workers.
+
+    Task ids are only unique within a shard, so every event names the
+    shard of its task (see event_shard). Publishing is best effort and
+    meant to run after the response (BackgroundTasks): a failure is
+    logged, and the workers' periodic passes pick the change up instead.
+    """
+
+    def __init__(self, send: Optional[Send] = None):
+        # None: the app's Kafka producer, skipped while it is not started
+        self.send = send
+
+    async def publish(self, event_type: str, tasks: Iterable[Any], shard: str) -> None:
+        """One event per task (a TaskRead or a dict with at least its id)"""
+        send = self.send
+        if send is None:
+            try:
+                from ..kafka.producer import kafka_producer
+            except ImportError:
+                return
+            if kafka_producer.producer is None:
+                return
+            send = kafka_producer.send_task_event
+        for task in tasks:
+            data = jsonable_encoder(task)
+            try:
+                await send(event_type, data, shard=shard)
+            except Exception as e:
+                print(f"Could not publish {event_type} for task {data.get('id')}: {e}")
+
+    async def publish_bulk(self, event_type: str, result: TaskBulkResult, shard: str) -> None:
+        """Events for the items of a bulk write that were written"""
+        if result.committed:
+            await self.publish(event_type, [
+                item.task or {"id": item.id} for item in result.results if item.status in WRITTEN
+            ], shard)
+
+
+task_events = TaskEvents()
@@ -0,0 +1,227 @@
+from typing import Dict, Iterable, List, Optional
+from datetime import datetime
+from sqlmodel import Session
+from sqlalchemy import bindparam, literal, select, update
+from shared.models.task import Task, TaskArchive
+from .task_serialization import READ_COLUMNS
+
+
+# Deepest level the recursive queries follow. Bounds the work done for a
+# parent cycle written outside TaskService, and keeps nested tree JSON well
+# inside encoder recursion limits
+MAX_DEPTH = 100
+
+ROLLUP_COLUMNS = [Task.subtask_count, Task.subtask_completed_count]
+
+_tasks = Task.__table__
+_archive = TaskArchive.__table__
+
+
+def ancestor_chains(db: Session, task_ids: Iterable[int]) -> Dict[int, List[int]]:
+    """Ancestor ids of each task, nearest first, fetched with one recursive query"""
+    task_ids = list(task_ids)
+    if not task_ids:
+        return {}
+    chain = (
+        select(_tasks.c.id.label("task_id"), _tasks.c.parent_task_id.label("ancestor_id"), literal(1).label("depth"))
+        .where(_tasks.c.id.in_(task_ids), _tasks.c.parent_task_id.is_not(None))
+        .cte("chain", recursive=True)
+    )
+    chain = chain.union_all(
+        select(chain.c.task_id, _tasks.c.parent_task_id, chain.c.depth + 1)
+        .join(_tasks, _tasks.c.id == chain.c.ancestor_id)
+        .where(_tasks.c.parent_task_id.is_not(None), chain.c.depth < MAX_DEPTH)
+    )
+    chains: Dict[int, List[int]] = {task_id: [] for task_id in task_ids}
+    for task_id, ancestor_id, _ in db.execute(select(chain).order_by(chain.c.task_id, chain.c.depth)):
+        chains[task_id].append(ancestor_id)
+    return chains
+
+
+def add_to_ancestors(db: Session, parent_id: int, total: int, completed: int) -> None:
+    """
+    Add to the rollups of parent_id and everything above it.
+
+    One UPDATE whose target rows come from a recursive CTE, used by the
+    single-task writes where the delta is the same for the whole chain.
+    """
+    if not total and not completed:
+        return
+    chain = (
+        select(_tasks.c.id, _tasks.c.parent_task_id, literal(1).label("depth"))
+        .where(_tasks.c.id == parent_id)
+        .cte("ancestors", recursive=True)
+    )
+    chain = chain.union_all(
+        select(_tasks.c.id, _tasks.c.parent_task_id, chain.c.depth + 1)
+        .join(chain, _tasks.c.id == chain.c.parent_task_id)
+        .where(chain.c.depth < MAX_DEPTH)
+    )
+    db.execute(
+        update(_tasks)
+        .where(_tasks.c.id.in_(select(chain.c.id)))
+        .values(
+            subtask_count=_tasks.c.subtask_count + total,
+            subtask_completed_count=_tasks.c.subtask_completed_count + completed,
+        )
+    )
+
+
+def apply_rollup_deltas(db: Session, deltas: Dict[int, List[int]]) -> None:
+    """Add [total, completed] deltas to the rollups of many tasks with one executemany"""
+    params = [
+        {"ancestor_id": task_id, "total": total, "done": done}
+        for task_id, (total, done) in deltas.items()
+        if total or done
+    ]
+    if params:
+        db.execute(
+            update(_tasks)
+            .where(_tasks.c.id == bindparam("ancestor_id"))
+            .values(
+                subtask_count=_tasks.c.subtask_count + bindparam("total"),
+                subtask_completed_count=_tasks.c.subtask_completed_count + bindparam("done"),
+            ),
+            params
+        )
+
+
+def _subtree_states(db: Session, task_ids: Iterable[int]) -> Dict[int, List[int]]:
+    """[own completed, subtask_count, subtask_completed_count] of each task"""
+    rows = db.execute(
+        select(_tasks.c.id, _tasks.c.completed, *ROLLUP_COLUMNS)
+        .where(_tasks.c.id.in_(list(task_ids)))
+    )
+    return {task_id: [int(completed), total, done] for task_id, completed, total, done in rows}
+
+
+def attach_subtrees(db: Session, task_ids: Iterable[int]) -> None:
+    """
+    Count the subtrees rooted at task_ids into their (new) ancestors.
+
+    Call after the tasks were inserted or linked under their parents. Each
+    task adds itself plus its current rollup to every ancestor; a task
+    attached below another attached task is not yet part of that task's
+    rollup, so the contributions never overlap.
+    """
+    task_ids = set(task_ids)
+    if not task_ids:
+        return
+    chains = ancestor_chains(db, task_ids)
+    deltas: Dict[int, List[int]] = {}
+    for task_id, (completed, total, done) in _subtree_states(db, task_ids).items():
+        for ancestor_id in chains[task_id]:
+            delta = deltas.setdefault(ancestor_id, [0, 0])
+            delta[0] += 1 + total
+            delta[1] += completed + done
+    apply_rollup_deltas(db, deltas)
+
+
+def detach_subtrees(db: Session, task_ids: Iterable[int]) -> None:
+    """
+    Remove the subtrees rooted at task_ids from their (current) ancestors.
+
+    Call before the tasks are unlinked or deleted. Tasks are processed
+    deepest first and the rollups of detached tasks are tracked as they
+    shrink, so a detached task nested below another one is only subtracted
+    once from the ancestors they share.
+    """
+    task_ids = set(task_ids)
+    if not task_ids:
+        return
+    chains = ancestor_chains(db, task_ids)
+    states = _subtree_states(db, task_ids)
+    deltas: Dict[int, List[int]] = {}
+    for task_id in sorted(states, key=lambda i: len(chains[i]), reverse=True):
+        completed, total, done = states[task_id]
+        for ancestor_id in chains[task_id]:
+            delta = deltas.setdefault(ancestor_id, [0, 0])
+            delta[0] -= 1 + total
+            delta[1] -= completed + done
+            if ancestor_id in states:
+                states[ancestor_id][1] -= 1 + total
+                states[ancestor_id][2] -= completed + done
+    apply_rollup_deltas(db, deltas)
+
+
+def adjust_completed(db: Session, task_ids: Iterable[int], change: int) -> None:
+    """Count tasks that just became completed (change=1) or open (-1) into their ancestors"""
+    deltas: Dict[int, List[int]] = {}
+    for chain in ancestor_chains(db, task_ids).values():
+        for ancestor_id in chain:
+            deltas.setdefault(ancestor_id, [0, 0])[1] += change
+    apply_rollup_deltas(db, deltas)
+
+
+def orphan_children(db: Session, task_ids: List[int], user_id: int, change_seq: int) -> None:
+    """
+    Turn the surviving children of tasks about to be deleted into top-level
+    tasks, stamped with the deleting write's change_seq. Archived children
+    (in tasks_archive) are unlinked the same way.
+    """
+    if not task_ids:
+        return
+    now = datetime.utcnow()
+    for table in (_tasks, _archive):
+        db.execute(
+            update(table)
+            .where(
+                table.c.user_id == user_id,
+                table.c.parent_task_id.in_(task_ids),
+                table.c.id.not_in(task_ids),
+            )
+            .values(parent_task_id=None, updated_at=now, change_seq=change_seq)
+        )
+
+
+def subtree_statement(task_id: int, user_id: int):
+    """
+    READ_COLUMNS plus the rollup of a task and of each of its descendants.
+
+    A single recursive query walking ix_tasks_parent_task_id level by
+    level, ordered so every parent precedes its children.
+    """
+    tree = (
+        select(_tasks.c.id, literal(0).label("depth"))
+        .where(_tasks.c.id == task_id, _tasks.c.user_id == user_id)
+        .cte("tree", recursive=True)
+    )
+    tree = tree.union_all(
+        select(_tasks.c.id, tree.c.depth + 1)
+        .join(tree, _tasks.c.parent_task_id == tree.c.id)
+        .where(_tasks.c.user_id == user_id, tree.c.depth < MAX_DEPTH)
+    )
+    return (
+        select(*READ_COLUMNS, *ROLLUP_COLUMNS)
+        .join(tree, Task.id == tree.c.id)
+        .order_by(tree.c.depth, Task.id)
+    )
+
+
+def rebuild_rollups(db: Session, user_id: Optional[int] = None) -> int:
+    """
+    Recompute every rollup from the parent links (caller commits).
+
+    For tasks written outside TaskService, e.g. by the earlier phases'
+    services. Returns the number of tasks whose rollup changed.
+    """
+    statement = select(_tasks.c.id, _tasks.c.parent_task_id, _tasks.c.completed, *ROLLUP_COLUMNS)
+    if user_id is not None:
+        statement = statement.where(_tasks.c.user_id == user_id)
+    rows = db.execute(statement).all()
+    parents = {row[0]: row[1] for row in rows}
+    rollups = {task_id: [0, 0] for task_id in parents}
+    for task_id, _, completed, _, _ in rows:
+        ancestor_id, depth = parents[task_id], 0
+        while ancestor_id in rollups and ancestor_id != task_id and depth < MAX_DEPTH:
+            rollups[ancestor_id][0] += 1
+            rollups[ancestor_id][1] += int(completed)
+            ancestor_id, depth = parents[ancestor_id], depth + 1
+
+    changed: Dict[int, List[int]] = {}
+    for task_id, _, _, total, done in rows:
+        new_total, new_done = rollups[task_id]
+        if (new_total, new_done) != (total, done):
+            changed[task_id] = [new_total - total, new_done - done]
+    apply_rollup_deltas(db, changed)
+    return len(changed)
@@ -0,0 +1,339 @@
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+from collections import Counter
+from datetime import datetime
+from pydantic import BaseModel, ValidationError, field_validator
+from sqlmodel import Session
+from sqlalchemy import bindparam, func, insert, select, text, update
+from shared.models.task import Task, TaskTag, TaskArchive, TaskTombstone, PRIORITY_RANKS, rank_for_priority
+from .task_tags import normalize_tags
+from .task_versions import bump_task_version
+from .task_hierarchy import attach_subtrees
+from .task_counters import apply_counter_deltas, counter_key
+import csv
+import io
+import json
+import os
+
+
+RECURRENCE_PATTERNS = {"daily", "weekly", "monthly", "yearly"}
+
+# Columns written for each imported task, in COPY order
+TASK_COLUMNS = [
+    "id", "title", "description", "completed", "priority", "priority_rank", "tags",
+    "due_date", "recurring", "recurrence_pattern", "parent_task_id", "user_id",
+    "created_at", "updated_at", "reminder_sent", "change_seq",
+]
+TAG_COLUMNS = ["task_id", "tag", "user_id"]
+
+
+class TaskImportRecord(BaseModel):
+    """
+    One task in an import file.
+
+    `id` and `parent_task_id` are identifiers from the source file (e.g. a
+    previous export or another tool); parents are linked to the new ids.
+    """
+    id: Optional[Union[int, str]] = None
+    title: str
+    description: Optional[str] = None
+    completed: bool = False
+    priority: Optional[str] = "medium"
+    tags: List[str] = []
+    due_date: Optional[datetime] = None
+    recurring: bool = False
+    recurrence_pattern: Optional[str] = None
+    parent_task_id: Optional[Union[int, str]] = None
+    created_at: Optional[datetime] = None
+
+    @field_validator("title")
+    @classmethod
+    def title_not_blank(cls, value: str) -> str:
+        if not value.strip():
+            raise ValueError("title must not be empty")
+        return value
+
+    @field_validator("priority")
+    @classmethod
+    def known_priority(cls, value: Optional[str]) -> Optional[str]:
+        if value is not None and value not in PRIORITY_RANKS:
+            raise ValueError(f"priority must be one of: {', '.join(PRIORITY_RANKS)}")
+        return value
+
+    @field_validator("recurrence_pattern")
+    @classmethod
+    def known_pattern(cls, value: Optional[str]) -> Optional[str]:
+        if value is not None and value not in RECURRENCE_PATTERNS:
+            raise ValueError(f"recurrence_pattern must be one of: {', '.join(sorted(RECURRENCE_PATTERNS))}")
+        return value
+
+    @field_validator("tags", mode="before")
+    @classmethod
+    def split_tags(cls, value: Any) -> List[str]:
+        # Lists from NDJSON, JSON arrays (our CSV export) or "a;b" strings
+        if value is None or value == "":
+            return []
+        if isinstance(value, str):
+            try:
+                value = json.loads(value) if value.lstrip().startswith("[") else value.split(";")
+            except ValueError:
+                value = value.split(";")
+        return normalize_tags(value)
+
+
+MAX_REPORTED_ERRORS = 100
+
+
+class ImportSummary(BaseModel):
+    imported: int = 0
+    failed: int = 0
+    last_line: int = 0
+    errors: List[Dict[str, Any]] = []  # first MAX_REPORTED_ERRORS {"line", "error"} entries
+    unresolved_parents: int = 0
+
+
+def parse_ndjson(stream: Iterable[str]) -> Iterator[Tuple[int, Any]]:
+    """Yield (line number, decoded object) for each non-blank line; decode errors are yielded as exceptions"""
+    for line_no, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            yield line_no, json.loads(line)
+        except ValueError as e:
+            yield line_no, e
+
+
+def parse_csv(stream: Iterable[str]) -> Iterator[Tuple[int, Any]]:
+    """Yield (line number, row dict) for each CSV row, treating empty cells as missing"""
+    reader = csv.DictReader(stream)
+    for row in reader:
+        yield reader.line_num, {key: value for key, value in row.items() if key and value != ""}
+
+
+def copy_csv(rows: Iterable[tuple]) -> io.StringIO:
+    """
+    Rows as COPY ... (FORMAT csv) input. Every value is quoted except None,
+    which is left as an unquoted empty field: COPY only reads unquoted fields
+    as NULL, so no text value (an empty string or a literal \\N) can load as NULL.
+    """
+    buffer = io.StringIO()
+    csv.writer(buffer, quoting=csv.QUOTE_NOTNULL).writerows(rows)
+    buffer.seek(0)
+    return buffer
+
+
+class ImportCheckpoint:
+    """
+    Append-only journal of committed import batches, used to resume.
+
+    Each batch appends one JSON line with the last source line it covers,
+    the first id it allocated, the (source id, new id) pairs it created and
+    its unresolved parent links. The entry is written before the batch commits; on resume the
+    last entry is kept only if its tasks exist in the database.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def load(self) -> List[Dict[str, Any]]:
+        if not os.path.exists(self.path):
+            return []
+        entries = []
+        with open(self.path) as f:
+            for line in f:
+                try:
+                    entries.append(json.loads(line))
+                except ValueError:
+                    break  # torn final write
+        return entries
+
+    def append(self, entry: Dict[str, Any]) -> None:
+        with open(self.path, "a") as f:
+            f.write(json.dumps(entry) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def rewrite(self, entries: List[Dict[str, Any]]) -> None:
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            for entry in entries:
+                f.write(json.dumps(entry) + "\n")
+        os.replace(tmp_path, self.path)
+
+
+class TaskImporter:
+    """
+    Import tasks for one user in large validated batches.
+
+    Records are validated chunk by chunk, ids are allocated for the whole
+    batch up front, and rows are written with COPY on PostgreSQL and a
+    single executemany elsewhere, then committed once per batch. Parent
+    links are resolved through the source ids; children that appear before
+    their parent are linked with one UPDATE at the end.
+    """
+
+    def __init__(
+        self,
+        db: Session,
+        user_id: int,
+        batch_size: int = 5000,
+        checkpoint: Optional[ImportCheckpoint] = None,
+        on_progress: Optional[Callable[[ImportSummary], None]] = None
+    ):
+        self.db = db
+        self.user_id = user_id
+        self.batch_size = batch_size
+        self.checkpoint = checkpoint
+        self.on_progress = on_progress
+        self.dialect = db.get_bind().dialect.name
+        self.summary = ImportSummary()
+        self.id_map: Dict[str, int] = {}
+        self.pending_parents: List[Tuple[int, str]] = []  # (new child id, source parent id)
+
+    def run(self, records: Iterable[Tuple[int, Any]]) -> ImportSummary:
+        """Import (line number, record) pairs and return the summary"""
+        resume_after = self._resume()
+
+        batch: List[Tuple[int, Any]] = []
+        for line_no, record in records:
+            if line_no <= resume_after:
+                continue
+            batch.append((line_no, record))
+            if len(batch) >= self.batch_size:
+                self._import_batch(batch)
+                batch = []
+        if batch:
+            self._import_batch(batch)
+
+        self._link_pending_parents()
+        return self.summary
+
+    def _resume(self) -> int:
+        """Restore state from the checkpoint and return the last imported line"""
+        if not self.checkpoint:
+            return 0
+        entries = self.checkpoint.load()
+        if entries:
+            last = entries[-1]
+            # The final entry may belong to a batch that never committed
+            if last["first_id"] and not self.db.get(Task, last["first_id"]):
+                entries = entries[:-1]
+                self.checkpoint.rewrite(entries)
+        for entry in entries:
+            self.id_map.update({source_id: new_id for source_id, new_id in entry["ids"]})
+            self.pending_parents.extend((child, parent) for child, parent in entry["pending"])
+            self.summary.imported += entry["imported"]
+            self.summary.failed += entry["failed"]
+            self.summary.last_line = entry["line"]
+        return self.summary.last_line
+
+    def _import_batch(self, batch: List[Tuple[int, Any]]) -> None:
+        valid: List[TaskImportRecord] = []
+        failed = 0
+        for line_no, record in batch:
+            try:
+                if isinstance(record, Exception):
+                    raise ValueError(f"Invalid JSON: {record}")
+                valid.append(TaskImportRecord.model_validate(record))
+            except (ValidationError, ValueError) as e:
+                failed += 1
+                if len(self.summary.errors) < MAX_REPORTED_ERRORS:
+                    message = e.errors()[0]["msg"] if isinstance(e, ValidationError) else str(e)
+                    self.summary.errors.append({"line": line_no, "error": message})
+
+        change_seq = bump_task_version(self.db, self.user_id) if valid else None
+        new_ids = self._allocate_ids(len(valid)) if valid else []
+        now = datetime.utcnow()
+        task_rows, tag_rows, id_pairs, pending, linked = [], [], [], [], []
+        counts: Counter = Counter()
+        for record, new_id in zip(valid, new_ids):
+            parent_id = None
+            if record.parent_task_id is not None:
+                parent_id = self.id_map.get(str(record.parent_task_id))
+                if parent_id is None:
+                    pending.append((new_id, str(record.parent_task_id)))
+                else:
+                    linked.append(new_id)
+            if record.id is not None:
+                id_pairs.append((str(record.id), new_id))
+                self.id_map[str(record.id)] = new_id
+
+            task_rows.append((
+                new_id, record.title, record.description, record.completed, record.priority,
+                rank_for_priority(record.priority), json.dumps(record.tags), record.due_date,
+                record.recurring, record.recurrence_pattern, parent_id, self.user_id,
+                record.created_at or now, None, False, change_seq,
+            ))
+            tag_rows.extend((new_id, tag, self.user_id) for tag in record.tags)
+            counts[counter_key(rank_for_priority(record.priority), record.completed)] += 1
+
+        if self.checkpoint:
+            self.checkpoint.append({
+                "line": batch[-1][0], "first_id": new_ids[0] if new_ids else None,
+                "ids": id_pairs, "pending": pending,
+                "imported": len(task_rows), "failed": failed,
+            })
+
+        if task_rows:
+            self._write_rows("tasks", TASK_COLUMNS, task_rows)
+        if tag_rows:
+            self._write_rows("task_tags", TAG_COLUMNS, tag_rows)
+        if task_rows:
+            attach_subtrees(self.db, linked)
+            apply_counter_deltas(self.db, self.user_id, counts)
+        self.db.commit()
+
+        self.pending_parents.extend(pending)
+        self.summary.imported += len(task_rows)
+        self.summary.failed += failed
+        self.summary.last_line = batch[-1][0]
+        if self.on_progress:
+            self.on_progress(self.summary)
+
+    def _allocate_ids(self, count: int) -> List[int]:
+        """Reserve ids for a batch so parent links and tags can be built before writing"""
+        if self.dialect == "postgresql":
+            return list(self.db.execute(
+                text("SELECT nextval(pg_get_serial_sequence('tasks', 'id')) FROM generate_series(1, :n)"),
+                {"n": count}
+            ).scalars())
+        # SQLite allows one writer at a time, so the batch owns ids above every id
+        # handed out so far: live, archived and deleted tasks, and the AUTOINCREMENT sequence
+        highest = [select(func.max(Task.id)), select(func.max(TaskArchive.id)), select(func.max(TaskTombstone.task_id))]
+        if self.db.execute(text("SELECT 1 FROM sqlite_master WHERE name = 'sqlite_sequence'")).first():
+            highest.append(text("SELECT seq FROM sqlite_sequence WHERE name = 'tasks'"))
+        start = max(self.db.execute(query).scalar() or 0 for query in highest) + 1
+        return list(range(start, start + count))
+
+    def _write_rows(self, table: str, columns: List[str], rows: List[tuple]) -> None:
+        if self.dialect == "postgresql":
+            # COPY streams the whole batch in one round trip
+            cursor = self.db.connection().connection.dbapi_connection.cursor()
+            cursor.copy_expert(
+                f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)",
+                copy_csv(rows)
+            )
+            return
+        target = Task.__table__ if table == "tasks" else TaskTag.__table__
+        self.db.execute(insert(target), [dict(zip(columns, row)) for row in rows])
+
+    def _link_pending_parents(self) -> None:
+        """Set parent ids for children that were imported before their parent"""
+        links = []
+        unresolved = 0
+        for child_id, source_parent in self.pending_parents:
+            parent_id = self.id_map.get(source_parent)
+            if parent_id is None:
+                unresolved += 1
+            else:
+                links.append({"child_id": child_id, "parent_id": parent_id})
+        if links:
+            change_seq = bump_task_version(self.db, self.user_id)
+            self.db.execute(
+                update(Task.__table__)
+                .where(Task.__table__.c.id == bindparam("child_id"))
+                .values(parent_task_id=bindparam("parent_id"), updated_at=datetime.utcnow(), change_seq=change_seq),
+                links
+            )
+            attach_subtrees(self.db, [link["child_id"] for link in links])
+            self.db.commit()
+        self.summary.unresolved_parents = unresolved
@@ -0,0 +1,81 @@
+from typing import Any, Optional
+from datetime import datetime
+from sqlalchemy import and_, or_, tuple_
+from shared.models.task import Task
+import base64
+import json
+
+
+class InvalidCursorError(ValueError):
+    """Raised when a pagination cursor is malformed or belongs to another sort"""
+
+
+# Column sort keys: column, whether it can be NULL, and how the cursor value
+# is decoded back into a bind parameter. "relevance" is handled by the
+# service because its expression depends on the search query.
+SORT_KEYS = {
+    "created_at": (Task.created_at, False, datetime.fromisoformat),
+    "due_date": (Task.due_date, True, datetime.fromisoformat),
+    "priority": (Task.priority_rank, True, int),
+}
+
+RELEVANCE = "relevance"
+
+
+def sort_key(sort_by: str):
+    """Return the (column, nullable, decode) triple for a column sort_by value"""
+    return SORT_KEYS.get(sort_by, SORT_KEYS["created_at"])
+
+
+def order_by_clauses(expression, nullable: bool, sort_order: str, id_column=Task.id):
+    """
+    ORDER BY for a sort expression with id as tie-breaker.
+
+    NULLs sort last ascending and first descending, which is the natural
+    order of a PostgreSQL b-tree, so one (user_id, column, id) index serves
+    both directions.
+    """
+    if sort_order == "desc":
+        first = expression.desc().nulls_first() if nullable else expression.desc()
+        return [first, id_column.desc()]
+    first = expression.asc().nulls_last() if nullable else expression.asc()
+    return [first, id_column.asc()]
+
+
+def encode_cursor(sort_by: str, sort_order: str, value: Any, task_id: int) -> str:
+    """Serialize the position after the last row of a page into an opaque token"""
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    payload = json.dumps({"s": sort_by, "o": sort_order, "v": value, "i": task_id}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort_by: str, sort_order: str, decode=None):
+    """Decode a cursor into (value, id), validating it matches the requested sort"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if payload["s"] != sort_by or payload["o"] != sort_order:
+            raise InvalidCursorError("Cursor does not match the requested sort")
+        decode = decode or sort_key(sort_by)[2]
+        value = payload["v"]
+        return (decode(value) if value is not None else None), int(payload["i"])
+    except InvalidCursorError:
+        raise
+    except (ValueError, KeyError, TypeError) as e:
+        raise InvalidCursorError("Invalid pagination cursor") from e
+
+
+def keyset_clause(expression, nullable: bool, sort_order: str, value: Any, task_id: int):
+    """WHERE clause selecting the rows that come strictly after (value, task_id)"""
+    if sort_order == "desc":
+        if value is None:
+            # Still inside the leading NULL block, then every non-NULL row
+            return or_(and_(expression.is_(None), Task.id < task_id), expression.is_not(None))
+        return tuple_(expression, Task.id) < tuple_(value, task_id)
+
+    if value is None:
+        # Inside the trailing NULL block
+        return and_(expression.is_(None), Task.id > task_id)
+    after = tuple_(expression, Task.id) > tuple_(value, task_id)
+    return or_(after, expression.is_(None)) if nullable else after
@@ -0,0 +1,152 @@
+from typing import Dict, Iterator, Optional, Sequence, Tuple
+from collections import Counter
+from calendar import monthrange
+from datetime import datetime, timedelta
+from sqlmodel import Session
+from sqlalchemy import bindparam, insert, select, tuple_, update
+from sqlalchemy.dialects import postgresql, sqlite
+from shared.models.task import Task, TaskTag
+from .task_tags import parse_tags
+from .task_hierarchy import attach_subtrees
+from .task_counters import apply_counter_deltas, counter_key
+from .task_versions import bump_task_versions
+
+
+# Steps of the fixed-length patterns; monthly and yearly go by calendar
+# month, and unknown patterns repeat daily as they always have
+FIXED_STEPS = {"daily": timedelta(days=1), "weekly": timedelta(weeks=1)}
+MONTH_STEPS = {"monthly": 1, "yearly": 12}
+
+# Columns of a recurring task needed to generate its instances
+TEMPLATE_COLUMNS = (
+    Task.id, Task.user_id, Task.title, Task.description, Task.priority, Task.priority_rank,
+    Task.tags, Task.due_date, Task.recurrence_pattern, Task.next_occurrence_at,
+)
+
+# A recurring task that generates instances: it has a due date to anchor
+# the series and is not itself an instance
+TEMPLATES = (Task.recurring == True, Task.series_id.is_(None), Task.due_date.is_not(None))
+
+_tasks = Task.__table__
+
+
+def add_months(value: datetime, months: int) -> datetime:
+    """value moved by whole calendar months, the day clamped to the end of a shorter month"""
+    month_index = value.year * 12 + value.month - 1 + months
+    year, month = divmod(month_index, 12)
+    month += 1
+    return value.replace(year=year, month=month, day=min(value.day, monthrange(year, month)[1]))
+
+
+def occurrence(anchor: datetime, pattern: Optional[str], n: int) -> datetime:
+    """
+    The n-th occurrence of a series starting at anchor (n=0 is the anchor).
+
+    Always computed from the anchor rather than from the previous
+    occurrence, so a series on the 31st lands on the last day of shorter
+    months and is back on the 31st afterwards (Jan 31, Feb 28, Mar 31).
+    """
+    if pattern in MONTH_STEPS:
+        return add_months(anchor, MONTH_STEPS[pattern] * n)
+    return anchor + FIXED_STEPS.get(pattern, FIXED_STEPS["daily"]) * n
+
+
+def occurrences(anchor: datetime, pattern: Optional[str], start: datetime) -> Iterator[datetime]:
+    """The occurrences after the anchor that fall on or after start, in order, without end"""
+    if pattern in MONTH_STEPS:
+        step = MONTH_STEPS[pattern]
+        n = ((start.year - anchor.year) * 12 + start.month - anchor.month) // step - 1
+    else:
+        n = (start - anchor) // FIXED_STEPS.get(pattern, FIXED_STEPS["daily"])
+    n = max(n, 1)
+    # n is at most a step short of the first occurrence on or after start
+    while occurrence(anchor, pattern, n) < start:
+        n += 1
+    while True:
+        yield occurrence(anchor, pattern, n)
+        n += 1
+
+
+def insert_instances(db: Session, instances: Sequence[Tuple[Tuple, datetime]]) -> int:
+    """
+    Insert one open subtask per (TEMPLATE_COLUMNS row, occurrence) inside the
+    caller's transaction; returns the number inserted.
+
+    One multi-row INSERT that skips occurrences already present in
+    ux_tasks_series_occurrence (ON CONFLICT DO NOTHING on PostgreSQL and
+    SQLite, a lookup first elsewhere), so generating a series twice is
+    harmless. The template owners' versions are bumped first, giving the
+    rows their change_seq; tags, rollups and counters are updated for the
+    new rows only.
+    """
+    if not instances:
+        return 0
+    versions = bump_task_versions(db, {template.user_id for template, _ in instances})
+    now = datetime.utcnow()
+    rows = [
+        {
+            "title": template.title,
+            "description": template.description,
+            "completed": False,
+            "priority": template.priority,
+            # Bulk INSERTs skip mapper events, so the rank is copied here
+            "priority_rank": template.priority_rank,
+            "tags": template.tags,
+            "due_date": occurs_at,
+            "recurring": False,
+            "recurrence_pattern": None,
+            "parent_task_id": template.id,
+            "series_id": template.id,
+            "occurrence_date": occurs_at,
+            "user_id": template.user_id,
+            "created_at": now,
+            "reminder_sent": False,
+            "change_seq": versions[template.user_id],
+        }
+        for template, occurs_at in instances
+    ]
+
+    created_columns = (_tasks.c.id, _tasks.c.user_id, _tasks.c.priority_rank, _tasks.c.tags)
+    dialect = db.get_bind().dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        dialect_insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+        statement = dialect_insert(_tasks).on_conflict_do_nothing(
+            index_elements=[_tasks.c.series_id, _tasks.c.occurrence_date]
+        )
+        created = db.execute(statement.returning(*created_columns), rows).all()
+    else:
+        keys = [(row["series_id"], row["occurrence_date"]) for row in rows]
+        existing = set(db.execute(
+            select(_tasks.c.series_id, _tasks.c.occurrence_date)
+            .where(tuple_(_tasks.c.series_id, _tasks.c.occurrence_date).in_(keys))
+        ).all())
+        rows = [row for row in rows if (row["series_id"], row["occurrence_date"]) not in existing]
+        created = db.execute(insert(_tasks).returning(*created_columns), rows).all() if rows else []
+    if not created:
+        return 0
+
+    tag_rows = [
+        {"task_id": task_id, "tag": tag, "user_id": user_id}
+        for task_id, user_id, _, tags in created
+        for tag in parse_tags(tags)
+    ]
+    if tag_rows:
+        db.execute(insert(TaskTag), tag_rows)
+    attach_subtrees(db, [task_id for task_id, _, _, _ in created])
+    per_user: Dict[int, Counter] = {}
+    for _, user_id, priority_rank, _ in created:
+        per_user.setdefault(user_id, Counter())[counter_key(priority_rank, False)] += 1
+    for user_id, deltas in per_user.items():
+        apply_counter_deltas(db, user_id, deltas)
+    return len(created)
+
+
+def set_next_occurrences(db: Session, next_at: Dict[int, datetime]) -> None:
+    """Store each recurring task's first occurrence not generated yet, with one executemany"""
+    if next_at:
+        db.execute(
+            update(_tasks)
+            .where(_tasks.c.id == bindparam("template_id"))
+            .values(next_occurrence_at=bindparam("next_at")),
+            [{"template_id": task_id, "next_at": at} for task_id, at in next_at.items()]
+        )
@@ -0,0 +1,127 @@
+from typing import List, Optional
+from sqlalchemy import event, func, inspect, literal_column, text
+from sqlalchemy.sql import column, table
+from shared.models.task import Task
+import re
+
+
+# SQLite: external-content FTS5 table over tasks(title, description), kept in
+# sync by triggers so every write path (ORM, bulk SQL, other services) is covered
+SQLITE_SEARCH_DDL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS tasks_fts USING fts5(
+        title, description, content='tasks', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS tasks_fts_ai AFTER INSERT ON tasks BEGIN
+        INSERT INTO tasks_fts(rowid, title, description)
+        VALUES (new.id, new.title, new.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS tasks_fts_ad AFTER DELETE ON tasks BEGIN
+        INSERT INTO tasks_fts(tasks_fts, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS tasks_fts_au AFTER UPDATE OF title, description ON tasks BEGIN
+        INSERT INTO tasks_fts(tasks_fts, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+        INSERT INTO tasks_fts(rowid, title, description)
+        VALUES (new.id, new.title, new.description);
+    END
+    """,
+]
+
+# PostgreSQL: a stored generated tsvector (titles weighted above descriptions)
+# maintained by the database itself, with a GIN index for @@ lookups
+POSTGRES_SEARCH_DDL = [
+    """
+    ALTER TABLE tasks ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(description, '')), 'B')
+    ) STORED
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_tasks_search_vector ON tasks USING GIN (search_vector)",
+]
+
+tasks_fts = table("tasks_fts", column("rowid"))
+
+
+def install_task_search(connection) -> None:
+    """
+    Create the full-text search objects for the connection's dialect.
+
+    Idempotent. When the SQLite index is created on a database that already
+    holds tasks, it is rebuilt from the tasks table.
+    """
+    dialect = connection.dialect.name
+    if dialect == "sqlite":
+        existed = inspect(connection).has_table("tasks_fts")
+        for statement in SQLITE_SEARCH_DDL:
+            connection.execute(text(statement))
+        if not existed:
+            connection.execute(text("INSERT INTO tasks_fts(tasks_fts) VALUES ('rebuild')"))
+    elif dialect == "postgresql":
+        for statement in POSTGRES_SEARCH_DDL:
+            connection.execute(text(statement))
+
+
+@event.listens_for(Task.__table__, "after_create")
+def _install_on_create(target, connection, **kw):
+    install_task_search(connection)
+
+
+def search_terms(search_query: Optional[str]) -> List[str]:
+    """Split a user query into plain word terms, dropping search-syntax characters"""
+    return re.findall(r"\w+", search_query or "")
+
+
+def search_parameter(dialect: str, search_query: Optional[str]) -> Optional[str]:
+    """
+    The value apply_search binds for a user query: an FTS5 query on SQLite,
+    the terms for plainto_tsquery on PostgreSQL, the query itself elsewhere;
+    None when it has no terms.
+    """
+    terms = search_terms(search_query)
+    if not terms:
+        return None
+    if dialect == "sqlite":
+        # Quoted terms are implicitly ANDed and cannot be parsed as FTS5 operators
+        return " ".join('"%s"' % term for term in terms)
+    if dialect == "postgresql":
+        return " ".join(terms)
+    return search_query
+
+
+def apply_search(statement, dialect: str, query):
+    """
+    Restrict a Task SELECT to rows matching query, a search_parameter value
+    or a bind parameter for one.
+
+    Returns the statement and a rank expression where ascending order means
+    most relevant first (bm25 on SQLite, negated ts_rank_cd on PostgreSQL),
+    or None as rank on databases without a full-text engine.
+    """
+    if dialect == "sqlite":
+        fts = literal_column("tasks_fts")
+        statement = statement.join(tasks_fts, tasks_fts.c.rowid == Task.id).where(
+            fts.op("MATCH")(query)
+        )
+        return statement, func.bm25(fts, 10.0, 1.0)
+
+    if dialect == "postgresql":
+        vector = literal_column("tasks.search_vector")
+        tsquery = func.plainto_tsquery("english", query)
+        statement = statement.where(vector.op("@@")(tsquery))
+        return statement, -func.ts_rank_cd(vector, tsquery)
+
+    statement = statement.where(
+        Task.title.contains(query) |
+        Task.description.contains(query)
+    )
+    return statement, None
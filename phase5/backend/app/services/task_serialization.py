@@ -0,0 +1,116 @@
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+from datetime import datetime
+from shared.models.task import Task
+import json
+
+try:
+    import orjson
+except ImportError:  # optional, ~5x faster encoding when installed
+    orjson = None
+
+
+# TaskRead fields in the order its JSON output uses
+READ_FIELDS = [
+    "title", "description", "completed", "priority", "tags", "due_date", "recurring",
+    "recurrence_pattern", "parent_task_id", "id", "user_id", "created_at", "updated_at",
+    "reminder_sent",
+]
+READ_COLUMNS = [getattr(Task, field) for field in READ_FIELDS]
+_TAGS = READ_FIELDS.index("tags")
+
+
+def select_fields(names: Optional[Iterable[str]]) -> Optional[Tuple[str, ...]]:
+    """
+    The READ_FIELDS of a sparse fieldset (?fields=title,completed), in
+    READ_FIELDS order and always with id; None selects every field.
+
+    Raises ValueError for names that are not TaskRead fields.
+    """
+    selected = {name.strip() for name in names or () if name.strip()}
+    if not selected:
+        return None
+    unknown = selected.difference(READ_FIELDS)
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+    selected.add("id")
+    return tuple(field for field in READ_FIELDS if field in selected)
+
+
+def read_columns(fields: Optional[Sequence[str]] = None) -> List[Any]:
+    """The task columns selecting a sparse fieldset, READ_COLUMNS for None"""
+    return [getattr(Task, field) for field in fields] if fields else READ_COLUMNS
+
+
+def decode_tags(tags_json: Any) -> List[Any]:
+    """Decode the JSON tags column once, as TaskRead.from_orm does"""
+    if not tags_json or tags_json == "[]":
+        return []
+    if isinstance(tags_json, list):
+        return tags_json
+    try:
+        return json.loads(tags_json)
+    except (TypeError, ValueError):
+        return []
+
+
+def task_record(row: Sequence[Any], fields: Optional[Sequence[str]] = None) -> Dict[str, Any]:
+    """
+    Turn a READ_COLUMNS row into a TaskRead-shaped dict without validation,
+    or a row of read_columns(fields) into a dict of just those fields
+    """
+    if not fields:
+        record = dict(zip(READ_FIELDS, row))
+        record["tags"] = decode_tags(row[_TAGS])
+        return record
+    record = dict(zip(fields, row))
+    if "tags" in record:
+        record["tags"] = decode_tags(record["tags"])
+    return record
+
+
+def _default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def encode_json(value: Any) -> bytes:
+    """Compact JSON matching FastAPI's output for task records"""
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value, default=_default, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def encode_tasks(rows: Iterable[Sequence[Any]], fields: Optional[Sequence[str]] = None) -> bytes:
+    """
+    Encode READ_COLUMNS rows as the JSON array a List[TaskRead] response produces.
+
+    Rows come straight from a column SELECT, so the only per-row work is
+    decoding tags; nothing is validated or copied on the way out. Rows of
+    read_columns(fields) are encoded with only those keys.
+    """
+    return encode_json([task_record(row, fields) for row in rows])
+
+
+def task_tree(rows: Iterable[Sequence[Any]]) -> Optional[Dict[str, Any]]:
+    """
+    Nest subtree rows (READ_COLUMNS + rollup, parents first) into TaskTreeNode dicts.
+
+    Returns the root, or None when there are no rows.
+    """
+    nodes: Dict[int, Dict[str, Any]] = {}
+    root = None
+    width = len(READ_FIELDS)
+    for row in rows:
+        record = task_record(row[:width])
+        if record["id"] in nodes:
+            continue  # a parent cycle written outside the service
+        record["subtasks_total"], record["subtasks_completed"] = row[width], row[width + 1]
+        record["children"] = []
+        nodes[record["id"]] = record
+        parent = nodes.get(record["parent_task_id"])
+        if root is None:
+            root = record
+        elif parent is not None:
+            parent["children"].append(record)
+    return root
@@ -1,19 +1,88 @@
-from typing import List, Optional
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+from collections import Counter
 from sqlmodel import Session, select
+from sqlalchemy import bindparam, delete, false, insert, union_all, update
 from datetime import datetime, timedelta
-from shared.models.task import Task, TaskCreate, TaskUpdate, TaskRead
+from shared.models.task import (
+    Task, TaskArchive, TaskCreate, TaskUpdate, TaskRead, TaskStats, TaskTag, TaskBulkItemResult, TaskBulkResult,
+    PRIORITY_RANKS, rank_for_priority
+)
+from .task_tags import normalize_tags, parse_tags, sync_task_tags, delete_task_tags, tag_filter_clause
+from .task_pagination import (
+    SORT_KEYS, RELEVANCE, sort_key, order_by_clauses, encode_cursor, decode_cursor, keyset_clause
+)
+from .task_search import apply_search, search_parameter, search_terms
+from .task_serialization import READ_COLUMNS, read_columns, task_record
+from .task_cache import TaskReadCache
+from .task_versions import bump_task_version, get_task_version
+from .task_hierarchy import (
+    add_to_ancestors, adjust_completed, ancestor_chains, attach_subtrees, detach_subtrees,
+    orphan_children, subtree_statement
+)
+from .task_counters import (
+    apply_count_change, apply_counter_deltas, counter_key, get_task_stats, key_counts, move_counts
+)
+from .task_recurrence import TEMPLATE_COLUMNS, TEMPLATES, insert_instances, occurrence
+from .task_calendar import calendar_entries
+from .task_changes import changes_since, record_tombstones
+from .task_archive import archived_search, archived_tag_clause, contains_pattern, merge_rows, on_archive
+from .task_statements import list_statements
 import json
 
 
+# Columns written by exports, in output order
+EXPORT_FIELDS = [
+    "id", "title", "description", "completed", "priority", "tags", "due_date",
+    "recurring", "recurrence_pattern", "parent_task_id", "created_at", "updated_at",
+    "reminder_sent",
+]
+
+
 class TaskService:
+    def __init__(self, cache: Optional[TaskReadCache] = None):
+        # Read cache for the row reads behind the list endpoints, shared
+        # between service instances (task_cache.task_read_cache); None reads
+        # straight from the database
+        self.cache = cache
+
+    def invalidate(self, user_id: int) -> None:
+        """Drop the user's cached reads; called after every committed write"""
+        if self.cache is not None:
+            self.cache.invalidate(user_id)
+
+    def get_version(self, db: Session, user_id: int) -> Tuple[int, Optional[datetime]]:
+        """The user's task version and the time it last changed (see task_versions)"""
+        return get_task_version(db, user_id)
+
+    def get_stats(self, db: Session, user_id: int) -> TaskStats:
+        """Task totals from the user's counters (see task_counters)"""
+        return get_task_stats(db, user_id)
+
+    def _cached(
+        self, db: Session, user_id: int, name: str, load: Callable[[], Any], version: Optional[int] = None, **filters
+    ) -> Any:
+        """
+        load() through the read cache, validated against the user's task
+        version: the one given, read by the caller in the same session, or
+        read here. The version is committed by every writer, so entries
+        stored before a write in another process are misses as well.
+        """
+        if self.cache is None or not self.cache.enabled:
+            return load()
+        if version is None:
+            version = get_task_version(db, user_id)[0]
+        return self.cache.get_or_load(self.cache.key(user_id, name, **filters), load, version)
+
     def create_task(self, db: Session, task_data: TaskCreate, user_id: int) -> TaskRead:
         """Create a new task with advanced features"""
+        if task_data.parent_task_id is not None and not self._owned_task_ids(db, {task_data.parent_task_id}, user_id):
+            raise ValueError("Parent task not found")
+
         # Convert tags list to JSON string if it's provided as a list
-        if task_data.tags is not None and isinstance(task_data.tags, list):
-            tags_json = json.dumps(task_data.tags)
-        else:
-            tags_json = task_data.tags if task_data.tags is not None else '[]'
+        tags = self._tags_from_input(task_data.tags)
+        tags_json = json.dumps(tags)
 
+        change_seq = bump_task_version(db, user_id)
         db_task = Task(
             title=task_data.title,
             description=task_data.description,
@@ -24,21 +93,67 @@ class TaskService:
             recurring=task_data.recurring,
             recurrence_pattern=task_data.recurrence_pattern,
             parent_task_id=task_data.parent_task_id,
-            user_id=user_id
+            user_id=user_id,
+            change_seq=change_seq
         )
         db.add(db_task)
+        db.flush()
+        sync_task_tags(db, db_task.id, user_id, tags)
+        if db_task.parent_task_id is not None:
+            add_to_ancestors(db, db_task.parent_task_id, 1, int(db_task.completed))
+        apply_counter_deltas(db, user_id, {counter_key(db_task.priority_rank, db_task.completed): 1})
         db.commit()
+        self.invalidate(user_id)
         db.refresh(db_task)
         return TaskRead.from_orm(db_task)
 
-    def get_task(self, db: Session, task_id: int, user_id: int) -> Optional[TaskRead]:
-        """Get a specific task for a user"""
+    def get_task(
+        self, db: Session, task_id: int, user_id: int, include_archived: bool = False
+    ) -> Optional[TaskRead]:
+        """Get a specific task for a user, looking in the archive too with include_archived"""
         statement = select(Task).where(Task.id == task_id, Task.user_id == user_id)
         task = db.exec(statement).first()
         if task:
             return TaskRead.from_orm(task)
+        if include_archived:
+            row = db.execute(
+                on_archive(select(*READ_COLUMNS).where(Task.id == task_id, Task.user_id == user_id))
+            ).first()
+            if row is not None:
+                return TaskRead.model_construct(**task_record(row))
         return None
 
+    def get_task_tree_rows(self, db: Session, task_id: int, user_id: int) -> List[Tuple]:
+        """
+        The task and all of its descendants as READ_COLUMNS + rollup tuples.
+
+        One recursive query (see task_hierarchy.subtree_statement), parents
+        before children; empty when the user has no such task.
+        """
+        def load():
+            return [tuple(row) for row in db.execute(subtree_statement(task_id, user_id))]
+
+        return self._cached(db, user_id, "tree", load, task_id=task_id)
+
+    def get_calendar(self, db: Session, user_id: int, start: datetime, end: datetime) -> List[Dict[str, Any]]:
+        """
+        Tasks due between start and end plus the virtual occurrences of
+        recurring tasks, as TaskCalendarEntry dicts sorted by due date
+        (see task_calendar). Raises ValueError for invalid ranges.
+        """
+        return self._cached(
+            db, user_id, "calendar", lambda: calendar_entries(db, user_id, start, end), start=start, end=end
+        )
+
+    def get_changes(self, db: Session, user_id: int, since: int, limit: int) -> Dict[str, Any]:
+        """
+        Tasks created, updated or deleted after the sync cursor `since`, as a
+        TaskChanges dict (see task_changes). Not cached: the change_seq index
+        makes it a short range scan. Raises ExpiredCursorError or ValueError
+        for unusable cursors.
+        """
+        return changes_since(db, user_id, since, limit)
+
     def get_tasks(
         self,
         db: Session,
@@ -49,178 +164,910 @@ class TaskService:
         due_date_from: Optional[datetime] = None,
         due_date_to: Optional[datetime] = None,
         search_query: Optional[str] = None,
-        sort_by: str = "created_at",
-        sort_order: str = "asc"
+        sort_by: Optional[str] = None,
+        sort_order: str = "asc",
+        tag_match: str = "all",
+        min_priority: Optional[str] = None,
+        max_priority: Optional[str] = None,
+        include_archived: bool = False
     ) -> List[TaskRead]:
-        """Get all tasks for a user with filters and sorting"""
-        statement = select(Task).where(Task.user_id == user_id)
+        """
+        Get all tasks for a user with filters and sorting.
+
+        sort_by defaults to relevance when a search query is given and to
+        created_at otherwise. min_priority/max_priority keep tasks within a
+        priority range (e.g. min_priority="high" for high and urgent) and
+        raise ValueError for unknown priorities. include_archived adds the
+        matching archived tasks (see task_archive).
+        """
+        filters = dict(
+            completed=completed, priority=priority, tags=tags, due_date_from=due_date_from,
+            due_date_to=due_date_to, search_query=search_query, sort_by=sort_by, sort_order=sort_order,
+            tag_match=tag_match, min_priority=min_priority, max_priority=max_priority
+        )
+        if include_archived:
+            rows, _ = self._list_rows(db, user_id, filters, include_archived=True)
+            return [TaskRead.model_construct(**task_record(row[:-1])) for row in rows]
+        params, sort = self._list_query(db, user_id, filters)
+        statement, params = self._list_statement(db, params, sort, "tasks")
+        tasks = db.exec(statement, params=params).all()
+        return [TaskRead.from_orm(task) for task in tasks]
+
+    def get_task_rows(
+        self,
+        db: Session,
+        user_id: int,
+        include_archived: bool = False,
+        fields: Optional[Tuple[str, ...]] = None,
+        version: Optional[int] = None,
+        **filters
+    ) -> List[Tuple]:
+        """
+        Column-only variant of get_tasks returning READ_COLUMNS tuples.
+
+        Used by the list endpoints, which encode the tuples straight to JSON
+        (see task_serialization) instead of building and re-validating a
+        TaskRead per row. fields (from select_fields) selects only those
+        columns, so the tuples are rows of read_columns(fields). version is
+        the user's task version when the caller already read it in this
+        session (for an ETag); cached rows are only served for that version.
+        """
+        def load():
+            if include_archived:
+                rows, _ = self._list_rows(db, user_id, filters, include_archived=True, fields=fields)
+                return [tuple(row)[:-1] for row in rows]
+            params, sort = self._list_query(db, user_id, filters)
+            return [tuple(row) for row in db.execute(*self._list_statement(db, params, sort, "rows", fields=fields))]
+
+        return self._cached(
+            db, user_id, "list", load, version, include_archived=include_archived, fields=fields, **filters
+        )
+
+    def get_tasks_page(
+        self,
+        db: Session,
+        user_id: int,
+        limit: int,
+        cursor: Optional[str] = None,
+        include_archived: bool = False,
+        **filters
+    ) -> Tuple[List[TaskRead], Optional[str]]:
+        """
+        Get one page of tasks using keyset pagination.
+
+        Returns the tasks and the cursor of the next page (None on the last
+        page); see get_task_rows_page.
+        """
+        rows, next_cursor = self.get_task_rows_page(db, user_id, limit, cursor, include_archived, **filters)
+        return [TaskRead.model_construct(**task_record(row)) for row in rows], next_cursor
+
+    def get_task_rows_page(
+        self,
+        db: Session,
+        user_id: int,
+        limit: int,
+        cursor: Optional[str] = None,
+        include_archived: bool = False,
+        fields: Optional[Tuple[str, ...]] = None,
+        version: Optional[int] = None,
+        **filters
+    ) -> Tuple[List[Tuple], Optional[str]]:
+        """
+        Get one page of READ_COLUMNS tuples (or read_columns(fields) tuples)
+        using keyset pagination.
+
+        The cursor encodes the sort value and id of the last row of the
+        previous page, so every page is an index range scan of `limit` rows
+        no matter how deep into the list it is. With include_archived the
+        archive is scanned the same way and both pages merged; ids are
+        unique across the two tables, so the cursor works for either.
+        version is as for get_task_rows.
+        """
+        def load():
+            # Fetch one extra row to learn whether another page exists
+            rows, (sort_by, sort_order, _) = self._list_rows(
+                db, user_id, filters, include_archived, limit + 1, cursor, fields
+            )
+            next_cursor = None
+            if len(rows) > limit:
+                rows = rows[:limit]
+                last = rows[-1]
+                next_cursor = encode_cursor(sort_by, sort_order, last.sort_value, last.id)
+            return [tuple(row)[:-1] for row in rows], next_cursor
+
+        return self._cached(
+            db, user_id, "page", load, version, limit=limit, cursor=cursor, include_archived=include_archived,
+            fields=fields, **filters
+        )
+
+    def _list_rows(
+        self,
+        db: Session,
+        user_id: int,
+        filters: Dict[str, Any],
+        include_archived: bool = False,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+        fields: Optional[Tuple[str, ...]] = None
+    ) -> Tuple[List, Tuple]:
+        """
+        The filtered list as READ_COLUMNS (or read_columns(fields)) rows
+        followed by their sort value (selected for the next cursor), after
+        the keyset cursor and up to limit rows, and the resolved sort.
+
+        With include_archived the same statement, rewritten onto
+        tasks_archive, runs as well and the two ordered results are merged.
+        """
+        params, sort = self._list_query(db, user_id, filters)
+        sort_by, sort_order, decode = sort
+        if cursor:
+            value, params["after_id"] = decode_cursor(cursor, sort_by, sort_order, decode)
+            if value is not None:
+                params["after_value"] = value
+        if limit is not None:
+            params["limit"] = limit
+        parts = [
+            db.execute(*self._list_statement(db, params, sort, "page", archived, fields)).all()
+            for archived in ((False, True) if include_archived else (False,))
+        ]
+        rows = merge_rows(parts, sort_order) if include_archived else parts[0]
+        return rows[:limit] if limit is not None else rows, sort
+
+    def export_statement(self, db: Session, user_id: int, include_archived: bool = False, **filters):
+        """
+        Column-only SELECT of the export fields with the list filters applied.
+
+        Built separately from iter_export_rows so invalid filters are
+        rejected before a streaming response starts. With include_archived
+        it is a UNION ALL with the archive, in the same order.
+        """
+        params, sort = self._list_query(db, user_id, filters)
+        statement, params = self._list_statement(db, params, sort, "export_all" if include_archived else "export")
+        return statement.params(params)
 
-        # Apply filters
-        if completed is not None:
-            statement = statement.where(Task.completed == completed)
+    def iter_export_rows(self, db: Session, statement, batch_size: int = 1000) -> Iterator[Dict[str, Any]]:
+        """
+        Stream export rows as dicts with tags decoded to lists.
 
+        yield_per fetches batch_size rows at a time through a server-side
+        cursor where the driver supports one, so memory stays constant no
+        matter how many tasks match.
+        """
+        result = db.execute(statement.execution_options(yield_per=batch_size))
+        for row in result:
+            record = dict(row._mapping)
+            record["tags"] = parse_tags(record["tags"])
+            yield record
+
+    def _list_query(self, db: Session, user_id: int, filters: Dict[str, Any]) -> Tuple[Dict[str, Any], Tuple]:
+        """
+        The bind parameters of the list statements for filters (the get_tasks
+        arguments) and the resolved sort as (sort_by, sort_order, decode).
+
+        Which parameters are set is the shape of the statement (see
+        _list_statement). They cover the live and the archived statement:
+        archived_* parameters are the archive's tag and search patterns.
+        Raises ValueError for unknown priority bounds.
+        """
+        dialect = db.get_bind().dialect.name
+        params: Dict[str, Any] = {"user_id": user_id}
+        if filters.get("completed") is not None:
+            params["completed"] = filters["completed"]
+
+        priority = filters.get("priority")
         if priority is not None:
-            statement = statement.where(Task.priority == priority)
+            rank = rank_for_priority(priority)
+            if rank is not None:
+                params["priority_rank"] = rank
+            else:
+                params["priority"] = priority
+
+        # Priority ranges compare the integer rank, e.g. "high or above"
+        if filters.get("min_priority") is not None:
+            params["min_priority"] = self._priority_rank(filters["min_priority"])
+        if filters.get("max_priority") is not None:
+            params["max_priority"] = self._priority_rank(filters["max_priority"])
 
+        tags = normalize_tags(filters.get("tags"))
         if tags:
-            # Filter tasks that contain any of the specified tags
-            # Since tags are stored as JSON strings, we need to search inside the JSON
-            for tag in tags:
-                # Search for the tag in the JSON string representation
-                statement = statement.where(Task.tags.contains(tag))
-
-        if due_date_from:
-            statement = statement.where(Task.due_date >= due_date_from)
-
-        if due_date_to:
-            statement = statement.where(Task.due_date <= due_date_to)
-
-        if search_query:
-            statement = statement.where(
-                Task.title.contains(search_query) |
-                Task.description.contains(search_query)
+            params["tags"] = tags
+            if filters.get("tag_match", "all") != "any" and len(tags) > 1:
+                params["tag_count"] = len(tags)
+            for index, tag in enumerate(tags):
+                params[f"archived_tag_{index}"] = contains_pattern(json.dumps(tag))
+
+        if filters.get("due_date_from"):
+            params["due_date_from"] = filters["due_date_from"]
+        if filters.get("due_date_to"):
+            params["due_date_to"] = filters["due_date_to"]
+
+        search = search_parameter(dialect, filters.get("search_query"))
+        if search is not None:
+            params["search"] = search
+            for index, term in enumerate(search_terms(filters["search_query"])):
+                params[f"archived_term_{index}"] = contains_pattern(term)
+        elif (filters.get("search_query") or "").strip():
+            # Only search-syntax characters ("!!!", "-"): no task can match
+            params["no_match"] = True
+
+        # Sorting, with id as tie-breaker so the order is total; only the
+        # full-text engines rank matches
+        ranked = search is not None and dialect in ("sqlite", "postgresql")
+        sort_by = filters.get("sort_by") or (RELEVANCE if ranked else "created_at")
+        if sort_by == RELEVANCE and ranked:
+            # Most relevant first, whatever sort_order says
+            return params, (RELEVANCE, "asc", float)
+        sort_by = sort_by if sort_by in SORT_KEYS else "created_at"
+        sort_order = "desc" if filters.get("sort_order") == "desc" else "asc"
+        return params, (sort_by, sort_order, sort_key(sort_by)[2])
+
+    def _list_statement(
+        self,
+        db: Session,
+        params: Dict[str, Any],
+        sort: Tuple,
+        variant: str,
+        archived: bool = False,
+        fields: Optional[Tuple[str, ...]] = None
+    ):
+        """
+        The list SELECT for _list_query's parameters, from list_statements,
+        and the parameters it binds.
+
+        variant selects what it returns: "tasks" (Task entities), "rows"
+        (READ_COLUMNS), "page" (READ_COLUMNS and the sort value, after the
+        after_id/after_value keyset and up to limit rows when those are
+        set), "export" (EXPORT_FIELDS) or "export_all" (EXPORT_FIELDS of the
+        tasks and the archive). With archived, "page" reads tasks_archive.
+        fields narrows "rows" and "page" to read_columns(fields).
+        """
+        dialect = db.get_bind().dialect.name
+        with_archive = archived or variant == "export_all"
+        names = frozenset(name for name in params if with_archive or not name.startswith("archived_"))
+        shape = (dialect, names, sort[0], sort[1], variant, archived, fields)
+        statement = list_statements.get(shape, lambda: self._build_list_statement(*shape))
+        # Only the statement's own names: they are part of the compiled cache key
+        return statement, {name: params[name] for name in names}
+
+    def _build_list_statement(
+        self,
+        dialect: str,
+        names: frozenset,
+        sort_by: str,
+        sort_order: str,
+        variant: str,
+        archived: bool,
+        fields: Optional[Tuple[str, ...]] = None
+    ):
+        if variant == "export_all":
+            parts = [
+                self._build_list_statement(dialect, names, sort_by, sort_order, "export_part", part_archived)
+                for part_archived in (False, True)
+            ]
+            merged = union_all(*parts).subquery()
+            nullable = sort_by != RELEVANCE and sort_key(sort_by)[1]
+            return select(*[merged.c[field] for field in EXPORT_FIELDS]).order_by(
+                *order_by_clauses(merged.c.sort_value, nullable, sort_order, merged.c.id)
             )
 
-        # Apply sorting
-        if sort_by == "due_date":
-            if sort_order == "desc":
-                statement = statement.order_by(Task.due_date.desc())
-            else:
-                statement = statement.order_by(Task.due_date.asc())
-        elif sort_by == "priority":
-            if sort_order == "desc":
-                statement = statement.order_by(Task.priority.desc())
+        statement = select(Task).where(Task.user_id == bindparam("user_id"))
+        for name, clause in (
+            ("completed", Task.completed == bindparam("completed")),
+            ("priority_rank", Task.priority_rank == bindparam("priority_rank")),
+            ("priority", Task.priority == bindparam("priority")),
+            ("min_priority", Task.priority_rank >= bindparam("min_priority")),
+            ("max_priority", Task.priority_rank <= bindparam("max_priority")),
+        ):
+            if name in names:
+                statement = statement.where(clause)
+
+        if "tags" in names:
+            # Exact tag matching through the normalized task_tags index,
+            # "all" requires every tag, "any" at least one of them
+            if archived:
+                patterns = [bindparam(name) for name in sorted(names) if name.startswith("archived_tag_")]
+                statement = statement.where(archived_tag_clause(patterns, "all" if "tag_count" in names else "any"))
             else:
-                statement = statement.order_by(Task.priority.asc())
-        elif sort_by == "created_at":
-            if sort_order == "desc":
-                statement = statement.order_by(Task.created_at.desc())
+                statement = statement.where(tag_filter_clause(
+                    bindparam("user_id"), bindparam("tags", expanding=True),
+                    bindparam("tag_count") if "tag_count" in names else None
+                ))
+
+        if "due_date_from" in names:
+            statement = statement.where(Task.due_date >= bindparam("due_date_from"))
+        if "due_date_to" in names:
+            statement = statement.where(Task.due_date <= bindparam("due_date_to"))
+
+        if "no_match" in names:
+            statement = statement.where(false())
+
+        rank = None
+        if "search" in names:
+            # Full-text index lookup (FTS5 / tsvector) with a relevance rank
+            if archived:
+                patterns = [bindparam(name) for name in sorted(names) if name.startswith("archived_term_")]
+                statement, rank = archived_search(statement, dialect, bindparam("search"), patterns)
             else:
-                statement = statement.order_by(Task.created_at.asc())
+                statement, rank = apply_search(statement, dialect, bindparam("search"))
 
-        tasks = db.exec(statement).all()
-        return [TaskRead.from_orm(task) for task in tasks]
+        if sort_by == RELEVANCE:
+            expression, nullable = rank, False
+        else:
+            expression, nullable, _ = sort_key(sort_by)
+        statement = statement.order_by(*order_by_clauses(expression, nullable, sort_order))
 
-    def update_task(self, db: Session, task_id: int, task_update: TaskUpdate, user_id: int) -> Optional[TaskRead]:
-        """Update a specific task for a user"""
-        statement = select(Task).where(Task.id == task_id, Task.user_id == user_id)
-        db_task = db.exec(statement).first()
+        if variant == "rows":
+            statement = statement.with_only_columns(*read_columns(fields))
+        elif variant == "page":
+            if "after_id" in names:
+                value = bindparam("after_value", type_=expression.type) if "after_value" in names else None
+                statement = statement.where(
+                    keyset_clause(expression, nullable, sort_order, value, bindparam("after_id"))
+                )
+            statement = statement.with_only_columns(*read_columns(fields), expression.label("sort_value"))
+            if "limit" in names:
+                statement = statement.limit(bindparam("limit"))
+        elif variant == "export":
+            statement = statement.with_only_columns(*[getattr(Task, field) for field in EXPORT_FIELDS])
+        elif variant == "export_part":
+            statement = statement.with_only_columns(
+                *[getattr(Task, field) for field in EXPORT_FIELDS], expression.label("sort_value")
+            ).order_by(None)
+        return on_archive(statement) if archived else statement
 
-        if not db_task:
-            return None
+    def _priority_rank(self, priority: str) -> int:
+        """Rank of a priority used as a range bound, rejecting unknown values"""
+        rank = rank_for_priority(priority)
+        if rank is None:
+            raise ValueError(
+                f"Unknown priority '{priority}', expected one of: {', '.join(PRIORITY_RANKS)}"
+            )
+        return rank
 
+    def update_task(self, db: Session, task_id: int, task_update: TaskUpdate, user_id: int) -> Optional[TaskRead]:
+        """
+        Update a specific task for a user.
+
+        Raises ValueError when the new parent is not one of the user's tasks
+        or lies inside the task's own subtree.
+        """
         # Update fields if they are provided
         update_data = task_update.model_dump(exclude_unset=True)
+        tags = None
+        if "tags" in update_data:
+            # Convert tags list to JSON string; task_tags is synced below
+            tags = normalize_tags(update_data["tags"])
+            update_data["tags"] = json.dumps(tags)
+        if "priority" in update_data:
+            # Core UPDATEs skip mapper events, so the rank is set here
+            update_data["priority_rank"] = rank_for_priority(update_data["priority"])
+        if "due_date" in update_data and "reminder_sent" not in update_data:
+            # A new due date re-arms the reminder (see reminder_scheduler)
+            update_data["reminder_sent"] = False
+        if update_data.keys() & {"due_date", "recurring", "recurrence_pattern"}:
+            # The series is anchored elsewhere now; the materializer starts it over
+            update_data["next_occurrence_at"] = None
+        update_data["updated_at"] = datetime.utcnow()
+        # Taken first: the version row lock orders this write among the user's others
+        update_data["change_seq"] = bump_task_version(db, user_id)
 
-        for field, value in update_data.items():
-            if field == 'tags' and isinstance(value, list):
-                # Convert tags list to JSON string
-                setattr(db_task, field, json.dumps(value))
-            else:
-                setattr(db_task, field, value)
+        moving = "parent_task_id" in update_data
+        before = None
+        if moving or "priority" in update_data:
+            # The old priority and completion decide which counter the task
+            # leaves, and what a moved subtree takes from its old ancestors
+            before = self._lock_task_state(db, task_id, user_id)
+            if before is None:
+                db.rollback()
+                return None
 
-        db_task.updated_at = datetime.utcnow()
+        if moving:
+            # Moving a task takes its whole subtree out of the old ancestors'
+            # rollups and into the new ones
+            problem = self._parent_problems(db, [task_id], update_data["parent_task_id"], user_id).get(task_id)
+            if problem:
+                db.rollback()
+                raise ValueError(problem)
+            detach_subtrees(db, [task_id])
+            row = self._update_returning(db, task_id, user_id, update_data)
+            attach_subtrees(db, [task_id])
+        elif before is None and update_data.get("completed") is not None:
+            row = self._update_completion(db, task_id, user_id, update_data)
+        else:
+            row = self._update_returning(db, task_id, user_id, update_data)
+            if row is not None and before is not None and row.completed != before.completed \
+                    and row.parent_task_id is not None:
+                add_to_ancestors(db, row.parent_task_id, 0, 1 if row.completed else -1)
+        if row is None:
+            db.rollback()
+            return None
 
-        db.add(db_task)
+        if before is not None:
+            move_counts(
+                db, user_id,
+                counter_key(before.priority_rank, before.completed),
+                counter_key(rank_for_priority(row.priority), row.completed)
+            )
+        if tags is not None:
+            sync_task_tags(db, task_id, user_id, tags)
         db.commit()
-        db.refresh(db_task)
-        return TaskRead.from_orm(db_task)
+        self.invalidate(user_id)
+        return TaskRead.model_construct(**task_record(row))
 
     def delete_task(self, db: Session, task_id: int, user_id: int) -> bool:
-        """Delete a specific task for a user"""
-        statement = select(Task).where(Task.id == task_id, Task.user_id == user_id)
-        db_task = db.exec(statement).first()
+        """
+        Delete a specific task for a user.
 
-        if not db_task:
-            return False
+        Its subtasks become top-level tasks, and the task's whole subtree
+        leaves the rollups of its ancestors. Archived tasks are deleted from
+        the archive.
+        """
+        change_seq = bump_task_version(db, user_id)
+        # Scoped to the user, so a foreign task id leaves its tags and children alone
+        db.execute(delete(TaskTag).where(TaskTag.task_id == task_id, TaskTag.user_id == user_id))
+        orphan_children(db, [task_id], user_id, change_seq)
+        statement = (
+            delete(Task)
+            .where(Task.id == task_id, Task.user_id == user_id)
+            .execution_options(synchronize_session="evaluate")
+        )
+        state = (
+            Task.parent_task_id, Task.completed, Task.subtask_count, Task.subtask_completed_count, Task.priority_rank
+        )
+        if db.get_bind().dialect.delete_returning:
+            row = db.execute(statement.returning(*state)).first()
+        else:
+            row = db.execute(select(*state).where(Task.id == task_id, Task.user_id == user_id)).first()
+            if row is not None:
+                db.execute(statement)
+
+        if row is None:
+            return self._delete_archived_task(db, task_id, user_id, change_seq)
 
-        db.delete(db_task)
+        parent_id, completed, total, done, priority_rank = row
+        if parent_id is not None:
+            add_to_ancestors(db, parent_id, -(1 + total), -(int(completed) + done))
+        apply_counter_deltas(db, user_id, {counter_key(priority_rank, completed): -1})
+        record_tombstones(db, user_id, [task_id], change_seq)
         db.commit()
+        self.invalidate(user_id)
+        return True
+
+    def _delete_archived_task(self, db: Session, task_id: int, user_id: int, change_seq: int) -> bool:
+        """Rest of delete_task for a task that is not in the tasks table"""
+        archived = (TaskArchive.id == task_id, TaskArchive.user_id == user_id)
+        row = db.execute(select(TaskArchive.priority_rank, TaskArchive.completed).where(*archived)).first()
+        if row is None:
+            db.rollback()
+            return False
+        db.execute(delete(TaskArchive).where(*archived))
+        apply_counter_deltas(db, user_id, {counter_key(*row): -1})
+        record_tombstones(db, user_id, [task_id], change_seq)
+        db.commit()
+        self.invalidate(user_id)
         return True
 
     def mark_complete(self, db: Session, task_id: int, user_id: int) -> Optional[TaskRead]:
         """Mark a task as complete"""
-        statement = select(Task).where(Task.id == task_id, Task.user_id == user_id)
-        db_task = db.exec(statement).first()
+        values = {"completed": True, "updated_at": datetime.utcnow(), "change_seq": bump_task_version(db, user_id)}
+        row = self._update_completion(db, task_id, user_id, values)
+        if row is None:
+            db.rollback()
+            return None
+
+        db.commit()
+        self.invalidate(user_id)
+        return TaskRead.model_construct(**task_record(row))
+
+    def _update_completion(self, db: Session, task_id: int, user_id: int, values: Dict[str, Any]) -> Optional[Tuple]:
+        """
+        _update_returning for writes that set completed.
+
+        The UPDATE first only matches the task if its completed value
+        differs, so a returned row means the value flipped and the counters
+        and ancestors' rollups are adjusted. Only when it matched nothing does
+        a second, unconditional UPDATE run.
+        """
+        completed = bool(values["completed"])
+        row = self._update_returning(db, task_id, user_id, values, only_if=Task.completed != completed)
+        if row is None:
+            return self._update_returning(db, task_id, user_id, values)
+        if row.parent_task_id is not None:
+            add_to_ancestors(db, row.parent_task_id, 0, 1 if completed else -1)
+        rank = rank_for_priority(row.priority)
+        move_counts(db, user_id, counter_key(rank, not completed), counter_key(rank, completed))
+        return row
 
-        if not db_task:
+    def _lock_task_state(self, db: Session, task_id: int, user_id: int):
+        """The task's priority_rank and completed, locked until commit; None if not the user's"""
+        return db.execute(
+            select(Task.priority_rank, Task.completed)
+            .where(Task.id == task_id, Task.user_id == user_id)
+            .with_for_update()
+        ).first()
+
+    def _update_returning(
+        self, db: Session, task_id: int, user_id: int, values: Dict[str, Any], only_if=None
+    ) -> Optional[Tuple]:
+        """
+        Update one of the user's tasks and return its READ_COLUMNS row.
+
+        A single UPDATE ... RETURNING where the dialect supports it (PostgreSQL,
+        SQLite 3.35+), otherwise UPDATE then SELECT in the same transaction.
+        Returns None when the user has no such task (or only_if excluded it).
+        """
+        statement = update(Task).where(Task.id == task_id, Task.user_id == user_id)
+        if only_if is not None:
+            statement = statement.where(only_if)
+        statement = (
+            statement
+            .values(**values)
+            .execution_options(synchronize_session="evaluate")
+        )
+        if db.get_bind().dialect.update_returning:
+            return db.execute(statement.returning(*READ_COLUMNS)).first()
+        if not db.execute(statement).rowcount:
             return None
+        return db.execute(select(*READ_COLUMNS).where(Task.id == task_id)).first()
 
-        db_task.completed = True
-        db_task.updated_at = datetime.utcnow()
+    def _parent_problems(
+        self, db: Session, task_ids: List[int], parent_id: Optional[int], user_id: int
+    ) -> Dict[int, str]:
+        """Why parent_id cannot become the parent of each of task_ids (absent when it can)"""
+        if parent_id is None:
+            return {}
+        if not self._owned_task_ids(db, {parent_id}, user_id):
+            return {task_id: "Parent task not found" for task_id in task_ids}
+        above_parent = set(ancestor_chains(db, [parent_id])[parent_id])
+        problems = {}
+        for task_id in task_ids:
+            if task_id == parent_id:
+                problems[task_id] = "A task cannot be its own parent"
+            elif task_id in above_parent:
+                problems[task_id] = "A task cannot be moved under one of its subtasks"
+        return problems
 
-        db.add(db_task)
+    def _completion_flips(self, db: Session, task_ids: List[int], completed: bool) -> List[int]:
+        """Subtasks among task_ids whose completed value a write of `completed` would change"""
+        return list(db.exec(
+            select(Task.id).where(
+                Task.id.in_(task_ids), Task.completed != completed, Task.parent_task_id.is_not(None)
+            )
+        ).all())
+
+    def bulk_create_tasks(
+        self, db: Session, tasks_data: List[TaskCreate], user_id: int, atomic: bool = True
+    ) -> TaskBulkResult:
+        """
+        Create many tasks with one multi-row INSERT in a single transaction.
+
+        Items whose parent task is not owned by the user are rejected. With
+        atomic=True any rejected item means nothing is written; otherwise the
+        valid items are created and the others reported as invalid.
+        """
+        parent_ids = {t.parent_task_id for t in tasks_data if t.parent_task_id is not None}
+        owned_parents = self._owned_task_ids(db, parent_ids, user_id)
+
+        results: List[Optional[TaskBulkItemResult]] = [None] * len(tasks_data)
+        rows, row_tags, positions = [], [], []
+        now = datetime.utcnow()
+        for index, task_data in enumerate(tasks_data):
+            if task_data.parent_task_id is not None and task_data.parent_task_id not in owned_parents:
+                results[index] = TaskBulkItemResult(index=index, status="invalid", detail="Parent task not found")
+                continue
+
+            tags = self._tags_from_input(task_data.tags)
+            rows.append({
+                "title": task_data.title,
+                "description": task_data.description,
+                "completed": task_data.completed,
+                "priority": task_data.priority,
+                # Bulk INSERTs skip mapper events, so the rank is set here
+                "priority_rank": rank_for_priority(task_data.priority),
+                "tags": json.dumps(tags),
+                "due_date": task_data.due_date,
+                "recurring": task_data.recurring,
+                "recurrence_pattern": task_data.recurrence_pattern,
+                "parent_task_id": task_data.parent_task_id,
+                "user_id": user_id,
+                "created_at": now,
+                "reminder_sent": False,
+            })
+            row_tags.append(tags)
+            positions.append(index)
+
+        if not rows or (atomic and len(rows) < len(tasks_data)):
+            db.rollback()
+            return self._bulk_result(results, committed=False)
+
+        change_seq = bump_task_version(db, user_id)
+        for row in rows:
+            row["change_seq"] = change_seq
+        task_ids = db.scalars(
+            insert(Task).returning(Task.id, sort_by_parameter_order=True), rows
+        ).all()
+        tag_rows = [
+            {"task_id": task_id, "tag": tag, "user_id": user_id}
+            for task_id, tags in zip(task_ids, row_tags)
+            for tag in tags
+        ]
+        if tag_rows:
+            db.execute(insert(TaskTag), tag_rows)
+        attach_subtrees(db, [task_id for task_id, row in zip(task_ids, rows) if row["parent_task_id"] is not None])
+        apply_counter_deltas(db, user_id, Counter(counter_key(row["priority_rank"], row["completed"]) for row in rows))
         db.commit()
-        db.refresh(db_task)
-        return TaskRead.from_orm(db_task)
+        self.invalidate(user_id)
+
+        created = self._tasks_by_id(db, task_ids, user_id)
+        for index, task_id in zip(positions, task_ids):
+            results[index] = TaskBulkItemResult(
+                index=index, id=task_id, status="created", task=created.get(task_id)
+            )
+        return self._bulk_result(results, committed=True)
+
+    def bulk_update_tasks(
+        self, db: Session, task_ids: List[int], task_update: TaskUpdate, user_id: int, atomic: bool = True
+    ) -> TaskBulkResult:
+        """Apply the same changes to many tasks with one UPDATE in a single transaction"""
+        update_data = task_update.model_dump(exclude_unset=True)
+        tags = None
+        if "tags" in update_data:
+            tags = normalize_tags(update_data["tags"])
+            update_data["tags"] = json.dumps(tags)
+        if "priority" in update_data:
+            # Bulk UPDATEs skip mapper events, so the rank is set here
+            update_data["priority_rank"] = rank_for_priority(update_data["priority"])
+        if "due_date" in update_data and "reminder_sent" not in update_data:
+            # A new due date re-arms the reminder (see reminder_scheduler)
+            update_data["reminder_sent"] = False
+        if update_data.keys() & {"due_date", "recurring", "recurrence_pattern"}:
+            # The series is anchored elsewhere now; the materializer starts it over
+            update_data["next_occurrence_at"] = None
+        update_data["updated_at"] = datetime.utcnow()
+
+        moving = "parent_task_id" in update_data
+        completed = update_data.get("completed")
+        recount = "priority" in update_data or completed is not None
+        problems = self._parent_problems(db, task_ids, update_data.get("parent_task_id"), user_id) if moving else {}
+
+        def invalid(task_id: int) -> Optional[str]:
+            return problems.get(task_id)
+
+        def write(ids: List[int], change_seq: int) -> None:
+            # Keep the ancestors' rollups in step: a move carries whole
+            # subtrees, a completion change only the tasks that flip
+            flips = []
+            before = key_counts(db, ids) if recount else None
+            if moving:
+                detach_subtrees(db, ids)
+            elif completed is not None:
+                flips = self._completion_flips(db, ids, completed)
+            db.execute(
+                update(Task)
+                .where(Task.user_id == user_id, Task.id.in_(ids))
+                .values(**update_data, change_seq=change_seq)
+                .execution_options(synchronize_session=False)
+            )
+            if moving:
+                attach_subtrees(db, ids)
+            elif flips:
+                adjust_completed(db, flips, 1 if completed else -1)
+            if recount:
+                apply_count_change(db, user_id, before, key_counts(db, ids))
+            if tags is not None:
+                delete_task_tags(db, ids)
+                tag_rows = [{"task_id": i, "tag": tag, "user_id": user_id} for i in ids for tag in tags]
+                if tag_rows:
+                    db.execute(insert(TaskTag), tag_rows)
+
+        return self._bulk_write(db, task_ids, user_id, atomic, "updated", write, invalid)
+
+    def bulk_complete_tasks(
+        self, db: Session, task_ids: List[int], user_id: int, atomic: bool = True
+    ) -> TaskBulkResult:
+        """Mark many tasks complete with one UPDATE in a single transaction"""
+        def write(ids: List[int], change_seq: int) -> None:
+            flips = self._completion_flips(db, ids, True)
+            before = key_counts(db, ids)
+            db.execute(
+                update(Task)
+                .where(Task.user_id == user_id, Task.id.in_(ids))
+                .values(completed=True, updated_at=datetime.utcnow(), change_seq=change_seq)
+                .execution_options(synchronize_session=False)
+            )
+            adjust_completed(db, flips, 1)
+            apply_count_change(db, user_id, before, key_counts(db, ids))
+
+        return self._bulk_write(db, task_ids, user_id, atomic, "completed", write)
+
+    def bulk_delete_tasks(
+        self, db: Session, task_ids: List[int], user_id: int, atomic: bool = True
+    ) -> TaskBulkResult:
+        """
+        Delete many tasks with one DELETE in a single transaction.
+
+        Surviving subtasks of deleted tasks become top-level tasks.
+        """
+        def write(ids: List[int], change_seq: int) -> None:
+            delete_task_tags(db, ids)
+            detach_subtrees(db, ids)
+            orphan_children(db, ids, user_id, change_seq)
+            apply_count_change(db, user_id, key_counts(db, ids), Counter())
+            db.execute(
+                delete(Task)
+                .where(Task.user_id == user_id, Task.id.in_(ids))
+                .execution_options(synchronize_session=False)
+            )
+            record_tombstones(db, user_id, ids, change_seq)
+
+        return self._bulk_write(db, task_ids, user_id, atomic, "deleted", write, return_tasks=False)
+
+    def _bulk_write(
+        self,
+        db: Session,
+        task_ids: List[int],
+        user_id: int,
+        atomic: bool,
+        status: str,
+        write: Callable[[List[int], int], None],
+        invalid: Optional[Callable[[int], Optional[str]]] = None,
+        return_tasks: bool = True
+    ) -> TaskBulkResult:
+        """
+        Shared flow of the id-based bulk operations.
+
+        Bumps the user's task version first (the write's change_seq),
+        resolves which ids the user owns (locking them on databases that
+        support FOR UPDATE), reports missing or invalid ones, then runs the
+        set-based write for the rest and commits once.
+        """
+        change_seq = bump_task_version(db, user_id)
+        owned = self._owned_task_ids(db, set(task_ids), user_id, lock=True)
+        results: List[Optional[TaskBulkItemResult]] = [None] * len(task_ids)
+        targets = []
+        for index, task_id in enumerate(task_ids):
+            problem = "Task not found" if task_id not in owned else (invalid(task_id) if invalid else None)
+            if problem:
+                status_name = "not_found" if task_id not in owned else "invalid"
+                results[index] = TaskBulkItemResult(index=index, id=task_id, status=status_name, detail=problem)
+            elif task_id not in targets:
+                targets.append(task_id)
+
+        if not targets or (atomic and any(results)):
+            db.rollback()
+            return self._bulk_result(results, committed=False, task_ids=task_ids)
+
+        write(targets, change_seq)
+        db.commit()
+        self.invalidate(user_id)
+
+        tasks = self._tasks_by_id(db, targets, user_id) if return_tasks else {}
+        for index, task_id in enumerate(task_ids):
+            if results[index] is None:
+                results[index] = TaskBulkItemResult(index=index, id=task_id, status=status, task=tasks.get(task_id))
+        return self._bulk_result(results, committed=True)
+
+    def _bulk_result(
+        self,
+        results: List[Optional[TaskBulkItemResult]],
+        committed: bool,
+        task_ids: Optional[List[int]] = None
+    ) -> TaskBulkResult:
+        """Fill in skipped items and count outcomes"""
+        for index, result in enumerate(results):
+            if result is None:
+                results[index] = TaskBulkItemResult(
+                    index=index,
+                    id=task_ids[index] if task_ids else None,
+                    status="skipped",
+                    detail="Not written because other items in the atomic batch failed"
+                )
+        failed = sum(1 for r in results if r.status in ("not_found", "invalid"))
+        succeeded = sum(1 for r in results if r.status not in ("not_found", "invalid", "skipped"))
+        return TaskBulkResult(committed=committed, succeeded=succeeded, failed=failed, results=results)
+
+    def _owned_task_ids(self, db: Session, task_ids: Iterable[int], user_id: int, lock: bool = False) -> Set[int]:
+        """Subset of task_ids belonging to the user"""
+        task_ids = list(task_ids)
+        if not task_ids:
+            return set()
+        statement = select(Task.id).where(Task.user_id == user_id, Task.id.in_(task_ids))
+        if lock:
+            statement = statement.with_for_update()
+        return set(db.exec(statement).all())
+
+    def _tasks_by_id(self, db: Session, task_ids: List[int], user_id: int) -> Dict[int, TaskRead]:
+        """Load tasks in one query, keyed by id"""
+        if not task_ids:
+            return {}
+        statement = select(Task).where(Task.user_id == user_id, Task.id.in_(task_ids))
+        return {task.id: TaskRead.from_orm(task) for task in db.exec(statement).all()}
+
+    def _tags_from_input(self, tags) -> List[str]:
+        """Normalize tags given as a list or as a JSON string"""
+        if tags is not None and isinstance(tags, list):
+            return normalize_tags(tags)
+        return parse_tags(tags)
 
     def get_due_soon_tasks(self, db: Session, user_id: int, days_ahead: int = 3) -> List[TaskRead]:
         """Get tasks that are due soon"""
+        tasks = db.exec(self._due_soon_statement(user_id, days_ahead)).all()
+        return [TaskRead.from_orm(task) for task in tasks]
+
+    def get_due_soon_task_rows(
+        self, db: Session, user_id: int, days_ahead: int = 3, fields: Optional[Tuple[str, ...]] = None
+    ) -> List[Tuple]:
+        """
+        READ_COLUMNS (or read_columns(fields)) tuples of the tasks that are due soon.
+
+        When cached, the due window is the one computed on the miss, i.e. at
+        most the cache TTL old.
+        """
+        def load():
+            statement = self._due_soon_statement(user_id, days_ahead).with_only_columns(*read_columns(fields))
+            return [tuple(row) for row in db.execute(statement)]
+
+        return self._cached(db, user_id, "due_soon", load, days_ahead=days_ahead, fields=fields)
+
+    def get_recurring_tasks(self, db: Session, user_id: int) -> List[TaskRead]:
+        """Get all recurring tasks for a user"""
+        tasks = db.exec(self._recurring_statement(user_id)).all()
+        return [TaskRead.from_orm(task) for task in tasks]
+
+    def get_recurring_task_rows(
+        self, db: Session, user_id: int, fields: Optional[Tuple[str, ...]] = None
+    ) -> List[Tuple]:
+        """READ_COLUMNS (or read_columns(fields)) tuples of the user's recurring tasks"""
+        def load():
+            statement = self._recurring_statement(user_id).with_only_columns(*read_columns(fields))
+            return [tuple(row) for row in db.execute(statement)]
+
+        return self._cached(db, user_id, "recurring", load, fields=fields)
+
+    def _due_soon_statement(self, user_id: int, days_ahead: int):
         due_date_limit = datetime.utcnow() + timedelta(days=days_ahead)
-        statement = select(Task).where(
+        return select(Task).where(
             Task.user_id == user_id,
             Task.completed == False,
             Task.due_date.is_not(None),
             Task.due_date <= due_date_limit
         ).order_by(Task.due_date.asc())
 
-        tasks = db.exec(statement).all()
-        return [TaskRead.from_orm(task) for task in tasks]
-
-    def get_recurring_tasks(self, db: Session, user_id: int) -> List[TaskRead]:
-        """Get all recurring tasks for a user"""
-        statement = select(Task).where(
+    def _recurring_statement(self, user_id: int):
+        return select(Task).where(
             Task.user_id == user_id,
             Task.recurring == True
         )
 
-        tasks = db.exec(statement).all()
-        return [TaskRead.from_orm(task) for task in tasks]
-
     def create_recurring_instance(self, db: Session, original_task_id: int, user_id: int) -> Optional[TaskRead]:
-        """Create a new instance of a recurring task"""
-        original_task = self.get_task(db, original_task_id, user_id)
-        if not original_task or not original_task.recurring:
+        """
+        Create the instance for the occurrence after a recurring task's due
+        date (see task_recurrence). Asking again returns the same instance.
+        """
+        template = db.execute(
+            select(*TEMPLATE_COLUMNS).where(Task.id == original_task_id, Task.user_id == user_id, *TEMPLATES)
+        ).first()
+        if template is None:
             return None
 
-        # Calculate next occurrence based on recurrence pattern
-        next_due_date = self._calculate_next_occurrence(original_task.due_date, original_task.recurrence_pattern)
-
-        # Create new task instance
-        # Need to convert tags back to list format for TaskCreate if they were converted to list by from_orm
-        original_task_tags = original_task.tags
-        if isinstance(original_task_tags, list):
-            # If tags were converted to list by from_orm, convert back to JSON string for storage
-            original_task_tags = json.dumps(original_task_tags)
-
-        new_task_data = TaskCreate(
-            title=original_task.title,
-            description=original_task.description,
-            completed=False,
-            priority=original_task.priority,
-            tags=original_task_tags,
-            due_date=next_due_date,
-            recurring=original_task.recurring,
-            recurrence_pattern=original_task.recurrence_pattern,
-            parent_task_id=original_task.id
-        )
-
-        return self.create_task(db, new_task_data, user_id)
+        next_due_date = self._calculate_next_occurrence(template.due_date, template.recurrence_pattern)
+        # An old instance may have been archived already
+        archived = db.execute(on_archive(select(*READ_COLUMNS).where(
+            Task.user_id == user_id, Task.series_id == template.id, Task.occurrence_date == next_due_date
+        ))).first()
+        if archived is not None:
+            return TaskRead.model_construct(**task_record(archived))
+        if insert_instances(db, [(template, next_due_date)]):
+            db.commit()
+            self.invalidate(user_id)
+        else:
+            # Already there: drop the version bump
+            db.rollback()
+        instance = db.exec(
+            select(Task).where(Task.series_id == template.id, Task.occurrence_date == next_due_date)
+        ).first()
+        return TaskRead.from_orm(instance)
 
     def _calculate_next_occurrence(self, current_date: datetime, pattern: str) -> datetime:
-        """Calculate the next occurrence based on the recurrence pattern"""
-        if pattern == "daily":
-            return current_date + timedelta(days=1)
-        elif pattern == "weekly":
-            return current_date + timedelta(weeks=1)
-        elif pattern == "monthly":
-            # Simple month addition - in production, consider month-end edge cases
-            if current_date.month == 12:
-                return current_date.replace(year=current_date.year + 1, month=1)
-            else:
-                return current_date.replace(month=current_date.month + 1)
-        elif pattern == "yearly":
-            return current_date.replace(year=current_date.year + 1)
-        else:
-            # Default to daily if pattern is unknown
-            return current_date + timedelta(days=1)
\ No newline at end of file
+        """Calculate the next occurrence based on the recurrence pattern, month ends included"""
+        return occurrence(current_date, pattern, 1)
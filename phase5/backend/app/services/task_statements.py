@@ -0,0 +1,84 @@
+from typing import Any, Callable, Dict, Hashable
+from collections import OrderedDict
+import threading
+from sqlalchemy import event
+from sqlalchemy.engine.interfaces import CacheStats
+
+
+class StatementTemplates:
+    """
+    Bounded LRU of built SELECTs keyed by their shape.
+
+    The list statements take every filter value as a bind parameter, so
+    one statement object serves every request with the same shape (which
+    filters are set, how many tags or search terms, the sort, the selected
+    columns). Reusing the object skips building it, and SQLAlchemy memoizes
+    its cache key, which finds the compiled SQL in the engine's compiled
+    cache without walking the statement.
+    """
+
+    def __init__(self, max_entries: int = 512):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, shape: Hashable, build: Callable[[], Any]) -> Any:
+        with self._lock:
+            statement = self._entries.get(shape)
+            if statement is not None:
+                self._entries.move_to_end(shape)
+                self.hits += 1
+                return statement
+            self.misses += 1
+        # Built outside the lock; a concurrent build of the same shape is harmless
+        statement = build()
+        with self._lock:
+            self._entries[shape] = statement
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return statement
+
+    def stats(self) -> Dict[str, Any]:
+        return {"entries": len(self._entries), "max_entries": self.max_entries, "hits": self.hits, "misses": self.misses}
+
+
+class CompiledCacheStats:
+    """
+    Counts how SQLAlchemy's compiled cache served each statement executed
+    on the tracked engines: hits, misses (compiled now), and statements it
+    cannot cache (text, DDL, uncacheable constructs).
+    """
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.uncached = 0
+
+    def track(self, target) -> None:
+        """Count executions on an engine, or on every engine when given the Engine class"""
+        event.listen(target, "after_cursor_execute", self._after_execute)
+
+    def _after_execute(self, connection, cursor, statement, parameters, context, executemany) -> None:
+        outcome = getattr(context, "cache_hit", None)
+        if outcome is CacheStats.CACHE_HIT:
+            self.hits += 1
+        elif outcome is CacheStats.CACHE_MISS:
+            self.misses += 1
+        elif outcome is not None:
+            self.uncached += 1
+
+    def stats(self) -> Dict[str, Any]:
+        cached = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "uncached": self.uncached,
+            "hit_ratio": round(self.hits / cached, 4) if cached else None,
+        }
+
+
+# Shared by every TaskService in the process
+list_statements = StatementTemplates()
+compiled_cache_stats = CompiledCacheStats()
@@ -0,0 +1,97 @@
+from typing import Iterable, List, Optional
+from sqlmodel import Session, select
+from sqlalchemy import delete, func, insert
+from shared.models.task import Task, TaskTag
+import json
+
+
+def normalize_tags(tags: Optional[Iterable[str]]) -> List[str]:
+    """Strip whitespace, drop empty values and de-duplicate while keeping order"""
+    normalized = []
+    for tag in tags or []:
+        if not isinstance(tag, str):
+            continue
+        tag = tag.strip()
+        if tag and tag not in normalized:
+            normalized.append(tag)
+    return normalized
+
+
+def parse_tags(tags_json: Optional[str]) -> List[str]:
+    """Decode the JSON tags column, tolerating legacy or malformed values"""
+    if isinstance(tags_json, list):
+        return normalize_tags(tags_json)
+    try:
+        return normalize_tags(json.loads(tags_json or '[]'))
+    except (TypeError, ValueError):
+        return []
+
+
+def sync_task_tags(db: Session, task_id: int, user_id: int, tags: List[str]) -> None:
+    """Replace the task_tags rows of a task with the given tags (caller commits)"""
+    db.execute(delete(TaskTag).where(TaskTag.task_id == task_id))
+    if tags:
+        db.execute(
+            insert(TaskTag),
+            [{"task_id": task_id, "tag": tag, "user_id": user_id} for tag in tags]
+        )
+
+
+def delete_task_tags(db: Session, task_ids: List[int]) -> None:
+    """Remove the task_tags rows of tasks that are about to be deleted"""
+    if task_ids:
+        db.execute(delete(TaskTag).where(TaskTag.task_id.in_(task_ids)))
+
+
+def tag_filter_clause(user_id, tags, match_count=None):
+    """
+    Build an indexed semi-join restricting tasks to tags.
+
+    Answered from ix_task_tags_user_tag_task alone: tasks carrying at least
+    one of the tags, or with match_count those carrying that many of them
+    ("all", for distinct tags). The list statements pass bind parameters
+    (tags expanding), so every tag list shares one statement.
+    """
+    matching = select(TaskTag.task_id).where(
+        TaskTag.user_id == user_id,
+        TaskTag.tag.in_(tags)
+    )
+    if match_count is not None:
+        matching = matching.group_by(TaskTag.task_id).having(func.count() == match_count)
+    return Task.id.in_(matching)
+
+
+def backfill_task_tags(db: Session, batch_size: int = 1000) -> int:
+    """
+    Rebuild task_tags from the JSON tags column of every task.
+
+    Walks the tasks table in id order one batch at a time, committing after
+    each batch, so it can run against a live database. Returns the number of
+    tasks processed.
+    """
+    processed = 0
+    last_id = 0
+    while True:
+        rows = db.exec(
+            select(Task.id, Task.user_id, Task.tags)
+            .where(Task.id > last_id)
+            .order_by(Task.id)
+            .limit(batch_size)
+        ).all()
+        if not rows:
+            break
+
+        task_ids = [row[0] for row in rows]
+        db.execute(delete(TaskTag).where(TaskTag.task_id.in_(task_ids)))
+        tag_rows = [
+            {"task_id": task_id, "tag": tag, "user_id": user_id}
+            for task_id, user_id, tags_json in rows
+            for tag in parse_tags(tags_json)
+        ]
+        if tag_rows:
+            db.execute(insert(TaskTag), tag_rows)
+        db.commit()
+
+        processed += len(rows)
+        last_id = task_ids[-1]
+    return processed
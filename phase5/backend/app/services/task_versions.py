@@ -0,0 +1,113 @@
+from typing import Dict, Iterable, Optional, Tuple
+from datetime import datetime
+from sqlmodel import Session
+from sqlalchemy import select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from shared.models.task import Task, UserTaskVersion
+
+
+class UserMovedError(Exception):
+    """
+    Raised by a task write for a user whose tasks are being moved to another
+    shard (see sharding). The write must be rolled back; a retry after the
+    user's shard is looked up again goes to the new one.
+    """
+
+    def __init__(self, user_id: int):
+        super().__init__(f"Tasks of user {user_id} are being moved to another database, retry shortly")
+        self.user_id = user_id
+
+
+def bump_task_version(db: Session, user_id: int) -> int:
+    """
+    Increment the user's task version inside the caller's transaction.
+
+    Called first by every task write, so the version moves exactly when the
+    user's data does. The new version, which is returned, is the write's
+    change_seq: the row lock it takes orders the user's writes, so change
+    sequences are committed in increasing order. Raises UserMovedError when
+    the user is being moved off this database.
+    """
+    now = datetime.utcnow()
+    dialect = db.get_bind().dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        dialect_insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+        statement = dialect_insert(UserTaskVersion).values(user_id=user_id, version=1, updated_at=now)
+        statement = statement.on_conflict_do_update(
+            index_elements=[UserTaskVersion.user_id],
+            set_={"version": UserTaskVersion.version + 1, "updated_at": now},
+        ).returning(UserTaskVersion.version, UserTaskVersion.moved_at)
+        version, moved_at = db.execute(statement).one()
+        if moved_at is not None:
+            raise UserMovedError(user_id)
+        return version
+
+    updated = db.execute(
+        update(UserTaskVersion)
+        .where(UserTaskVersion.user_id == user_id)
+        .values(version=UserTaskVersion.version + 1, updated_at=now)
+    ).rowcount
+    if not updated:
+        db.add(UserTaskVersion(user_id=user_id, version=1, updated_at=now))
+        db.flush()
+    version, moved_at = db.execute(
+        select(UserTaskVersion.version, UserTaskVersion.moved_at).where(UserTaskVersion.user_id == user_id)
+    ).one()
+    if moved_at is not None:
+        raise UserMovedError(user_id)
+    return version
+
+
+def bump_task_versions(db: Session, user_ids: Iterable[int]) -> Dict[int, int]:
+    """
+    Increment several users' task versions, for writes that span users (the
+    reminder scheduler, the recurrence materializer). One executemany upsert
+    on PostgreSQL and SQLite. Users are locked in id order, so two such
+    writes cannot deadlock each other. Returns the new version per user;
+    raises UserMovedError when one of them is being moved off this database.
+    """
+    user_ids = sorted(set(user_ids))
+    if not user_ids:
+        return {}
+    now = datetime.utcnow()
+    dialect = db.get_bind().dialect.name
+    if dialect not in ("postgresql", "sqlite"):
+        return {user_id: bump_task_version(db, user_id) for user_id in user_ids}
+
+    dialect_insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+    statement = dialect_insert(UserTaskVersion)
+    statement = statement.on_conflict_do_update(
+        index_elements=[UserTaskVersion.user_id],
+        set_={"version": UserTaskVersion.version + 1, "updated_at": statement.excluded.updated_at},
+    ).returning(
+        UserTaskVersion.user_id, UserTaskVersion.version, UserTaskVersion.moved_at, sort_by_parameter_order=True
+    )
+    rows = db.execute(statement, [{"user_id": user_id, "version": 1, "updated_at": now} for user_id in user_ids])
+    versions = {}
+    for user_id, version, moved_at in rows:
+        if moved_at is not None:
+            raise UserMovedError(user_id)
+        versions[user_id] = version
+    return versions
+
+
+def owner_change_seq():
+    """
+    The task owner's current version, for set-based writes over several
+    users' tasks: SET change_seq = owner_change_seq(), after their versions
+    were bumped in the same transaction.
+    """
+    return (
+        select(UserTaskVersion.version)
+        .where(UserTaskVersion.user_id == Task.user_id)
+        .scalar_subquery()
+    )
+
+
+def get_task_version(db: Session, user_id: int) -> Tuple[int, Optional[datetime]]:
+    """The user's current (version, time of last change); (0, None) before any write"""
+    row = db.execute(
+        select(UserTaskVersion.version, UserTaskVersion.updated_at)
+        .where(UserTaskVersion.user_id == user_id)
+    ).first()
+    return (row.version, row.updated_at) if row else (0, None)
@@ -0,0 +1,199 @@
+from typing import Dict, Iterable, List, Optional, Tuple
+from bisect import bisect
+from datetime import datetime
+import asyncio
+import hashlib
+import time
+from sqlalchemy import insert, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.ext.asyncio import AsyncEngine
+from shared.models.task import UserTaskVersion
+from shared.models.user import UserShard
+from .read_replicas import ReplicaPool
+
+
+# The shard on DATABASE_URL, which also holds users and the shard directory
+DEFAULT_SHARD = "default"
+
+
+def parse_shard_urls(value: str) -> List[Tuple[str, str]]:
+    """(name, url) pairs from "name=url,name=url" (DATABASE_SHARD_URLS)"""
+    shards = []
+    for item in value.split(","):
+        if not item.strip():
+            continue
+        name, separator, url = item.partition("=")
+        name, url = name.strip(), url.strip()
+        if not separator or not name or not url:
+            raise ValueError(f"Expected name=url in DATABASE_SHARD_URLS, got '{item.strip()}'")
+        if name == DEFAULT_SHARD or name in dict(shards):
+            raise ValueError(f"Duplicate shard name '{name}' in DATABASE_SHARD_URLS")
+        shards.append((name, url))
+    return shards
+
+
+class Shard:
+    """One database holding the tasks of a share of the users, with its read replicas"""
+
+    def __init__(self, name: str, pool: ReplicaPool):
+        self.name = name
+        self.pool = pool
+
+    @property
+    def engine(self) -> Engine:
+        return self.pool.primary
+
+    @property
+    def async_engine(self) -> AsyncEngine:
+        return self.pool.primary_async
+
+
+def _hash(key: str) -> int:
+    return int.from_bytes(hashlib.sha1(key.encode()).digest()[:8], "big")
+
+
+class HashRing:
+    """
+    Consistent hashing of user ids onto shard names. Each shard owns
+    points_per_shard points on the ring, so adding a shard takes about
+    1/N of the users, all from the existing shards to the new one.
+    """
+
+    def __init__(self, names: Iterable[str], points_per_shard: int = 64):
+        self._points = sorted((_hash(f"{name}#{point}"), name) for name in names for point in range(points_per_shard))
+        self._keys = [key for key, _ in self._points]
+
+    def shard_name(self, user_id: int) -> str:
+        return self._points[bisect(self._keys, _hash(str(user_id))) % len(self._points)][1]
+
+
+class ShardMap:
+    """
+    Routes every user to the shard holding their tasks.
+
+    The user_shards directory on the default shard is authoritative, so
+    the rebalancer can move single users. A user without a row is placed on
+    first use: on the default shard when it already has task data for them
+    (written before sharding), otherwise where the hash ring puts them.
+    Lookups are cached per process for directory_ttl seconds; the
+    rebalancer keeps a moved user's old copy readable for longer than that,
+    and refuses writes to it (UserMovedError), after which the caller
+    forgets the cached entry.
+
+    With only the default shard nothing is looked up.
+    """
+
+    def __init__(self, shards: List[Shard], directory_ttl: float = 30.0):
+        self.shards: Dict[str, Shard] = {shard.name: shard for shard in shards}
+        self.default = self.shards[DEFAULT_SHARD]
+        self.ring = HashRing(self.shards)
+        self.directory_ttl = directory_ttl
+        self._cache: Dict[int, Tuple[Shard, float]] = {}
+
+    @property
+    def directory(self) -> Engine:
+        return self.default.engine
+
+    @property
+    def sharded(self) -> bool:
+        return len(self.shards) > 1
+
+    def cached(self, user_id: int) -> Optional[Shard]:
+        """The user's shard when known without a lookup"""
+        if not self.sharded:
+            return self.default
+        entry = self._cache.get(user_id)
+        if entry is None:
+            return None
+        if entry[1] <= time.monotonic():
+            self._cache.pop(user_id, None)
+            return None
+        return entry[0]
+
+    def forget(self, user_id: int) -> None:
+        self._cache.pop(user_id, None)
+
+    def shard_for(self, user_id: int) -> Shard:
+        """The user's shard; blocking, as a cache miss reads the directory (and may place the user)"""
+        shard = self.cached(user_id)
+        if shard is not None:
+            return shard
+        with self.directory.connect() as connection:
+            name = connection.execute(select(UserShard.shard).where(UserShard.user_id == user_id)).scalar()
+            if name is None:
+                name = self._place(connection, user_id)
+        shard = self.shards.get(name)
+        if shard is None:
+            raise LookupError(f"User {user_id} is on shard '{name}', which is not configured")
+        self._cache[user_id] = (shard, time.monotonic() + self.directory_ttl)
+        return shard
+
+    async def shard_for_async(self, user_id: int) -> Shard:
+        """shard_for with the directory read off the event loop"""
+        return self.cached(user_id) or await asyncio.to_thread(self.shard_for, user_id)
+
+    def placed_on(self, connection: Connection, user_ids: List[int]) -> Dict[int, str]:
+        """Directory shard of each user, the default shard for users without a row"""
+        rows = dict(connection.execute(
+            select(UserShard.user_id, UserShard.shard).where(UserShard.user_id.in_(user_ids))
+        ).all())
+        return {user_id: rows.get(user_id, DEFAULT_SHARD) for user_id in user_ids}
+
+    def _place(self, connection: Connection, user_id: int) -> str:
+        # The directory is on the default shard, so one connection sees both
+        known = connection.execute(
+            select(UserTaskVersion.user_id).where(UserTaskVersion.user_id == user_id)
+        ).first()
+        name = DEFAULT_SHARD if known else self.ring.shard_name(user_id)
+        write_directory(connection, {user_id: name}, overwrite=False)
+        connection.commit()
+        # A concurrent placement may have won
+        return connection.execute(select(UserShard.shard).where(UserShard.user_id == user_id)).scalar_one()
+
+    def assign(self, placements: Dict[int, str]) -> None:
+        """Record users as living on the given shards (the last step of a move)"""
+        if not placements:
+            return
+        with self.directory.begin() as connection:
+            write_directory(connection, placements, overwrite=True)
+        for user_id in placements:
+            self.forget(user_id)
+
+    def sync_engine(self, async_engine: AsyncEngine) -> Engine:
+        """The blocking engine of the database behind async_engine (a shard or one of its replicas)"""
+        for shard in self.shards.values():
+            engines = [shard.async_engine, shard.pool.primary_reader] + [
+                replica.async_engine for replica in shard.pool.replicas
+            ]
+            if any(engine is async_engine for engine in engines):
+                return shard.pool.sync_engine(async_engine)
+        return self.default.engine
+
+
+def write_directory(connection: Connection, placements: Dict[int, str], overwrite: bool) -> None:
+    """Upsert user_shards rows; without overwrite existing rows are kept"""
+    now = datetime.utcnow()
+    rows = [{"user_id": user_id, "shard": name, "updated_at": now} for user_id, name in placements.items()]
+    dialect = connection.dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        dialect_insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+        statement = dialect_insert(UserShard)
+        if overwrite:
+            statement = statement.on_conflict_do_update(
+                index_elements=[UserShard.user_id],
+                set_={"shard": statement.excluded.shard, "updated_at": statement.excluded.updated_at},
+            )
+        else:
+            statement = statement.on_conflict_do_nothing(index_elements=[UserShard.user_id])
+        connection.execute(statement, rows)
+        return
+
+    for row in rows:
+        exists = connection.execute(select(UserShard.user_id).where(UserShard.user_id == row["user_id"])).first()
+        if exists and overwrite:
+            connection.execute(
+                update(UserShard).where(UserShard.user_id == row["user_id"]).values(shard=row["shard"], updated_at=now)
+            )
+        elif not exists:
+            connection.execute(insert(UserShard).values(**row))
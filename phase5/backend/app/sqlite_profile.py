@@ -0,0 +1,196 @@
+from typing import Any, Callable, Dict, List, Optional
+from concurrent.futures import Future
+import asyncio
+import queue
+import threading
+from sqlalchemy import event
+from sqlalchemy.engine import Engine, make_url
+from sqlmodel import Session
+
+
+def is_sqlite_file(url: str) -> bool:
+    """True for SQLite databases stored in a file, the only ones the profile applies to"""
+    parsed = make_url(url)
+    return (
+        parsed.get_backend_name() == "sqlite"
+        and parsed.database not in (None, "", ":memory:")
+        and parsed.query.get("mode") != "memory"
+    )
+
+
+def sqlite_pragmas(
+    mmap_size: int = 256 * 1024 * 1024,
+    cache_size_kib: int = 64 * 1024,
+    busy_timeout_ms: int = 5000,
+    read_only: bool = False
+) -> List[str]:
+    """
+    PRAGMAs for a connection of the production profile. WAL lets readers
+    run alongside the writer; with it synchronous=NORMAL only syncs at
+    checkpoints, so a commit is durable against crashes of the app but may
+    be lost on power failure.
+    """
+    pragmas = [
+        "PRAGMA journal_mode=WAL",
+        "PRAGMA synchronous=NORMAL",
+        f"PRAGMA busy_timeout={int(busy_timeout_ms)}",
+        # Negative sizes are KiB rather than pages
+        f"PRAGMA cache_size=-{int(cache_size_kib)}",
+        f"PRAGMA mmap_size={int(mmap_size)}",
+    ]
+    if read_only:
+        pragmas.append("PRAGMA query_only=ON")
+    return pragmas
+
+
+def apply_sqlite_profile(engine: Engine, **options) -> None:
+    """
+    Run sqlite_pragmas(**options) on every new connection of engine (a sync
+    engine, or AsyncEngine.sync_engine for aiosqlite).
+    """
+    pragmas = sqlite_pragmas(**options)
+
+    @event.listens_for(engine, "connect")
+    def _connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma in pragmas:
+                cursor.execute(pragma)
+        finally:
+            cursor.close()
+
+
+class _Job:
+    __slots__ = ("function", "args", "future")
+
+    def __init__(self, function: Callable[..., Any], args: tuple):
+        self.function = function
+        self.args = args
+        self.future: Future = Future()
+
+
+class SQLiteWriter:
+    """
+    The single writer of a SQLite database, with group commit.
+
+    SQLite takes one writer at a time, so writers on separate connections
+    queue up on busy_timeout and fail with "database is locked" once it
+    runs out. Here every write is a job, function(session, *args), run on
+    one thread and one connection. The jobs queued when the thread gets to
+    them (up to max_batch) share a transaction, started with BEGIN IMMEDIATE
+    and committed once. Each job runs in its own SAVEPOINT: its
+    session.commit() releases the savepoint, and a job that raises is rolled
+    back alone while the rest of the batch commits.
+
+    A job's future resolves after the batch commit, so once awaited the
+    write is visible to every connection. Caches invalidated inside a job
+    should be invalidated again then, as readers may have refilled them
+    from the state before the commit.
+    """
+
+    def __init__(self, engine: Engine, max_batch: int = 64):
+        self.engine = engine
+        self.max_batch = max_batch
+        self._queue: "queue.Queue[Optional[_Job]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._closed = False
+        self.batches = 0
+        self.jobs = 0
+        self.failed_jobs = 0
+        self.failed_batches = 0
+        self.largest_batch = 0
+
+    def submit(self, function: Callable[..., Any], *args) -> Future:
+        """Queue function(session, *args); the future holds its result or exception"""
+        job = _Job(function, args)
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("SQLite writer is closed")
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="sqlite-writer", daemon=True)
+                self._thread.start()
+            self._queue.put(job)
+        return job.future
+
+    async def run(self, function: Callable[..., Any], *args) -> Any:
+        """submit() and wait for the batch holding the job to commit"""
+        return await asyncio.wrap_future(self.submit(function, *args))
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        """Finish the queued jobs and stop the thread"""
+        with self._lock:
+            self._closed = True
+            thread = self._thread
+            if thread is not None:
+                self._queue.put(None)
+        if thread is not None:
+            thread.join(timeout)
+
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            job = self._queue.get()
+            if job is None:
+                break
+            batch = [job]
+            while len(batch) < self.max_batch:
+                try:
+                    job = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if job is None:
+                    stopping = True
+                    break
+                batch.append(job)
+            self._commit(batch)
+
+    def _commit(self, batch: List[_Job]) -> None:
+        # Jobs whose caller gave up before they started are skipped
+        batch = [job for job in batch if job.future.set_running_or_notify_cancel()]
+        if not batch:
+            return
+        outcomes = []
+        try:
+            with self.engine.connect() as connection:
+                transaction = connection.begin()
+                # Take the write lock up front: a deferred transaction that
+                # reads first could not wait for it (SQLITE_BUSY_SNAPSHOT)
+                connection.exec_driver_sql("BEGIN IMMEDIATE")
+                for job in batch:
+                    with Session(
+                        bind=connection, join_transaction_mode="create_savepoint", expire_on_commit=False
+                    ) as session:
+                        try:
+                            outcomes.append((job, None, job.function(session, *job.args)))
+                        except Exception as e:
+                            session.rollback()
+                            outcomes.append((job, e, None))
+                transaction.commit()
+        except Exception as e:
+            # Nothing in the batch was committed
+            self.failed_batches += 1
+            for job in batch:
+                job.future.set_exception(e)
+            return
+
+        self.batches += 1
+        self.jobs += len(batch)
+        self.largest_batch = max(self.largest_batch, len(batch))
+        for job, error, result in outcomes:
+            if error is None:
+                job.future.set_result(result)
+            else:
+                self.failed_jobs += 1
+                job.future.set_exception(error)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "queued": self._queue.qsize(),
+            "batches": self.batches,
+            "jobs": self.jobs,
+            "failed_jobs": self.failed_jobs,
+            "failed_batches": self.failed_batches,
+            "largest_batch": self.largest_batch,
+            "average_batch": round(self.jobs / self.batches, 2) if self.batches else None,
+        }
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Load comparison of a sync task list route (blocking engine, Starlette
+threadpool) against the async one (AsyncSession + AsyncTaskService).
+
+Each request first waits --latency-ms in the database (pg_sleep on
+PostgreSQL, a sleeping SQL function on SQLite), standing in for slow
+queries or remote round trips, then runs the list query. The sync route
+holds one of the threadpool's 40 workers for that wait, so its throughput
+levels off at 40 / latency; the async route only holds a pooled
+connection. The app runs under uvicorn in a separate process.
+
+Run it against PostgreSQL, where asyncpg waits on the socket without any
+thread. aiosqlite gives every connection its own thread, so with many
+concurrent requests on few CPUs the SQLite numbers mostly measure thread
+hand-offs rather than the async stack.
+
+Usage: python phase5/backend/benchmarks/bench_async_routes.py
+           [--database-url postgresql://...] [--latency-ms 100] [--requests 2000]
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add project root to path
+ROOT = Path(__file__).resolve().parents[3]
+sys.path.insert(0, str(ROOT))
+
+import httpx
+from fastapi import FastAPI
+from sqlalchemy import event, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlmodel import SQLModel, Session, create_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
+from shared.models.user import User
+from shared.models.task import Task, TaskCreate, TaskTag, UserTaskVersion, UserTaskCounter, TaskTombstone, TaskArchive
+from phase5.backend.app.services.task_service import TaskService
+from phase5.backend.app.services.async_task_service import AsyncTaskService
+from phase5.backend.app.api.routes.tasks import task_list_response
+from phase5.backend.app.database import async_database_url
+
+POOL_SIZE = 100
+PORT = 8765
+
+
+def add_latency_function(engine) -> None:
+    # sleep_ms() runs inside the driver: in the calling threadpool worker
+    # for sqlite3, in aiosqlite's connection thread for the async engine
+    @event.listens_for(engine, "connect")
+    def _connect(dbapi_connection, connection_record):
+        dbapi_connection.create_function("sleep_ms", 1, lambda ms: time.sleep(ms / 1000))
+
+
+def create_app() -> FastAPI:
+    """uvicorn factory; the database URL and latency come from the environment"""
+    url = os.environ["BENCH_DATABASE_URL"]
+    latency_ms = int(os.environ["BENCH_LATENCY_MS"])
+    sqlite = make_url(url).get_backend_name() == "sqlite"
+
+    sync_engine = create_engine(
+        url, pool_size=POOL_SIZE, max_overflow=0,
+        connect_args={"check_same_thread": False} if sqlite else {}
+    )
+    async_engine = create_async_engine(async_database_url(url), pool_size=POOL_SIZE, max_overflow=0)
+    if sqlite:
+        add_latency_function(sync_engine)
+        add_latency_function(async_engine.sync_engine)
+        wait = text("SELECT sleep_ms(:ms)").bindparams(ms=latency_ms)
+    else:
+        wait = text("SELECT pg_sleep(:s)").bindparams(s=latency_ms / 1000)
+    async_session = async_sessionmaker(async_engine, class_=AsyncSession, expire_on_commit=False)
+
+    service = TaskService()
+    async_service = AsyncTaskService()
+    app = FastAPI()
+
+    @app.get("/sync")
+    def sync_list():
+        with Session(sync_engine) as db:
+            db.execute(wait)
+            return task_list_response(service.get_task_rows(db, 1))
+
+    @app.get("/async")
+    async def async_list():
+        async with async_session() as db:
+            await (await db.connection()).execute(wait)
+            return task_list_response(await async_service.get_task_rows(db, 1))
+
+    return app
+
+
+def seed(url: str) -> None:
+    engine = create_engine(url)
+    SQLModel.metadata.create_all(engine, tables=[
+        User.__table__, Task.__table__, TaskTag.__table__, UserTaskVersion.__table__, UserTaskCounter.__table__,
+        TaskTombstone.__table__, TaskArchive.__table__
+    ])
+    with Session(engine) as db:
+        if not db.get(User, 1):
+            db.add(User(id=1, email="bench@example.com", hashed_password="x"))
+            db.commit()
+        TaskService().bulk_create_tasks(db, [TaskCreate(title=f"Task {i}") for i in range(20)], 1)
+
+
+async def load(client: httpx.AsyncClient, path: str, total: int, concurrency: int):
+    """Send total requests with at most concurrency in flight; returns (req/s, p50 ms, p95 ms, errors)"""
+    latencies = []
+    errors = 0
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        nonlocal errors
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                response = await client.get(path)
+                response.raise_for_status()
+            except httpx.HTTPError:
+                errors += 1
+                return
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(total)))
+    elapsed = time.perf_counter() - started
+    if not latencies:
+        return 0.0, 0.0, 0.0, errors
+    latencies.sort()
+    p95 = latencies[int(len(latencies) * 0.95)]
+    return len(latencies) / elapsed, statistics.median(latencies) * 1000, p95 * 1000, errors
+
+
+async def run(latency_ms: int, total: int) -> None:
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{PORT}", limits=limits, timeout=60) as client:
+        for _ in range(100):
+            try:
+                await client.get("/docs")
+                break
+            except httpx.TransportError:
+                await asyncio.sleep(0.1)
+
+        print(f"{total} requests per run, {latency_ms} ms database latency, "
+              f"sync ceiling ~{40 * 1000 // max(latency_ms, 1)} req/s")
+        print(f"{'concurrency':>11} {'route':>6} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'errors':>7}")
+        for concurrency in (20, 100, 200):
+            for path in ("/sync", "/async"):
+                await load(client, path, concurrency, concurrency)  # warm up the pools
+                rate, p50, p95, errors = await load(client, path, total, concurrency)
+                print(f"{concurrency:>11} {path[1:]:>6} {rate:>8.0f} {p50:>8.1f} {p95:>8.1f} {errors:>7}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--database-url", help="defaults to a temporary SQLite file")
+    parser.add_argument("--latency-ms", type=int, default=100)
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        url = args.database_url or f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        seed(url)
+        env = dict(
+            os.environ, BENCH_DATABASE_URL=url, BENCH_LATENCY_MS=str(args.latency_ms), PYTHONPATH=str(ROOT)
+        )
+        server = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "bench_async_routes:create_app", "--factory",
+             "--app-dir", str(Path(__file__).parent), "--port", str(PORT), "--log-level", "warning"],
+            env=env
+        )
+        try:
+            asyncio.run(run(args.latency_ms, args.requests))
+        finally:
+            server.terminate()
+            server.wait()
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Mixed read/write load on a SQLite file through AsyncTaskService, with the
+default engines against the production profile (SQLITE_PRODUCTION_PROFILE:
+WAL and tuned PRAGMAs, writes through SQLiteWriter's group commit, reads on
+read-only connections).
+
+Each of --concurrency clients runs --ops operations for its own user:
+--write-ratio of them create or complete a task, the rest list the user's
+tasks. The read cache is off, so every read reaches the database. With the
+default engines, writers on separate connections wait on SQLite's lock
+(and fail with "database is locked" after the 5 s busy timeout), and
+rollback-journal readers wait for writers to commit.
+
+Usage: python phase5/backend/benchmarks/bench_sqlite_profile.py
+           [--concurrency 32] [--ops 200] [--write-ratio 0.2] [--tasks 200]
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).resolve().parents[3]))
+
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel import SQLModel, Session, create_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
+from shared.models.user import User
+from shared.models.task import Task, TaskCreate, TaskTag, UserTaskVersion, UserTaskCounter, TaskTombstone, TaskArchive
+from phase5.backend.app.database import async_database_url
+from phase5.backend.app.read_replicas import ReplicaPool
+from phase5.backend.app.services.async_task_service import AsyncTaskService
+from phase5.backend.app.services.task_service import TaskService
+from phase5.backend.app.sqlite_profile import SQLiteWriter, apply_sqlite_profile
+
+POOL_SIZE = 40
+
+
+def make_pool(url: str, profile: bool) -> ReplicaPool:
+    engine = create_engine(url)
+    async_engine = create_async_engine(async_database_url(url), pool_size=POOL_SIZE, max_overflow=0)
+    if not profile:
+        return ReplicaPool(engine, async_engine, [])
+    apply_sqlite_profile(engine)
+    apply_sqlite_profile(async_engine.sync_engine)
+    reader = create_async_engine(async_database_url(url), pool_size=POOL_SIZE, max_overflow=0)
+    apply_sqlite_profile(reader.sync_engine, read_only=True)
+    return ReplicaPool(engine, async_engine, [], primary_reader=reader, writer=SQLiteWriter(engine))
+
+
+def seed(pool: ReplicaPool, users: int, tasks: int) -> None:
+    SQLModel.metadata.create_all(pool.primary, tables=[
+        User.__table__, Task.__table__, TaskTag.__table__, UserTaskVersion.__table__, UserTaskCounter.__table__,
+        TaskTombstone.__table__, TaskArchive.__table__
+    ])
+    service = TaskService()
+    with Session(pool.primary) as db:
+        for user_id in range(1, users + 1):
+            db.add(User(id=user_id, email=f"bench{user_id}@example.com", hashed_password="x"))
+        db.commit()
+        for user_id in range(1, users + 1):
+            service.bulk_create_tasks(db, [TaskCreate(title=f"Task {i}") for i in range(tasks)], user_id)
+
+
+async def client(pool: ReplicaPool, service: AsyncTaskService, user_id: int, ops: int, write_ratio: float, timings):
+    rng = random.Random(user_id)
+    created = []
+    for _ in range(ops):
+        write = rng.random() < write_ratio
+        started = time.perf_counter()
+        try:
+            if write:
+                async with pool.write_session() as db:
+                    if created and rng.random() < 0.5:
+                        await service.mark_complete(db, created.pop(), user_id)
+                    else:
+                        created.append((await service.create_task(db, TaskCreate(title="new"), user_id)).id)
+            else:
+                async with AsyncSession(pool.read_engine(user_id)) as db:
+                    await service.get_task_rows(db, user_id)
+        except OperationalError:
+            timings["errors"] += 1
+            continue
+        timings["write" if write else "read"].append(time.perf_counter() - started)
+
+
+async def run(pool: ReplicaPool, args) -> dict:
+    service = AsyncTaskService()
+    timings = {"read": [], "write": [], "errors": 0}
+    started = time.perf_counter()
+    await asyncio.gather(*(
+        client(pool, service, user_id, args.ops, args.write_ratio, timings)
+        for user_id in range(1, args.concurrency + 1)
+    ))
+    timings["elapsed"] = time.perf_counter() - started
+    await pool.primary_async.dispose()
+    if pool.primary_reader is not pool.primary_async:
+        await pool.primary_reader.dispose()
+    return timings
+
+
+def percentile(values, fraction: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))] * 1000
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--ops", type=int, default=200, help="operations per client")
+    parser.add_argument("--write-ratio", type=float, default=0.2)
+    parser.add_argument("--tasks", type=int, default=200, help="tasks per user before the run")
+    args = parser.parse_args()
+
+    print(f"{args.concurrency} clients x {args.ops} ops, {args.write_ratio:.0%} writes, {args.tasks} tasks per user")
+    print(f"{'engines':>8} {'ops/s':>8} {'read p50':>9} {'read p95':>9} {'write p50':>10} {'write p95':>10} "
+          f"{'errors':>7}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, profile in (("default", False), ("profile", True)):
+            pool = make_pool(f"sqlite:///{os.path.join(tmp, name + '.db')}", profile)
+            seed(pool, args.concurrency, args.tasks)
+            timings = asyncio.run(run(pool, args))
+            if pool.writer:
+                pool.writer.close()
+            pool.primary.dispose()
+            done = len(timings["read"]) + len(timings["write"])
+            print(
+                f"{name:>8} {done / timings['elapsed']:>8.0f} "
+                f"{statistics.median(timings['read']) * 1000 if timings['read'] else 0:>9.1f} "
+                f"{percentile(timings['read'], 0.95):>9.1f} "
+                f"{statistics.median(timings['write']) * 1000 if timings['write'] else 0:>10.1f} "
+                f"{percentile(timings['write'], 0.95):>10.1f} {timings['errors']:>7}"
+            )
+            if pool.writer:
+                stats = pool.writer.stats()
+                print(f"{'':>8} {stats['batches']} commits for {stats['jobs']} writes, "
+                      f"largest batch {stats['largest_batch']}")
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark of the recurrence expansion behind GET /tasks/calendar:
+one series at a time with task_recurrence.occurrences (the fallback) against
+numpy arrays per pattern (used when numpy is installed).
+
+Usage: python phase5/backend/benchmarks/bench_task_calendar.py [series] [days] [repeats]
+"""
+
+import random
+import sys
+import time
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).resolve().parents[3]))
+
+from datetime import datetime, timedelta
+from phase5.backend.app.services import task_calendar
+from phase5.backend.app.services.task_calendar import expand_occurrences
+
+
+def best_of(repeats: int, run) -> float:
+    timings = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        run()
+        timings.append(time.perf_counter() - started)
+    return min(timings) * 1000
+
+
+if __name__ == "__main__":
+    series = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    days = int(sys.argv[2]) if len(sys.argv) > 2 else 365
+    repeats = int(sys.argv[3]) if len(sys.argv) > 3 else 20
+
+    rng = random.Random(1)
+    anchors = [datetime(2024, 1, 1) + timedelta(minutes=rng.randrange(2 * 365 * 24 * 60)) for _ in range(series)]
+    patterns = [rng.choice(["daily", "weekly", "weekly", "monthly", "monthly", "yearly"]) for _ in range(series)]
+    start = datetime(2026, 1, 1)
+    end = start + timedelta(days=days)
+
+    numpy = task_calendar.np
+    count = len(expand_occurrences(anchors, patterns, start, end)[0])
+    print(f"{series} series over {days} days: {count} occurrences")
+
+    if numpy is not None:
+        print(f"numpy arrays:      {best_of(repeats, lambda: expand_occurrences(anchors, patterns, start, end)):8.2f} ms")
+    else:
+        print("numpy arrays:      numpy not installed (pip install numpy)")
+    task_calendar.np = None
+    try:
+        print(f"series one by one: {best_of(repeats, lambda: expand_occurrences(anchors, patterns, start, end)):8.2f} ms")
+    finally:
+        task_calendar.np = numpy
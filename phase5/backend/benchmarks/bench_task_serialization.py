@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark of the task list read path: ORM objects + TaskRead.from_orm +
+response_model validation (before) against column tuples encoded straight to
+JSON (after), and the mobile list's sparse fieldset (?fields=id,title,
+completed,due_date,priority) with descriptions of [description length] chars.
+
+Usage: python phase5/backend/benchmarks/bench_task_serialization.py [tasks] [repeats] [description length]
+"""
+
+import sys
+import time
+from pathlib import Path
+from typing import List
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).resolve().parents[3]))
+
+from datetime import datetime, timedelta
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import insert
+from sqlalchemy.pool import StaticPool
+from sqlmodel import SQLModel, Session, create_engine
+from shared.models.user import User
+from shared.models.task import Task, TaskRead, TaskTag
+from phase5.backend.app.services.task_service import TaskService
+from phase5.backend.app.services.task_serialization import orjson, select_fields
+from phase5.backend.app.api.routes.tasks import task_list_response
+
+
+MOBILE_FIELDS = select_fields(["id", "title", "completed", "due_date", "priority"])
+
+
+def seed(engine, count: int, description_length: int) -> None:
+    now = datetime.utcnow()
+    with Session(engine) as db:
+        db.add(User(id=1, email="bench@example.com", hashed_password="x"))
+        db.commit()
+        db.execute(insert(Task), [
+            {
+                "title": f"Task {i}",
+                "description": "d" * description_length if i % 2 else None,
+                "priority": ("low", "medium", "high", "urgent")[i % 4],
+                "priority_rank": i % 4 + 1,
+                "tags": '["work", "home"]' if i % 3 else "[]",
+                "due_date": now + timedelta(hours=i),
+                "user_id": 1,
+                "created_at": now,
+            }
+            for i in range(count)
+        ])
+        db.commit()
+
+
+def build_app(engine) -> FastAPI:
+    service = TaskService()
+    app = FastAPI()
+
+    @app.get("/before", response_model=List[TaskRead])
+    def before():
+        with Session(engine) as db:
+            return service.get_tasks(db, 1)
+
+    @app.get("/after", response_model=List[TaskRead])
+    def after():
+        with Session(engine) as db:
+            return task_list_response(service.get_task_rows(db, 1))
+
+    @app.get("/sparse", response_model=List[TaskRead])
+    def sparse():
+        with Session(engine) as db:
+            rows = service.get_task_rows(db, 1, fields=MOBILE_FIELDS)
+            return task_list_response(rows, fields=MOBILE_FIELDS)
+
+    return app
+
+
+def measure(client: TestClient, path: str, count: int, repeats: int):
+    """Rows per second and response size in bytes"""
+    client.get(path)  # warm up statement caches
+    started = time.perf_counter()
+    for _ in range(repeats):
+        response = client.get(path)
+        assert len(response.json()) == count
+    return count * repeats / (time.perf_counter() - started), len(response.content)
+
+
+if __name__ == "__main__":
+    import warnings
+    warnings.filterwarnings("ignore")  # TaskRead.from_orm's list tags warn on serialization
+
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    description_length = int(sys.argv[3]) if len(sys.argv) > 3 else 40
+
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    SQLModel.metadata.create_all(engine, tables=[User.__table__, Task.__table__, TaskTag.__table__])
+    seed(engine, count, description_length)
+
+    client = TestClient(build_app(engine))
+    before, before_bytes = measure(client, "/before", count, repeats)
+    after, after_bytes = measure(client, "/after", count, repeats)
+    sparse, sparse_bytes = measure(client, "/sparse", count, repeats)
+
+    print(f"{count} tasks x {repeats} requests, encoder: {'orjson' if orjson else 'json'}")
+    print(f"before (from_orm + response_model): {before:>10.0f} rows/s {before_bytes:>11} bytes")
+    print(f"after  (column tuples -> JSON):     {after:>10.0f} rows/s {after_bytes:>11} bytes  ({after / before:.1f}x)")
+    print(f"sparse (?fields= mobile list):      {sparse:>10.0f} rows/s {sparse_bytes:>11} bytes  ({sparse / before:.1f}x)")
@@ -0,0 +1,75 @@
+"""Initial schema: users, tasks, task_tags and the task search index
+
+Databases created earlier with SQLModel.metadata.create_all() already have
+some or all of these tables, so each one is only created when missing and
+the revision can be applied to them as a baseline.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17 09:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from phase5.backend.app.services.task_search import install_task_search
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0001"
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    existing = set(sa.inspect(op.get_bind()).get_table_names())
+
+    if "users" not in existing:
+        op.create_table(
+            "users",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("email", sa.String(), nullable=False, unique=True),
+            sa.Column("hashed_password", sa.String(), nullable=False),
+            sa.Column("created_at", sa.DateTime(), nullable=False),
+        )
+
+    if "tasks" not in existing:
+        op.create_table(
+            "tasks",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("title", sa.String(), nullable=False),
+            sa.Column("description", sa.String(), nullable=True),
+            sa.Column("completed", sa.Boolean(), nullable=False),
+            sa.Column("priority", sa.String(), nullable=True),
+            sa.Column("tags", sa.String(), nullable=True),
+            sa.Column("due_date", sa.DateTime(), nullable=True),
+            sa.Column("recurring", sa.Boolean(), nullable=False),
+            sa.Column("recurrence_pattern", sa.String(), nullable=True),
+            sa.Column("parent_task_id", sa.Integer(), sa.ForeignKey("tasks.id"), nullable=True),
+            sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+            sa.Column("created_at", sa.DateTime(), nullable=False),
+            sa.Column("updated_at", sa.DateTime(), nullable=True),
+            sa.Column("reminder_sent", sa.Boolean(), nullable=False),
+        )
+
+    if "task_tags" not in existing:
+        op.create_table(
+            "task_tags",
+            sa.Column(
+                "task_id", sa.Integer(),
+                sa.ForeignKey("tasks.id", ondelete="CASCADE"), primary_key=True
+            ),
+            sa.Column("tag", sa.String(), primary_key=True),
+            sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+        )
+        op.create_index("ix_task_tags_user_tag_task", "task_tags", ["user_id", "tag", "task_id"])
+
+    install_task_search(op.get_bind())
+
+
+def downgrade() -> None:
+    op.drop_table("task_tags")
+    op.drop_table("tasks")
+    op.drop_table("users")
@@ -0,0 +1,58 @@
+"""Composite indexes for the task hot paths
+
+- (user_id, completed, due_date): status filters combined with due dates
+- (user_id, created_at, id): default list order and its keyset pagination
+- (user_id, priority, id): priority sort and filter
+- (user_id, due_date) WHERE completed = false AND due_date IS NOT NULL:
+  get_due_soon_tasks, which only ever reads open tasks with a due date
+- (parent_task_id): subtask lookups
+
+On PostgreSQL the indexes are built with CREATE INDEX CONCURRENTLY outside a
+transaction, so a live tasks table keeps accepting writes during the upgrade.
+If a concurrent build fails it leaves an INVALID index behind; drop it and
+run the upgrade again.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17 09:30:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0002"
+down_revision: Union[str, None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+INDEXES = [
+    ("ix_tasks_user_completed_due", ["user_id", "completed", "due_date"], {}),
+    ("ix_tasks_user_created", ["user_id", "created_at", "id"], {}),
+    ("ix_tasks_user_priority", ["user_id", "priority", "id"], {}),
+    ("ix_tasks_open_due", ["user_id", "due_date"], {
+        "postgresql_where": sa.text("completed = false AND due_date IS NOT NULL"),
+        "sqlite_where": sa.text("completed = 0 AND due_date IS NOT NULL"),
+    }),
+    ("ix_tasks_parent_task_id", ["parent_task_id"], {}),
+]
+
+
+def upgrade() -> None:
+    # CONCURRENTLY cannot run inside a transaction block
+    with op.get_context().autocommit_block():
+        for name, columns, kwargs in INDEXES:
+            op.create_index(
+                name, "tasks", columns,
+                if_not_exists=True, postgresql_concurrently=True, **kwargs
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, _, _ in reversed(INDEXES):
+            op.drop_index(name, table_name="tasks", if_exists=True, postgresql_concurrently=True)
@@ -0,0 +1,70 @@
+"""Integer priority_rank column backing priority sorting and range filters
+
+Adds tasks.priority_rank (low=1, medium=2, high=3, urgent=4), fills it for
+existing rows in id-range batches so no single statement holds locks on the
+whole table, then replaces the (user_id, priority, id) index with
+(user_id, priority_rank, id).
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17 11:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0003"
+down_revision: Union[str, None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 10000
+
+RANK_CASE = """
+    CASE priority
+        WHEN 'low' THEN 1
+        WHEN 'medium' THEN 2
+        WHEN 'high' THEN 3
+        WHEN 'urgent' THEN 4
+    END
+"""
+
+
+def upgrade() -> None:
+    op.add_column("tasks", sa.Column("priority_rank", sa.Integer(), nullable=True))
+
+    with op.get_context().autocommit_block():
+        bind = op.get_bind()
+        max_id = bind.execute(sa.text("SELECT COALESCE(MAX(id), 0) FROM tasks")).scalar()
+        for start in range(0, max_id, BATCH_SIZE):
+            bind.execute(
+                sa.text(f"UPDATE tasks SET priority_rank = {RANK_CASE} WHERE id > :start AND id <= :end"),
+                {"start": start, "end": start + BATCH_SIZE}
+            )
+
+        op.create_index(
+            "ix_tasks_user_priority_rank", "tasks", ["user_id", "priority_rank", "id"],
+            if_not_exists=True, postgresql_concurrently=True
+        )
+        op.drop_index(
+            "ix_tasks_user_priority", table_name="tasks",
+            if_exists=True, postgresql_concurrently=True
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_tasks_user_priority", "tasks", ["user_id", "priority", "id"],
+            if_not_exists=True, postgresql_concurrently=True
+        )
+        op.drop_index(
+            "ix_tasks_user_priority_rank", table_name="tasks",
+            if_exists=True, postgresql_concurrently=True
+        )
+    with op.batch_alter_table("tasks") as batch_op:
+        batch_op.drop_column("priority_rank")
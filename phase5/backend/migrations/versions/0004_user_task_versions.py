@@ -0,0 +1,37 @@
+"""Per-user task change version backing list ETags
+
+Adds user_task_versions, one row per user holding a counter that every
+task write increments in its own transaction. Users without a row are at
+version 0 until their next write.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17 13:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0004"
+down_revision: Union[str, None] = "0003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # create_tables() at app startup may already have created it
+    if not sa.inspect(op.get_bind()).has_table("user_task_versions"):
+        op.create_table(
+            "user_task_versions",
+            sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), primary_key=True),
+            sa.Column("version", sa.Integer(), nullable=False),
+            sa.Column("updated_at", sa.DateTime(), nullable=False),
+        )
+
+
+def downgrade() -> None:
+    op.drop_table("user_task_versions")
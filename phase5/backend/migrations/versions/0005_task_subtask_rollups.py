@@ -0,0 +1,63 @@
+"""Subtask rollup columns behind GET /tasks/{id}/tree
+
+Adds tasks.subtask_count and tasks.subtask_completed_count (all
+descendants, and the completed ones among them), then fills them for
+existing rows in id-range batches. Each batch walks the subtrees of its
+tasks with a recursive CTE. From then on TaskService adjusts the counts of
+the ancestors on every write.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17 15:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0005"
+down_revision: Union[str, None] = "0004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 10000
+
+# Same depth bound as task_hierarchy.MAX_DEPTH
+BACKFILL = """
+    WITH RECURSIVE subtree(root_id, id, completed, depth) AS (
+        SELECT id, id, completed, 0 FROM tasks WHERE id > :start AND id <= :end
+        UNION ALL
+        SELECT s.root_id, t.id, t.completed, s.depth + 1
+        FROM tasks t JOIN subtree s ON t.parent_task_id = s.id
+        WHERE s.depth < 100
+    ), rollup AS (
+        SELECT root_id,
+               COUNT(*) - 1 AS total,
+               SUM(CASE WHEN depth > 0 AND completed THEN 1 ELSE 0 END) AS done
+        FROM subtree GROUP BY root_id
+    )
+    UPDATE tasks SET
+        subtask_count = (SELECT total FROM rollup WHERE root_id = tasks.id),
+        subtask_completed_count = (SELECT done FROM rollup WHERE root_id = tasks.id)
+    WHERE id > :start AND id <= :end
+"""
+
+
+def upgrade() -> None:
+    op.add_column("tasks", sa.Column("subtask_count", sa.Integer(), nullable=False, server_default="0"))
+    op.add_column("tasks", sa.Column("subtask_completed_count", sa.Integer(), nullable=False, server_default="0"))
+
+    with op.get_context().autocommit_block():
+        bind = op.get_bind()
+        max_id = bind.execute(sa.text("SELECT COALESCE(MAX(id), 0) FROM tasks")).scalar()
+        for start in range(0, max_id, BATCH_SIZE):
+            bind.execute(sa.text(BACKFILL), {"start": start, "end": start + BATCH_SIZE})
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("tasks") as batch_op:
+        batch_op.drop_column("subtask_completed_count")
+        batch_op.drop_column("subtask_count")
@@ -0,0 +1,49 @@
+"""Per-user task counters behind GET /tasks/stats
+
+Adds user_task_counters, one row per (user, priority rank, completed)
+holding the number of matching tasks, and fills it from the existing
+tasks with one GROUP BY. TaskService adjusts the rows in the same
+transaction as every write.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-17 16:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0006"
+down_revision: Union[str, None] = "0005"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # create_tables() at app startup may already have created it
+    if not sa.inspect(op.get_bind()).has_table("user_task_counters"):
+        op.create_table(
+            "user_task_counters",
+            sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), primary_key=True),
+            sa.Column("priority_rank", sa.Integer(), primary_key=True),
+            sa.Column("completed", sa.Boolean(), primary_key=True),
+            sa.Column("task_count", sa.Integer(), nullable=False),
+        )
+
+    op.execute("DELETE FROM user_task_counters")
+    op.execute(
+        """
+        INSERT INTO user_task_counters (user_id, priority_rank, completed, task_count)
+        SELECT user_id, COALESCE(priority_rank, 0), completed, COUNT(*)
+        FROM tasks
+        GROUP BY user_id, COALESCE(priority_rank, 0), completed
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("user_task_counters")
@@ -0,0 +1,42 @@
+"""Due-date index for the reminder scheduler
+
+- (due_date, id) WHERE completed = false AND reminder_sent = false AND
+  due_date IS NOT NULL: the reminder scheduler reads the upcoming reminders
+  of all users in due-date order, in keyset chunks. ix_tasks_open_due leads
+  with user_id and cannot serve that order. Sent reminders leave the index,
+  so it stays as small as the backlog of unsent ones.
+
+Built with CREATE INDEX CONCURRENTLY on PostgreSQL, like 0002.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-17 17:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0007"
+down_revision: Union[str, None] = "0006"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # CONCURRENTLY cannot run inside a transaction block
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_tasks_reminder_due", "tasks", ["due_date", "id"],
+            if_not_exists=True, postgresql_concurrently=True,
+            postgresql_where=sa.text("completed = false AND reminder_sent = false AND due_date IS NOT NULL"),
+            sqlite_where=sa.text("completed = 0 AND reminder_sent = 0 AND due_date IS NOT NULL"),
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index("ix_tasks_reminder_due", table_name="tasks", if_exists=True, postgresql_concurrently=True)
@@ -0,0 +1,60 @@
+"""Recurring task series for the recurrence materializer
+
+Adds tasks.series_id and tasks.occurrence_date, set on the instances
+generated from a recurring task, with a unique index over the pair so
+every occurrence is generated at most once. Adds tasks.next_occurrence_at,
+the first occurrence of a recurring task not generated yet, and a partial
+index over it for the recurring tasks the materializer scans.
+
+The new columns start out NULL; the materializer fills in
+next_occurrence_at on its first pass over each series.
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-17 18:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0008"
+down_revision: Union[str, None] = "0007"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+INDEXES = [
+    ("ux_tasks_series_occurrence", ["series_id", "occurrence_date"], {"unique": True}),
+    ("ix_tasks_recurring_next", ["next_occurrence_at", "id"], {
+        "postgresql_where": sa.text("recurring = true AND series_id IS NULL"),
+        "sqlite_where": sa.text("recurring = 1 AND series_id IS NULL"),
+    }),
+]
+
+
+def upgrade() -> None:
+    op.add_column("tasks", sa.Column("series_id", sa.Integer(), nullable=True))
+    op.add_column("tasks", sa.Column("occurrence_date", sa.DateTime(), nullable=True))
+    op.add_column("tasks", sa.Column("next_occurrence_at", sa.DateTime(), nullable=True))
+
+    # CONCURRENTLY cannot run inside a transaction block
+    with op.get_context().autocommit_block():
+        for name, columns, kwargs in INDEXES:
+            op.create_index(
+                name, "tasks", columns,
+                if_not_exists=True, postgresql_concurrently=True, **kwargs
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, _, _ in reversed(INDEXES):
+            op.drop_index(name, table_name="tasks", if_exists=True, postgresql_concurrently=True)
+    with op.batch_alter_table("tasks") as batch_op:
+        batch_op.drop_column("next_occurrence_at")
+        batch_op.drop_column("occurrence_date")
+        batch_op.drop_column("series_id")
@@ -0,0 +1,74 @@
+"""Task change sequence and tombstones for delta sync
+
+Adds tasks.change_seq, the owner's user_task_versions.version of the last
+write to the row, indexed per user for GET /tasks/changes. Adds
+task_tombstones, one row per deleted task, and
+user_task_versions.pruned_seq, up to which tombstones were pruned.
+
+Existing tasks are stamped with their owner's version after one more
+bump, so a first sync from 0 returns them. This rewrites every task row
+once, and list ETags change.
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-17 19:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0009"
+down_revision: Union[str, None] = "0008"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("tasks", sa.Column("change_seq", sa.Integer(), nullable=False, server_default="0"))
+    op.add_column("user_task_versions", sa.Column("pruned_seq", sa.Integer(), nullable=False, server_default="0"))
+    # create_tables() at app startup may already have created it
+    if not sa.inspect(op.get_bind()).has_table("task_tombstones"):
+        op.create_table(
+            "task_tombstones",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+            sa.Column("task_id", sa.Integer(), nullable=False),
+            sa.Column("change_seq", sa.Integer(), nullable=False),
+            sa.Column("deleted_at", sa.DateTime(), nullable=False),
+        )
+        op.create_index("ix_task_tombstones_user_seq", "task_tombstones", ["user_id", "change_seq"])
+
+    op.execute(
+        "INSERT INTO user_task_versions (user_id, version, updated_at, pruned_seq) "
+        "SELECT DISTINCT user_id, 0, CURRENT_TIMESTAMP, 0 FROM tasks "
+        "WHERE user_id NOT IN (SELECT user_id FROM user_task_versions)"
+    )
+    op.execute(
+        "UPDATE user_task_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP "
+        "WHERE user_id IN (SELECT user_id FROM tasks)"
+    )
+    op.execute(
+        "UPDATE tasks SET change_seq = "
+        "(SELECT version FROM user_task_versions WHERE user_task_versions.user_id = tasks.user_id)"
+    )
+
+    # CONCURRENTLY cannot run inside a transaction block
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_tasks_user_change_seq", "tasks", ["user_id", "change_seq"],
+            if_not_exists=True, postgresql_concurrently=True
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index("ix_tasks_user_change_seq", table_name="tasks", if_exists=True, postgresql_concurrently=True)
+    op.drop_table("task_tombstones")
+    with op.batch_alter_table("user_task_versions") as batch_op:
+        batch_op.drop_column("pruned_seq")
+    with op.batch_alter_table("tasks") as batch_op:
+        batch_op.drop_column("change_seq")
@@ -0,0 +1,69 @@
+"""Archive table for completed tasks
+
+Adds tasks_archive, where the task archiver moves tasks completed long
+ago (keeping their ids), with the per-user list indexes it is read by.
+Adds a partial index on tasks (updated_at, created_at) over completed
+tasks, which the archiver scans for candidates.
+
+No rows move here; run archive_tasks.py afterwards.
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-17 21:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0010"
+down_revision: Union[str, None] = "0009"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # create_tables() at app startup may already have created it
+    if not sa.inspect(op.get_bind()).has_table("tasks_archive"):
+        op.create_table(
+            "tasks_archive",
+            sa.Column("id", sa.Integer(), primary_key=True, autoincrement=False),
+            sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+            sa.Column("title", sa.String(), nullable=False),
+            sa.Column("description", sa.String(), nullable=True),
+            sa.Column("completed", sa.Boolean(), nullable=False),
+            sa.Column("priority", sa.String(), nullable=True),
+            sa.Column("priority_rank", sa.Integer(), nullable=True),
+            sa.Column("tags", sa.String(), nullable=True),
+            sa.Column("due_date", sa.DateTime(), nullable=True),
+            sa.Column("recurring", sa.Boolean(), nullable=False),
+            sa.Column("recurrence_pattern", sa.String(), nullable=True),
+            sa.Column("parent_task_id", sa.Integer(), nullable=True),
+            sa.Column("series_id", sa.Integer(), nullable=True),
+            sa.Column("occurrence_date", sa.DateTime(), nullable=True),
+            sa.Column("created_at", sa.DateTime(), nullable=False),
+            sa.Column("updated_at", sa.DateTime(), nullable=True),
+            sa.Column("reminder_sent", sa.Boolean(), nullable=False),
+            sa.Column("change_seq", sa.Integer(), nullable=False),
+            sa.Column("archived_at", sa.DateTime(), nullable=False),
+        )
+        op.create_index("ix_tasks_archive_user_created", "tasks_archive", ["user_id", "created_at", "id"])
+        op.create_index("ix_tasks_archive_user_due", "tasks_archive", ["user_id", "due_date", "id"])
+        op.create_index("ix_tasks_archive_user_priority_rank", "tasks_archive", ["user_id", "priority_rank", "id"])
+
+    # CONCURRENTLY cannot run inside a transaction block
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_tasks_completed_updated", "tasks", ["updated_at", "created_at"],
+            postgresql_where=sa.text("completed = true"), sqlite_where=sa.text("completed = 1"),
+            if_not_exists=True, postgresql_concurrently=True
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index("ix_tasks_completed_updated", table_name="tasks", if_exists=True, postgresql_concurrently=True)
+    op.drop_table("tasks_archive")
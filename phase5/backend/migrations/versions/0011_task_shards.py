@@ -0,0 +1,44 @@
+"""Shard directory and move freeze for task sharding
+
+Adds user_shards, the directory of the task shard each user lives on,
+and user_task_versions.moved_at, set on the shard a user is being moved
+away from. Existing users need no directory rows: users with task data
+on this database stay on it.
+
+Run this against DATABASE_URL and against every database in
+DATABASE_SHARD_URLS.
+
+Revision ID: 0011
+Revises: 0010
+Create Date: 2026-10-17 23:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0011"
+down_revision: Union[str, None] = "0010"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("user_task_versions", sa.Column("moved_at", sa.DateTime(), nullable=True))
+    # create_tables() at app startup may already have created it
+    if not sa.inspect(op.get_bind()).has_table("user_shards"):
+        op.create_table(
+            "user_shards",
+            sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), primary_key=True),
+            sa.Column("shard", sa.String(), nullable=False),
+            sa.Column("updated_at", sa.DateTime(), nullable=False),
+        )
+
+
+def downgrade() -> None:
+    op.drop_table("user_shards")
+    with op.batch_alter_table("user_task_versions") as batch_op:
+        batch_op.drop_column("moved_at")
@@ -0,0 +1,42 @@
+"""Index on user_task_versions.updated_at for replica lag checks
+
+- (updated_at): every read replica lag check reads the latest write time,
+  max(updated_at), on the primary and on each replica, and the oldest
+  write a lagging replica is missing, min(updated_at) after a point. Both
+  become a single index probe instead of a scan of every user's row.
+
+Built with CREATE INDEX CONCURRENTLY on PostgreSQL, like 0002. Run it
+against every database in DATABASE_SHARD_URLS too.
+
+Revision ID: 0012
+Revises: 0011
+Create Date: 2026-10-18 09:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0012"
+down_revision: Union[str, None] = "0011"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # CONCURRENTLY cannot run inside a transaction block
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_user_task_versions_updated_at", "user_task_versions", ["updated_at"],
+            if_not_exists=True, postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_user_task_versions_updated_at", table_name="user_task_versions",
+            if_exists=True, postgresql_concurrently=True,
+        )
@@ -0,0 +1,82 @@
+"""Never reuse task ids on SQLite
+
+Without AUTOINCREMENT, SQLite hands out max(tasks.id) + 1, so once the
+archiver moves (or a delete removes) the task with the highest id, the
+next insert takes that id again: two tasks share an id across tasks and
+tasks_archive, and the archiver fails on tasks_archive's primary key.
+
+- SQLite: tasks is rebuilt with INTEGER PRIMARY KEY AUTOINCREMENT (data,
+  indexes and the full-text triggers are kept), and its sequence starts
+  after the highest id in tasks, tasks_archive and task_tombstones.
+- PostgreSQL: nothing to do, serial sequences never go back.
+
+Run it against every database in DATABASE_SHARD_URLS too.
+
+Revision ID: 0013
+Revises: 0012
+Create Date: 2026-10-19 09:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.schema import CreateTable
+
+from shared.models.user import User
+from shared.models.task import Task
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0013"
+down_revision: Union[str, None] = "0012"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name != "sqlite":
+        return
+    inspector = sa.inspect(bind)
+    if not inspector.has_table("tasks"):
+        return
+    existing = bind.execute(sa.text("SELECT sql FROM sqlite_master WHERE name = 'tasks'")).scalar()
+    if "AUTOINCREMENT" in existing.upper():
+        return
+
+    # Indexes and triggers (task_search) go with the old table; recreated from their own SQL
+    dependents = bind.execute(sa.text(
+        "SELECT sql FROM sqlite_master WHERE tbl_name = 'tasks' AND type IN ('index', 'trigger') AND sql IS NOT NULL"
+    )).scalars().all()
+
+    # The table as the model declares it, under a temporary name; users and
+    # tasks are copied along only so its foreign keys resolve
+    metadata = sa.MetaData()
+    User.__table__.to_metadata(metadata)
+    Task.__table__.to_metadata(metadata)
+    rebuilt = Task.__table__.to_metadata(metadata, name="_tasks_autoincrement")
+    op.execute(CreateTable(rebuilt))
+
+    columns = ", ".join(
+        f'"{column["name"]}"' for column in inspector.get_columns("tasks") if column["name"] in rebuilt.c
+    )
+    op.execute(f"INSERT INTO _tasks_autoincrement ({columns}) SELECT {columns} FROM tasks")
+    op.execute("DROP TABLE tasks")
+    op.execute("ALTER TABLE _tasks_autoincrement RENAME TO tasks")
+    for sql in dependents:
+        op.execute(sql)
+
+    # Start after every id handed out so far, including archived and deleted tasks
+    highest = ["SELECT max(id) AS id FROM tasks"]
+    for table, column in (("tasks_archive", "id"), ("task_tombstones", "task_id")):
+        if inspector.has_table(table):
+            highest.append(f"SELECT max({column}) AS id FROM {table}")
+    seq = bind.execute(sa.text(f"SELECT max(id) FROM ({' UNION ALL '.join(highest)})")).scalar() or 0
+    op.execute("DELETE FROM sqlite_sequence WHERE name = 'tasks'")
+    op.execute(sa.text("INSERT INTO sqlite_sequence (name, seq) VALUES ('tasks', :seq)").bindparams(seq=seq))
+
+
+def downgrade() -> None:
+    # AUTOINCREMENT only stops id reuse; nothing to undo
+    pass
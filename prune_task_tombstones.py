@@ -0,0 +1,29 @@
+#!/usr/bin/env python3
+"""
+Script to delete the tombstones behind GET /tasks/changes once they are older than a retention period
+
+Usage: python prune_task_tombstones.py [retention in days, default 30]
+
+Clients whose sync cursor is older than a pruned delete get 410 from
+GET /tasks/changes and start over with a full sync. Run periodically, e.g.
+daily from cron. Every task shard is pruned in turn.
+"""
+
+import sys
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from datetime import datetime, timedelta
+from sqlmodel import Session
+from phase5.backend.app.database import shard_map
+from phase5.backend.app.services.task_changes import prune_task_tombstones
+
+if __name__ == "__main__":
+    days = int(sys.argv[1]) if len(sys.argv) > 1 else 30
+
+    for shard in shard_map.shards.values():
+        with Session(shard.engine) as session:
+            deleted = prune_task_tombstones(session, datetime.utcnow() - timedelta(days=days))
+        print(f"Pruned {deleted} task tombstones older than {days} days on shard {shard.name}")
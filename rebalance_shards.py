@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Script to move users' tasks between the database shards in DATABASE_SHARD_URLS
+
+Usage: python rebalance_shards.py [--dry-run]
+       python rebalance_shards.py --move <user email> <shard>
+
+Without --move, users are moved to the shard the consistent-hash ring places
+them on, e.g. after adding a shard; --dry-run only counts them. Users move
+in batches of 100 while the app keeps serving: each user's writes are
+refused (503, retried by clients) for the few seconds of their move, and
+the old copy is deleted after SHARD_DIRECTORY_TTL_SECONDS * 2. An
+interrupted run is finished by the next one.
+"""
+
+import sys
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from sqlmodel import Session, select
+from phase5.backend.app.database import engine, shard_map
+from phase5.backend.app.services.shard_rebalancer import ShardRebalancer
+from shared.models.user import User
+
+if __name__ == "__main__":
+    rebalancer = ShardRebalancer(shard_map, grace_seconds=shard_map.directory_ttl * 2)
+
+    if "--move" in sys.argv:
+        email, target = sys.argv[sys.argv.index("--move") + 1:][:2]
+        if target not in shard_map.shards:
+            print(f"Unknown shard {target}, expected one of: {', '.join(shard_map.shards)}")
+            sys.exit(1)
+        with Session(engine) as session:
+            user = session.exec(select(User).where(User.email == email)).first()
+        if not user:
+            print(f"User {email} not found!")
+            sys.exit(1)
+        rebalancer.recover()
+        source = shard_map.shard_for(user.id).name
+        moved = rebalancer.move_users([(user.id, source, target)])
+        print(f"Moved {email} from {source} to {target}" if moved else f"{email} stays on {source}")
+    elif "--dry-run" in sys.argv:
+        count, after_user_id = 0, 0
+        while True:
+            moves, after_user_id = rebalancer.misplaced(after_user_id)
+            if not moves:
+                break
+            count += len(moves)
+        print(f"{count} users would move")
+    else:
+        moved = rebalancer.run_once()
+        print(f"Moved {moved} users to their shards")
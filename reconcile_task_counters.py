@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+Script to rebuild the per-user task counters behind GET /tasks/stats from the tasks table
+
+Usage: python reconcile_task_counters.py [user email]
+
+Without an email every user's counters are rebuilt, on every task shard.
+Safe to run against a live database, e.g. periodically from cron to repair
+drift.
+"""
+
+import sys
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from sqlmodel import Session, select
+from phase5.backend.app.database import engine, shard_map
+from phase5.backend.app.services.task_counters import reconcile_task_counters
+from shared.models.task import TaskArchive, UserTaskCounter
+from shared.models.user import User
+
+if __name__ == "__main__":
+    shards = list(shard_map.shards.values())
+    user_id = None
+    if len(sys.argv) > 1:
+        with Session(engine) as session:
+            user = session.exec(select(User).where(User.email == sys.argv[1])).first()
+        if not user:
+            print(f"User {sys.argv[1]} not found!")
+            sys.exit(1)
+        user_id = user.id
+        shards = [shard_map.shard_for(user_id)]
+
+    written = 0
+    for shard in shards:
+        # Make sure the tables exist on databases created before they were added
+        UserTaskCounter.__table__.create(shard.engine, checkfirst=True)
+        TaskArchive.__table__.create(shard.engine, checkfirst=True)
+        with Session(shard.engine) as session:
+            written += reconcile_task_counters(session, user_id)
+
+    print(f"Rebuilt {written} task counter rows")
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Worker that generates the instances of recurring tasks ahead of time (see
+phase5/backend/app/services/recurrence_materializer.py)
+
+Usage: python run_recurrence_materializer.py [horizon in days, default 14]
+       python run_recurrence_materializer.py --once [horizon in days]
+
+Runs a full pass every RECURRENCE_INTERVAL_SECONDS (default 300) and reacts
+to task_completed messages on task-events in between, as published by the
+complete routes. --once runs a single pass without Kafka over every task
+shard, e.g. from cron. Instances are unique per series and occurrence, so
+overlapping runs never duplicate them.
+The long-running worker serves one shard, TASK_SHARD (default "default");
+run one per shard.
+"""
+
+import asyncio
+import json
+import os
+import signal
+import sys
+from datetime import timedelta
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
+from phase5.backend.app.database import shard_map
+from phase5.backend.app.sharding import DEFAULT_SHARD, Shard
+from phase5.backend.app.services.recurrence_materializer import RecurrenceMaterializer
+from phase5.backend.app.services.task_events import event_shard
+
+
+async def follow_task_events(materializer: RecurrenceMaterializer, shard: Shard) -> None:
+    from aiokafka import AIOKafkaConsumer
+
+    # One consumer group per shard: each shard's workers see every event and
+    # keep those of their shard, as task ids repeat across shards
+    consumer = AIOKafkaConsumer(
+        "task-events",
+        bootstrap_servers=os.getenv("KAFKA_BOOTSTRAP_SERVERS", "localhost:9092"),
+        group_id=f"recurrence-materializer-{shard.name}",
+        value_deserializer=lambda m: json.loads(m.decode("utf-8"))
+    )
+    await consumer.start()
+    try:
+        async for msg in consumer:
+            if event_shard(msg.value) == shard.name:
+                materializer.on_task_event(msg.value)
+    finally:
+        await consumer.stop()
+
+
+async def main(materializer: RecurrenceMaterializer) -> None:
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, materializer.stop)
+
+    shard = shard_map.shards[os.getenv("TASK_SHARD", DEFAULT_SHARD)]
+    events = asyncio.create_task(follow_task_events(materializer, shard))
+    try:
+        await materializer.run(
+            lambda: AsyncSession(shard.async_engine, expire_on_commit=False),
+            interval_seconds=float(os.getenv("RECURRENCE_INTERVAL_SECONDS", "300"))
+        )
+    finally:
+        events.cancel()
+
+
+if __name__ == "__main__":
+    args = [arg for arg in sys.argv[1:] if arg != "--once"]
+    materializer = RecurrenceMaterializer(horizon=timedelta(days=int(args[0]) if args else 14))
+
+    if "--once" in sys.argv:
+        for shard in shard_map.shards.values():
+            with Session(shard.engine) as session:
+                created = materializer.run_once(session)
+            print(f"Created {created} recurring task instances on shard {shard.name}")
+    else:
+        asyncio.run(main(materializer))
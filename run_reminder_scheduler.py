@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Worker that publishes reminder-events for tasks coming due (see
+phase5/backend/app/services/reminder_scheduler.py)
+
+Usage: python run_reminder_scheduler.py [lead time in minutes, default 15]
+
+Reads task-events, published by the task write routes, to pick up new and
+changed due dates, completions and deletions between refreshes.
+One instance per task shard, TASK_SHARD (default "default"), is enough;
+extra instances never send a reminder twice, as each task is claimed by a
+single UPDATE.
+"""
+
+import asyncio
+import json
+import os
+import signal
+import sys
+from datetime import timedelta
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from aiokafka import AIOKafkaConsumer
+from sqlmodel.ext.asyncio.session import AsyncSession
+from phase5.backend.app.database import shard_map
+from phase5.backend.app.sharding import DEFAULT_SHARD, Shard
+from phase5.backend.app.kafka.producer import kafka_producer
+from phase5.backend.app.services.reminder_scheduler import ReminderScheduler
+from phase5.backend.app.services.task_events import event_shard
+from shared.models.task import Task
+
+
+async def follow_task_events(scheduler: ReminderScheduler, shard: Shard) -> None:
+    # No consumer group: every scheduler instance sees every event, and keeps
+    # those of its shard, as task ids repeat across shards
+    consumer = AIOKafkaConsumer(
+        "task-events",
+        bootstrap_servers=kafka_producer.bootstrap_servers,
+        value_deserializer=lambda m: json.loads(m.decode("utf-8"))
+    )
+    await consumer.start()
+    try:
+        async for msg in consumer:
+            if event_shard(msg.value) == shard.name:
+                scheduler.on_task_event(msg.value)
+    finally:
+        await consumer.stop()
+
+
+async def main(shard, lead_minutes: int) -> None:
+    scheduler = ReminderScheduler(lead_time=timedelta(minutes=lead_minutes))
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, scheduler.stop)
+
+    await kafka_producer.start()
+    events = asyncio.create_task(follow_task_events(scheduler, shard))
+    try:
+        await scheduler.run(
+            lambda: AsyncSession(shard.async_engine, expire_on_commit=False), kafka_producer.send_reminder_events,
+            refresh_seconds=float(os.getenv("REMINDER_REFRESH_SECONDS", "30")),
+            resync_seconds=float(os.getenv("REMINDER_RESYNC_SECONDS", "600")),
+        )
+    finally:
+        events.cancel()
+        await kafka_producer.stop()
+
+
+if __name__ == "__main__":
+    shard = shard_map.shards[os.getenv("TASK_SHARD", DEFAULT_SHARD)]
+    # Make sure the due-date index exists on databases created before it was added
+    for index in Task.__table__.indexes:
+        if index.name == "ix_tasks_reminder_due":
+            index.create(shard.engine, checkfirst=True)
+
+    asyncio.run(main(shard, int(sys.argv[1]) if len(sys.argv) > 1 else 15))
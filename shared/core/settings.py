@@ -16,5 +16,39 @@ class Settings(BaseSettings):
     DB_USER: str = os.getenv("DB_USER", "postgres")
     DB_PASSWORD: str = os.getenv("DB_PASSWORD", "password")
 
+    # Phase 5 task read cache (per process); 0 entries or TTL disables it,
+    # 0 bytes means bounded by entry count only
+    TASK_CACHE_MAX_ENTRIES: int = int(os.getenv("TASK_CACHE_MAX_ENTRIES", "1024"))
+    TASK_CACHE_MAX_BYTES: int = int(os.getenv("TASK_CACHE_MAX_BYTES", "0"))
+    TASK_CACHE_TTL_SECONDS: float = float(os.getenv("TASK_CACHE_TTL_SECONDS", "30"))
+
+    # Phase 5 read replicas for GET handlers, comma-separated URLs; empty
+    # sends every read to DATABASE_URL. Users are pinned to the primary for
+    # REPLICA_STICKY_SECONDS after a write; replicas lagging by more than
+    # REPLICA_MAX_LAG_SECONDS take no reads. Lag is checked at most every
+    # REPLICA_CHECK_SECONDS.
+    DATABASE_REPLICA_URLS: str = os.getenv("DATABASE_REPLICA_URLS", "")
+    REPLICA_STICKY_SECONDS: float = float(os.getenv("REPLICA_STICKY_SECONDS", "15"))
+    REPLICA_MAX_LAG_SECONDS: float = float(os.getenv("REPLICA_MAX_LAG_SECONDS", "10"))
+    REPLICA_CHECK_SECONDS: float = float(os.getenv("REPLICA_CHECK_SECONDS", "5"))
+
+    # Phase 5 task shards besides DATABASE_URL, as comma-separated name=url
+    # pairs; users are placed by consistent hashing and recorded in the
+    # user_shards directory, whose lookups are cached for
+    # SHARD_DIRECTORY_TTL_SECONDS
+    DATABASE_SHARD_URLS: str = os.getenv("DATABASE_SHARD_URLS", "")
+    SHARD_DIRECTORY_TTL_SECONDS: float = float(os.getenv("SHARD_DIRECTORY_TTL_SECONDS", "30"))
+
+    # Production profile for SQLite file databases (see sqlite_profile): WAL
+    # and the PRAGMAs below on every connection, phase 5 task writes through
+    # one group-committing writer thread (at most SQLITE_WRITE_BATCH writes
+    # per commit) and task reads on SQLITE_READ_POOL_SIZE read-only connections
+    SQLITE_PRODUCTION_PROFILE: bool = os.getenv("SQLITE_PRODUCTION_PROFILE", "false").lower() in ("1", "true", "yes")
+    SQLITE_MMAP_SIZE: int = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+    SQLITE_CACHE_SIZE_KIB: int = int(os.getenv("SQLITE_CACHE_SIZE_KIB", str(64 * 1024)))
+    SQLITE_BUSY_TIMEOUT_MS: int = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+    SQLITE_WRITE_BATCH: int = int(os.getenv("SQLITE_WRITE_BATCH", "64"))
+    SQLITE_READ_POOL_SIZE: int = int(os.getenv("SQLITE_READ_POOL_SIZE", "8"))
+
 
 settings = Settings()
\ No newline at end of file
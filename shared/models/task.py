@@ -1,10 +1,20 @@
-from typing import Optional, List
+from typing import Dict, Optional, List
 from sqlmodel import SQLModel, Field, Relationship
 from datetime import datetime
-from sqlalchemy import Column, JSON
+from sqlalchemy import Column, JSON, ForeignKey, Index, Integer, event, text
 import json
 
 
+# Numeric order of the priority strings, stored in Task.priority_rank so that
+# sorting and "at least high" filters are integer comparisons on an index
+PRIORITY_RANKS = {"low": 1, "medium": 2, "high": 3, "urgent": 4}
+
+
+def rank_for_priority(priority: Optional[str]) -> Optional[int]:
+    """Map a priority string to its rank, None for missing or unknown values"""
+    return PRIORITY_RANKS.get(priority) if priority else None
+
+
 class TaskBase(SQLModel):
     title: str
     description: Optional[str] = None
@@ -19,12 +29,66 @@ class TaskBase(SQLModel):
 
 class Task(TaskBase, table=True):
     __tablename__ = "tasks"
+    # Indexes for the hot read paths, also created on live databases by the
+    # phase5 Alembic migrations (phase5/backend/migrations)
+    __table_args__ = (
+        Index("ix_tasks_user_completed_due", "user_id", "completed", "due_date"),
+        Index("ix_tasks_user_created", "user_id", "created_at", "id"),
+        Index("ix_tasks_user_priority_rank", "user_id", "priority_rank", "id"),
+        Index(
+            "ix_tasks_open_due", "user_id", "due_date",
+            postgresql_where=text("completed = false AND due_date IS NOT NULL"),
+            sqlite_where=text("completed = 0 AND due_date IS NOT NULL"),
+        ),
+        Index("ix_tasks_parent_task_id", "parent_task_id"),
+        # Completed tasks by age, scanned by the phase5 task archiver
+        Index(
+            "ix_tasks_completed_updated", "updated_at", "created_at",
+            postgresql_where=text("completed = true"),
+            sqlite_where=text("completed = 1"),
+        ),
+        # Delta sync: the user's tasks changed after a cursor
+        Index("ix_tasks_user_change_seq", "user_id", "change_seq"),
+        # Global due-date order of the reminders still to send, scanned by
+        # the phase5 reminder scheduler across all users
+        Index(
+            "ix_tasks_reminder_due", "due_date", "id",
+            postgresql_where=text("completed = false AND reminder_sent = false AND due_date IS NOT NULL"),
+            sqlite_where=text("completed = 0 AND reminder_sent = 0 AND due_date IS NOT NULL"),
+        ),
+        # One instance per occurrence of a recurring series, and the series
+        # whose next occurrence is coming up (phase5 recurrence materializer)
+        Index("ux_tasks_series_occurrence", "series_id", "occurrence_date", unique=True),
+        Index(
+            "ix_tasks_recurring_next", "next_occurrence_at", "id",
+            postgresql_where=text("recurring = true AND series_id IS NULL"),
+            sqlite_where=text("recurring = 1 AND series_id IS NULL"),
+        ),
+        # Ids are never reused on SQLite either: archived and deleted tasks
+        # keep theirs in tasks_archive and task_tombstones
+        {"sqlite_autoincrement": True},
+    )
 
     id: Optional[int] = Field(default=None, primary_key=True)
     user_id: int = Field(foreign_key="users.id")
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: Optional[datetime] = Field(default=None)
     reminder_sent: bool = False
+    priority_rank: Optional[int] = Field(default=None)  # derived from priority on every write
+    # Rollup over all descendants, adjusted incrementally by the phase5
+    # TaskService on every write that adds, removes, moves or completes a subtask
+    subtask_count: int = Field(default=0, sa_column_kwargs={"server_default": "0"})
+    subtask_completed_count: int = Field(default=0, sa_column_kwargs={"server_default": "0"})
+    # Instances generated from a recurring task carry its id and the
+    # occurrence they stand for; on the recurring task itself,
+    # next_occurrence_at is the first occurrence not generated yet (NULL
+    # until the materializer first sees it)
+    series_id: Optional[int] = Field(default=None)
+    occurrence_date: Optional[datetime] = Field(default=None)
+    next_occurrence_at: Optional[datetime] = Field(default=None)
+    # The owner's user_task_versions.version of the last write to the row,
+    # set by every phase5 write (see GET /tasks/changes)
+    change_seq: int = Field(default=0, sa_column_kwargs={"server_default": "0"})
 
     # Relationship to user
     user: Optional["User"] = Relationship(back_populates="tasks")
@@ -47,6 +111,107 @@ class Task(TaskBase, table=True):
     )
 
 
+@event.listens_for(Task, "before_insert")
+@event.listens_for(Task, "before_update")
+def _set_priority_rank(mapper, connection, target):
+    target.priority_rank = rank_for_priority(target.priority)
+
+
+class TaskTag(SQLModel, table=True):
+    """One row per (task, tag), mirroring the JSON tags column for indexed filtering"""
+    __tablename__ = "task_tags"
+    __table_args__ = (
+        Index("ix_task_tags_user_tag_task", "user_id", "tag", "task_id"),
+    )
+
+    task_id: int = Field(
+        sa_column=Column(Integer, ForeignKey("tasks.id", ondelete="CASCADE"), primary_key=True)
+    )
+    tag: str = Field(primary_key=True)
+    user_id: int = Field(foreign_key="users.id")
+
+
+class UserTaskVersion(SQLModel, table=True):
+    """Per-user counter bumped in the same transaction as every task write"""
+    __tablename__ = "user_task_versions"
+    __table_args__ = (
+        # Latest write time for the phase5 read replica lag checks
+        Index("ix_user_task_versions_updated_at", "updated_at"),
+    )
+
+    user_id: int = Field(foreign_key="users.id", primary_key=True)
+    version: int = 0
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+    # Tombstones up to this version were pruned; older sync cursors are expired
+    pruned_seq: int = Field(default=0, sa_column_kwargs={"server_default": "0"})
+    # Set on the shard a user is being moved away from by the phase5 shard
+    # rebalancer; task writes for the user are refused there from then on
+    moved_at: Optional[datetime] = None
+
+
+class TaskTombstone(SQLModel, table=True):
+    """A deleted task, kept so that delta sync can report the delete"""
+    __tablename__ = "task_tombstones"
+    __table_args__ = (
+        Index("ix_task_tombstones_user_seq", "user_id", "change_seq"),
+    )
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    user_id: int = Field(foreign_key="users.id")
+    task_id: int
+    change_seq: int  # the owner's version of the delete
+    deleted_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+class TaskArchive(SQLModel, table=True):
+    """
+    Completed tasks moved out of `tasks` by the phase5 task archiver, with
+    their original ids. Compact: no rollups, no recurrence bookkeeping, no
+    task_tags rows (tags stay in the JSON column) and no foreign key on
+    parent_task_id, whose task may stay behind in `tasks`.
+    """
+    __tablename__ = "tasks_archive"
+    __table_args__ = (
+        Index("ix_tasks_archive_user_created", "user_id", "created_at", "id"),
+        Index("ix_tasks_archive_user_due", "user_id", "due_date", "id"),
+        Index("ix_tasks_archive_user_priority_rank", "user_id", "priority_rank", "id"),
+    )
+
+    id: int = Field(sa_column=Column(Integer, primary_key=True, autoincrement=False))
+    user_id: int = Field(foreign_key="users.id")
+    title: str
+    description: Optional[str] = None
+    completed: bool = True
+    priority: Optional[str] = None
+    priority_rank: Optional[int] = None
+    tags: Optional[str] = "[]"
+    due_date: Optional[datetime] = None
+    recurring: bool = False
+    recurrence_pattern: Optional[str] = None
+    parent_task_id: Optional[int] = None
+    series_id: Optional[int] = None
+    occurrence_date: Optional[datetime] = None
+    created_at: datetime
+    updated_at: Optional[datetime] = None
+    reminder_sent: bool = False
+    change_seq: int = 0
+    archived_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+class UserTaskCounter(SQLModel, table=True):
+    """
+    Number of a user's tasks per (priority rank, completed), adjusted in the
+    same transaction as every task write. Rank 0 holds tasks without a known
+    priority.
+    """
+    __tablename__ = "user_task_counters"
+
+    user_id: int = Field(foreign_key="users.id", primary_key=True)
+    priority_rank: int = Field(default=0, primary_key=True)
+    completed: bool = Field(default=False, primary_key=True)
+    task_count: int = 0
+
+
 class TaskCreate(TaskBase):
     title: str
     description: Optional[str] = None
@@ -111,4 +276,51 @@ class TaskUpdate(SQLModel):
     recurring: Optional[bool] = None
     recurrence_pattern: Optional[str] = None
     parent_task_id: Optional[int] = None
-    reminder_sent: Optional[bool] = None
\ No newline at end of file
+    reminder_sent: Optional[bool] = None
+
+class TaskBulkItemResult(SQLModel):
+    index: int  # position of the item in the request
+    id: Optional[int] = None
+    status: str  # created, updated, completed, deleted, not_found, invalid
+    detail: Optional[str] = None
+    task: Optional[TaskRead] = None
+
+
+class TaskTreeNode(TaskRead):
+    """A task with the rollup of its subtree and its direct subtasks, nested"""
+    subtasks_total: int = 0
+    subtasks_completed: int = 0
+    children: List["TaskTreeNode"] = []
+
+
+class TaskCalendarEntry(TaskRead):
+    """A task or a virtual occurrence of a recurring task on GET /tasks/calendar"""
+    id: Optional[int] = None  # None for occurrences that are not stored
+    series_id: Optional[int] = None  # the recurring task an occurrence belongs to
+    occurrence_date: Optional[datetime] = None
+    virtual: bool = False
+
+
+class TaskChanges(SQLModel):
+    """A page of GET /tasks/changes"""
+    changed: List[TaskRead]  # created or updated since the cursor, oldest change first
+    deleted: List[int]  # ids of tasks deleted since the cursor
+    cursor: int  # pass as `since` on the next call
+    has_more: bool  # another page is waiting at cursor
+
+
+class TaskStats(SQLModel):
+    total: int
+    completed: int
+    open: int
+    overdue: int  # open tasks whose due date has passed
+    # Keyed by priority, "none" for tasks without a known priority
+    open_by_priority: Dict[str, int]
+    completed_by_priority: Dict[str, int]
+
+
+class TaskBulkResult(SQLModel):
+    committed: bool  # False when nothing was written (atomic batch with failures)
+    succeeded: int
+    failed: int
+    results: List[TaskBulkItemResult]
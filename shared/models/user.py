@@ -22,6 +22,19 @@ class User(UserBase, table=True):
     tasks: List["Task"] = Relationship(back_populates="user")
 
 
+class UserShard(SQLModel, table=True):
+    """
+    Directory of the phase5 database shard holding each user's tasks, kept
+    in the main database next to users. Users without a row are placed on
+    first use.
+    """
+    __tablename__ = "user_shards"
+
+    user_id: int = Field(foreign_key="users.id", primary_key=True)
+    shard: str
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+
+
 class UserCreate(UserBase):
     email: str
     password: str
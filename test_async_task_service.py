@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""
+Test the AsyncSession task service used by the phase5 routes and MCP tools
+"""
+
+import asyncio
+from shared.models.task import TaskCreate
+from phase5.backend.app.services.async_task_service import AsyncTaskService
+from phase5.backend.app.database import async_database_url
+from conftest import async_task_session
+
+
+async def run_writes_and_reads(make_async_session):
+    service = AsyncTaskService()
+    async with await make_async_session() as db:
+        task = await service.create_task(db, TaskCreate(title="a", tags=["work"]), 1)
+        await service.bulk_create_tasks(db, [TaskCreate(title="b")], 1)
+        assert (await service.mark_complete(db, task.id, 1)).completed
+
+        rows = await service.get_task_rows(db, 1, completed=False)
+        assert [row[0] for row in rows] == ["b"]
+        assert (await service.get_version(db, 1))[0] == 3
+        assert await service.delete_task(db, task.id, 1)
+        assert await service.get_task(db, task.id, 1) is None
+    await db.bind.dispose()
+
+
+def test_async_service_round_trip(make_async_session):
+    asyncio.run(run_writes_and_reads(make_async_session))
+
+
+def test_async_database_url():
+    assert async_database_url("postgresql://u:p@db/todo") == "postgresql+asyncpg://u:p@db/todo"
+    assert async_database_url("postgresql+psycopg2://db/todo") == "postgresql+asyncpg://db/todo"
+    assert async_database_url("sqlite:///./todo.db") == "sqlite+aiosqlite:///./todo.db"
+
+
+if __name__ == "__main__":
+    test_async_service_round_trip(async_task_session)
+    test_async_database_url()
+    print("Async task service tests passed!")
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Test read-replica routing with two SQLite files: lag checks, stickiness and failover
+"""
+
+import asyncio
+import json
+import os
+import tempfile
+import time
+from datetime import timedelta
+from fastapi import HTTPException
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel import SQLModel, Session, create_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
+from shared.models.user import User
+from shared.models.task import (
+    Task, TaskCreate, TaskTag, UserTaskVersion, UserTaskCounter, TaskTombstone, TaskArchive
+)
+from phase5.backend.app.database import async_database_url
+from phase5.backend.app.api.deps import get_conversation_db, get_conversation_read_db
+from phase5.backend.app.api.routes.tasks import get_task_changes
+from phase5.backend.app.read_replicas import Replica, ReplicaPool
+from phase5.backend.app.sharding import Shard
+from phase5.backend.app.services.task_service import TaskService
+
+TABLES = [
+    User.__table__, Task.__table__, TaskTag.__table__, UserTaskVersion.__table__, UserTaskCounter.__table__,
+    TaskTombstone.__table__, TaskArchive.__table__
+]
+
+
+def make_replica(url: str) -> Replica:
+    return Replica(url, create_engine(url), create_async_engine(async_database_url(url)))
+
+
+def make_pool(directory: str, names=("replica",), **options):
+    primary = create_engine(f"sqlite:///{os.path.join(directory, 'primary.db')}")
+    SQLModel.metadata.create_all(primary, tables=TABLES)
+    with Session(primary) as db:
+        db.add(User(id=1, email="writer@example.com", hashed_password="x"))
+        db.add(User(id=2, email="reader@example.com", hashed_password="x"))
+        db.commit()
+    replicas = [make_replica(f"sqlite:///{os.path.join(directory, name + '.db')}") for name in names]
+    for replica in replicas:
+        replicate(primary, replica)
+    primary_async = create_async_engine(async_database_url(str(primary.url)))
+    return ReplicaPool(primary, primary_async, replicas, **options)
+
+
+def replicate(primary, replica: Replica) -> None:
+    """Bring the replica file up to date with the primary (SQLite online backup)"""
+    source, target = primary.raw_connection(), replica.engine.raw_connection()
+    try:
+        source.driver_connection.backup(target.driver_connection)
+    finally:
+        source.close()
+        target.close()
+
+
+def dispose(pool: ReplicaPool) -> None:
+    pool.primary.dispose()
+    for replica in pool.replicas:
+        replica.engine.dispose()
+
+
+def test_lagging_replicas_take_no_reads():
+    service = TaskService()
+    with tempfile.TemporaryDirectory() as directory:
+        pool = make_pool(directory)
+        replica = pool.replicas[0]
+        assert pool.check_due() and pool.read_replica(2) is None
+
+        pool.check()
+        assert (replica.healthy, replica.lag) == (True, 0.0) and not pool.check_due()
+        assert pool.read_engine(2) is replica.async_engine
+        assert pool.sync_engine(replica.async_engine) is replica.engine
+
+        with Session(pool.primary) as db:
+            service.create_task(db, TaskCreate(title="written"), 1)
+            written_at = service.get_version(db, 1)[1]
+
+        # Behind by one write: lag is the age of that write
+        pool.check(written_at + timedelta(seconds=3))
+        assert replica.healthy and replica.lag == 3.0
+        pool.check(written_at + timedelta(seconds=30))
+        assert not replica.healthy and pool.read_replica(2) is None
+
+        replicate(pool.primary, replica)
+        pool.check(written_at + timedelta(seconds=30))
+        assert replica.healthy and replica.lag == 0.0
+        with Session(replica.engine) as db:
+            assert [task.title for task in db.query(Task)] == ["written"]
+
+        # The check's max(updated_at) is an index probe, not a scan of every user
+        with pool.primary.connect() as connection:
+            plan = connection.exec_driver_sql("EXPLAIN QUERY PLAN SELECT max(updated_at) FROM user_task_versions")
+            assert "ix_user_task_versions_updated_at" in " ".join(row[-1] for row in plan)
+        dispose(pool)
+
+
+def test_writers_are_pinned_to_the_primary():
+    with tempfile.TemporaryDirectory() as directory:
+        pool = make_pool(directory, ("first", "second"), sticky_seconds=0.05)
+        pool.check()
+        # Round robin over the healthy replicas
+        assert {pool.read_replica(2).url for _ in range(4)} == {replica.url for replica in pool.replicas}
+
+        pool.pin(1)
+        assert pool.read_replica(1) is None and pool.read_replica(2) is not None
+        assert pool.stats()["pinned_users"] == 1
+        time.sleep(0.06)
+        assert pool.read_replica(1) is not None
+        assert pool.stats()["pinned_users"] == 0
+        dispose(pool)
+
+
+def test_failing_replica_is_skipped():
+    with tempfile.TemporaryDirectory() as directory:
+        pool = make_pool(directory, ("good",))
+        # A database without the tables fails the check
+        pool.replicas.append(make_replica(f"sqlite:///{os.path.join(directory, 'empty.db')}"))
+        pool.check()
+        good, broken = pool.replicas
+        assert good.healthy and not broken.healthy and "user_task_versions" in broken.error
+        assert {pool.read_replica(2).url for _ in range(4)} == {good.url}
+        assert [replica["healthy"] for replica in pool.stats()["replicas"]] == [True, False]
+
+        # Without any healthy replica, reads go to the primary
+        good.engine.dispose()
+        os.remove(good.url.removeprefix("sqlite:///"))
+        pool.check()
+        assert not good.healthy and pool.read_engine(2) is pool.primary_async
+        dispose(pool)
+
+
+def test_sync_cursor_ahead_of_the_replica_reads_the_primary():
+    service = TaskService()
+    with tempfile.TemporaryDirectory() as directory:
+        pool = make_pool(directory)
+        replica = pool.replicas[0]
+        with Session(pool.primary) as db:
+            service.create_task(db, TaskCreate(title="replicated"), 1)
+            replicate(pool.primary, replica)
+            # Written after the replica's copy: the client's cursor is now 2
+            service.create_task(db, TaskCreate(title="seen by the client"), 1)
+            service.create_task(db, TaskCreate(title="new"), 1)
+        user, shard = User(id=1, email="writer@example.com", hashed_password="x"), Shard("default", pool)
+
+        async def changes(engine, since: int):
+            async with AsyncSession(engine, expire_on_commit=False) as db:
+                return await get_task_changes(since=since, limit=10, current_user=user, shard=shard, db=db)
+
+        response = asyncio.run(changes(replica.async_engine, 2))
+        body = json.loads(response.body)
+        assert [task["title"] for task in body["changed"]] == ["new"] and body["cursor"] == 3
+        try:
+            asyncio.run(changes(pool.primary_async, 9))
+            assert False, "cursor ahead of the primary accepted"
+        except HTTPException as e:
+            assert e.status_code == 400
+        asyncio.run(pool.primary_async.dispose())
+        asyncio.run(replica.async_engine.dispose())
+        dispose(pool)
+
+
+def test_conversation_history_reads_a_replica():
+    with tempfile.TemporaryDirectory() as directory:
+        pool = make_pool(directory)
+        shard = Shard("default", pool)
+        writer, reader = (User(id=user_id, email=f"{user_id}@example.com", hashed_password="x") for user_id in (1, 2))
+
+        def bound_engine(dependency, user: User):
+            sessions = dependency(current_user=user, shard=shard)
+            engine = next(sessions).get_bind()
+            sessions.close()
+            return engine
+
+        # The first history read runs the due health check
+        assert bound_engine(get_conversation_read_db, reader) is pool.replicas[0].engine
+        assert bound_engine(get_conversation_db, writer) is pool.primary
+        # A conversation write pins its user's history reads to the primary
+        assert bound_engine(get_conversation_read_db, writer) is pool.primary
+        assert bound_engine(get_conversation_read_db, reader) is pool.replicas[0].engine
+        dispose(pool)
+
+
+if __name__ == "__main__":
+    test_lagging_replicas_take_no_reads()
+    test_writers_are_pinned_to_the_primary()
+    test_failing_replica_is_skipped()
+    test_sync_cursor_ahead_of_the_replica_reads_the_primary()
+    test_conversation_history_reads_a_replica()
+    print("Read replica tests passed!")
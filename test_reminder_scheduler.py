@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Test the reminder scheduler: windowed loading, task events and batched claims
+"""
+
+import asyncio
+from datetime import datetime, timedelta
+from fastapi import BackgroundTasks
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from shared.models.user import User
+from shared.models.task import Task, TaskCreate, TaskUpdate, UserTaskVersion
+from phase5.backend.app.api.routes import tasks as task_routes
+from phase5.backend.app.read_replicas import ReplicaPool
+from phase5.backend.app.sharding import Shard
+from phase5.backend.app.services.task_events import event_shard, task_events
+from phase5.backend.app.services.task_service import TaskService
+from phase5.backend.app.services.reminder_scheduler import ReminderScheduler
+from conftest import async_task_session
+
+NOW = datetime(2026, 10, 17, 12, 0)
+
+
+async def add_tasks(db: AsyncSession, user_id: int, *tasks) -> list:
+    service = TaskService()
+    created = await db.run_sync(lambda session: service.bulk_create_tasks(session, list(tasks), user_id))
+    return [item.id for item in created.results]
+
+
+async def sent_flags(db: AsyncSession) -> dict:
+    return dict((await db.exec(select(Task.title, Task.reminder_sent))).all())
+
+
+async def run_window_and_claims(make_async_session):
+    db = await make_async_session()
+    soon, later = NOW + timedelta(minutes=5), NOW + timedelta(minutes=20)
+    ids = await add_tasks(
+        db, 1,
+        TaskCreate(title="overdue", due_date=NOW - timedelta(hours=1)),
+        TaskCreate(title="stale", due_date=NOW - timedelta(days=2)),
+        TaskCreate(title="done", due_date=soon, completed=True),
+        TaskCreate(title="soon", due_date=soon),
+        TaskCreate(title="later", due_date=later),
+        TaskCreate(title="next week", due_date=NOW + timedelta(days=7)),
+        TaskCreate(title="undated"),
+    )
+    [other_id] = await add_tasks(db, 2, TaskCreate(title="other soon", due_date=soon))
+
+    scheduler = ReminderScheduler(
+        lead_time=timedelta(minutes=15), horizon=timedelta(minutes=10), chunk_size=2, batch_size=2
+    )
+    # Keyset chunks of 2 cover the window: overdue, soon, other soon, later
+    assert await db.run_sync(scheduler.load, NOW) == 4
+    assert scheduler.next_reminder_at() == NOW - timedelta(hours=1, minutes=15)
+
+    # Completed after it was loaded: the claim skips it
+    await db.run_sync(lambda session: TaskService().mark_complete(session, ids[3], 1))
+    versions_before = (await db.get(UserTaskVersion, 1)).version
+
+    batches = []
+
+    async def publish(events):
+        batches.append(events)
+
+    assert await scheduler.dispatch(db, publish, NOW) == 2
+    assert [[event["task_id"] for event in batch] for batch in batches] == [[ids[0]], [other_id]]
+    assert batches[1][0]["user_id"] == 2 and batches[1][0]["due_date"] == soon.isoformat()
+    flags = await sent_flags(db)
+    assert flags["overdue"] and flags["other soon"] and not flags["soon"] and not flags["later"]
+    assert (await db.get(UserTaskVersion, 1)).version == versions_before + 1
+
+    # "later" comes due once the clock moves; the next load adds the new slice
+    assert await db.run_sync(scheduler.load, NOW + timedelta(minutes=6)) == 0
+    assert await scheduler.dispatch(db, publish, NOW + timedelta(minutes=6)) == 1
+    assert (await sent_flags(db))["later"] and len(scheduler) == 0
+    await db.close()
+
+
+async def run_events_and_failures(make_async_session):
+    db = await make_async_session()
+    [task_id] = await add_tasks(db, 1, TaskCreate(title="a", due_date=NOW + timedelta(minutes=20)))
+    scheduler = ReminderScheduler(lead_time=timedelta(minutes=15), horizon=timedelta(minutes=10))
+    await db.run_sync(scheduler.load, NOW)
+    assert len(scheduler) == 1
+
+    # Moved past the window, then back into it, then completed
+    scheduler.on_task_event({"event_type": "task_updated", "data": {"id": task_id, "due_date": "2026-10-20T12:00:00"}})
+    assert len(scheduler) == 0
+    scheduler.on_task_event({"event_type": "task_updated", "data": {"id": task_id, "due_date": "2026-10-17T14:05:00+02:00"}})
+    assert scheduler.next_reminder_at() == NOW - timedelta(minutes=10)
+    scheduler.on_task_event({"event_type": "task_completed", "data": {"id": task_id}})
+    assert scheduler.next_reminder_at() is None
+
+    # The event ran ahead of the database, where the task is still due at
+    # +20 min: the claim skips it until a resync loads it again
+    scheduler.on_task_event({"event_type": "task_updated", "data": {"id": task_id, "due_date": NOW.isoformat()}})
+    sent = []
+
+    async def publish(events):
+        sent.extend(events)
+
+    assert await scheduler.dispatch(db, publish, NOW) == 0 and len(scheduler) == 0
+    assert await db.run_sync(scheduler.resync, NOW) == 1
+
+    # A failed publish rolls the claim back and keeps the task scheduled
+    async def failing(events):
+        raise ConnectionError("broker down")
+
+    later = NOW + timedelta(minutes=5)
+    try:
+        await scheduler.dispatch(db, failing, later)
+        assert False, "publish error was swallowed"
+    except ConnectionError:
+        pass
+    assert not (await sent_flags(db))["a"] and len(scheduler) == 1
+
+    assert await scheduler.dispatch(db, publish, later) == 1
+    assert [event["task_id"] for event in sent] == [task_id]
+    assert (await sent_flags(db))["a"]
+
+    # A new due date re-arms the reminder
+    await db.run_sync(
+        lambda session: TaskService().update_task(session, task_id, TaskUpdate(due_date=NOW + timedelta(days=1)), 1)
+    )
+    assert not (await sent_flags(db))["a"]
+    await db.close()
+
+
+async def run_route_events(make_async_session):
+    db = await make_async_session()
+    kept, moved = await add_tasks(
+        db, 1,
+        TaskCreate(title="kept", due_date=NOW + timedelta(minutes=20)),
+        TaskCreate(title="moved", due_date=NOW + timedelta(days=7)),
+    )
+    scheduler = ReminderScheduler(lead_time=timedelta(minutes=15), horizon=timedelta(minutes=10))
+    assert await db.run_sync(scheduler.load, NOW) == 1
+
+    published = []
+
+    async def send(event_type: str, data: dict, shard: str = None):
+        published.append({"event_type": event_type, "data": data, "shard": shard})
+
+    # Writes inside the loaded window that the next refresh would not read
+    user = User(id=1, email="reminders@example.com", hashed_password="x")
+    shard = Shard("default", ReplicaPool(db.bind.sync_engine, db.bind, []))
+    background = BackgroundTasks()
+    route_args = dict(background_tasks=background, current_user=user, shard=shard, db=db)
+    task_events.send = send
+    try:
+        await task_routes.create_task(TaskCreate(title="new", due_date=NOW + timedelta(minutes=5)), **route_args)
+        await task_routes.update_task(moved, TaskUpdate(due_date=NOW + timedelta(minutes=10)), **route_args)
+        await task_routes.delete_task(kept, **route_args)
+        request = task_routes.TaskBulkCreateRequest(tasks=[TaskCreate(title="bulk", due_date=NOW + timedelta(minutes=8))])
+        [bulk] = (await task_routes.bulk_create_tasks(request, **route_args)).results
+        await task_routes.bulk_delete_tasks(task_routes.TaskBulkIdsRequest(ids=[bulk.id]), **route_args)
+        await background()
+    finally:
+        task_events.send = None
+    assert [event["event_type"] for event in published] == [
+        "task_created", "task_updated", "task_deleted", "task_created", "task_deleted"
+    ]
+
+    for event in published + [{"event_type": "task_deleted", "data": {"id": moved}, "shard": "east"}]:
+        if event_shard(event) == shard.name:
+            scheduler.on_task_event(event)
+    sent = []
+
+    async def publish(events):
+        sent.extend(events)
+
+    assert await db.run_sync(scheduler.load, NOW) == 0
+    assert await scheduler.dispatch(db, publish, NOW) == 2
+    assert sorted(event["message"].split("'")[1] for event in sent) == ["moved", "new"]
+    await db.close()
+
+
+def test_windowed_load_and_batched_claims(make_async_session):
+    asyncio.run(run_window_and_claims(make_async_session))
+
+
+def test_task_events_and_failed_publish(make_async_session):
+    asyncio.run(run_events_and_failures(make_async_session))
+
+
+def test_write_routes_update_the_window(make_async_session):
+    asyncio.run(run_route_events(make_async_session))
+
+
+if __name__ == "__main__":
+    test_windowed_load_and_batched_claims(async_task_session)
+    test_task_events_and_failed_publish(async_task_session)
+    test_write_routes_update_the_window(async_task_session)
+    print("Reminder scheduler tests passed!")
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Test task sharding with SQLite files: placement, the directory and moving users between shards
+"""
+
+import os
+import tempfile
+from datetime import datetime, timedelta
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel import SQLModel, Session, create_engine, select
+from shared.models.user import User, UserShard
+from shared.models.task import (
+    Task, TaskCreate, TaskUpdate, TaskTag, UserTaskVersion, UserTaskCounter, TaskTombstone, TaskArchive
+)
+from phase5.backend.app import database
+from phase5.backend.app.database import async_database_url
+from phase5.backend.app.api.deps import get_conversation_db, get_directory_shard, get_write_db
+from phase5.backend.app.read_replicas import ReplicaPool
+from phase5.backend.app.sharding import DEFAULT_SHARD, HashRing, Shard, ShardMap, parse_shard_urls
+from phase5.backend.app.services.shard_rebalancer import ShardRebalancer, freeze_users
+from phase5.backend.app.services.task_archive import TaskArchiver
+from phase5.backend.app.services.task_changes import ExpiredCursorError
+from phase5.backend.app.services.task_service import TaskService
+from phase5.backend.app.services.task_versions import UserMovedError
+
+TABLES = [
+    User.__table__, UserShard.__table__, Task.__table__, TaskTag.__table__, UserTaskVersion.__table__,
+    UserTaskCounter.__table__, TaskTombstone.__table__, TaskArchive.__table__
+]
+
+
+def make_shard(directory: str, name: str) -> Shard:
+    url = f"sqlite:///{os.path.join(directory, name + '.db')}"
+    engine = create_engine(url)
+    SQLModel.metadata.create_all(engine, tables=TABLES)
+    return Shard(name, ReplicaPool(engine, create_async_engine(async_database_url(url)), []))
+
+
+def make_map(directory: str, names=(DEFAULT_SHARD, "east")) -> ShardMap:
+    shard_map = ShardMap([make_shard(directory, name) for name in names])
+    with Session(shard_map.directory) as db:
+        for user_id in range(1, 41):
+            db.add(User(id=user_id, email=f"user{user_id}@example.com", hashed_password="x"))
+        db.commit()
+    return shard_map
+
+
+def dispose(shard_map: ShardMap) -> None:
+    for shard in shard_map.shards.values():
+        shard.engine.dispose()
+
+
+def on_ring(shard_map: ShardMap, name: str) -> int:
+    """A user the ring places on the named shard"""
+    return next(user_id for user_id in range(1, 41) if shard_map.ring.shard_name(user_id) == name)
+
+
+def test_hash_ring_and_config():
+    before = HashRing(["default", "east"])
+    after = HashRing(["default", "east", "west"])
+    user_ids = range(1, 3001)
+    moved = [user_id for user_id in user_ids if before.shard_name(user_id) != after.shard_name(user_id)]
+    # Adding a third shard moves about a third of the users, all of them to it
+    assert 600 < len(moved) < 1400
+    assert {after.shard_name(user_id) for user_id in moved} == {"west"}
+
+    assert parse_shard_urls(" east=sqlite:///east.db, west=postgresql://db/west ") == [
+        ("east", "sqlite:///east.db"), ("west", "postgresql://db/west")
+    ]
+    for value in ("east", "default=sqlite:///x.db", "a=sqlite:///a.db,a=sqlite:///b.db"):
+        try:
+            parse_shard_urls(value)
+            assert False, f"accepted {value!r}"
+        except ValueError:
+            pass
+
+
+def test_users_are_placed_once():
+    service = TaskService()
+    with tempfile.TemporaryDirectory() as directory:
+        shard_map = make_map(directory)
+        legacy = on_ring(shard_map, "east")
+        # Written before sharding: stays on the default shard
+        with Session(shard_map.default.engine) as db:
+            service.create_task(db, TaskCreate(title="old"), legacy)
+        assert shard_map.shard_for(legacy).name == DEFAULT_SHARD
+
+        newcomer = next(user_id for user_id in range(legacy + 1, 41) if shard_map.ring.shard_name(user_id) == "east")
+        assert shard_map.shard_for(newcomer).name == "east"
+        with Session(shard_map.directory) as db:
+            assert dict(db.exec(select(UserShard.user_id, UserShard.shard)).all()) == {
+                legacy: DEFAULT_SHARD, newcomer: "east"
+            }
+        assert shard_map.cached(newcomer).name == "east"
+        shard_map.forget(newcomer)
+        assert shard_map.cached(newcomer) is None and shard_map.shard_for(newcomer).name == "east"
+        dispose(shard_map)
+
+
+def test_moving_a_user_keeps_their_tasks():
+    service = TaskService()
+    with tempfile.TemporaryDirectory() as directory:
+        shard_map = make_map(directory)
+        user_id, neighbour = on_ring(shard_map, "east"), on_ring(shard_map, DEFAULT_SHARD)
+        with Session(shard_map.default.engine) as db:
+            # Another user's tasks first, so the ids on the two shards differ
+            service.create_task(db, TaskCreate(title="neighbour"), neighbour)
+            parent = service.create_task(db, TaskCreate(title="trip", tags=["travel"]), user_id)
+            child = service.create_task(db, TaskCreate(
+                title="flights", tags=["travel"], parent_task_id=parent.id
+            ), user_id)
+            service.create_task(db, TaskCreate(title="hotel", parent_task_id=parent.id), user_id)
+            done = service.create_task(db, TaskCreate(title="old receipt", priority="low"), user_id)
+            service.mark_complete(db, child.id, user_id)
+            service.mark_complete(db, done.id, user_id)
+            TaskArchiver(pause_seconds=0).run_once(db, datetime.utcnow() + timedelta(days=100))
+            service.delete_task(db, service.create_task(db, TaskCreate(title="gone"), user_id).id, user_id)
+            stats = service.get_stats(db, user_id)
+            tree = service.get_task_tree_rows(db, parent.id, user_id)
+            cursor = service.get_version(db, user_id)[0]
+
+        rebalancer = ShardRebalancer(shard_map, pause_seconds=0, grace_seconds=0)
+        moves, _ = rebalancer.misplaced()
+        assert (user_id, DEFAULT_SHARD, "east") in moves and all(move[2] != DEFAULT_SHARD for move in moves)
+        assert rebalancer.run_once() == len(moves)
+        assert rebalancer.misplaced()[0] == []
+        assert shard_map.shard_for(user_id).name == "east"
+
+        east = shard_map.shards["east"]
+        with Session(east.engine) as db:
+            moved = service.get_task_tree_rows(db, db.exec(select(Task.id).where(Task.title == "trip")).one(), user_id)
+            # Same titles and rollups; only the ids differ
+            assert [row[0] for row in moved] == [row[0] for row in tree] == ["trip", "hotel"]
+            assert moved[0][-2:] == tree[0][-2:]
+            assert [task.title for task in service.get_tasks(db, user_id, tags=["travel"], include_archived=True)] == [
+                "trip", "flights"
+            ]
+            assert [task.title for task in service.get_tasks(db, user_id, include_archived=True, completed=True)] == [
+                "flights", "old receipt"
+            ]
+            assert service.get_stats(db, user_id) == stats
+            # Ids changed, so every earlier cursor is expired
+            try:
+                service.get_changes(db, user_id, cursor, 10)
+                assert False, "old cursor accepted"
+            except ExpiredCursorError:
+                pass
+            assert [task["title"] for task in service.get_changes(db, user_id, 0, 10)["changed"]] == ["trip", "hotel"]
+
+        with Session(shard_map.default.engine) as db:
+            assert service.get_tasks(db, user_id, include_archived=True) == []
+            assert [task.title for task in service.get_tasks(db, neighbour)] == ["neighbour"]
+            # The old copy keeps refusing writes from stale routing
+            try:
+                service.create_task(db, TaskCreate(title="lost"), user_id)
+                assert False, "write to the old shard accepted"
+            except UserMovedError as e:
+                assert e.user_id == user_id
+            db.rollback()
+
+        # Moving back reuses the frozen version row
+        assert rebalancer.move_users([(user_id, "east", DEFAULT_SHARD)]) == [user_id]
+        with Session(shard_map.default.engine) as db:
+            service.create_task(db, TaskCreate(title="back"), user_id)
+            assert len(service.get_tasks(db, user_id)) == 3
+        dispose(shard_map)
+
+
+def test_interrupted_moves_are_recovered():
+    service = TaskService()
+    with tempfile.TemporaryDirectory() as directory:
+        shard_map = make_map(directory)
+        stays = on_ring(shard_map, DEFAULT_SHARD)
+        with Session(shard_map.default.engine) as db:
+            service.create_task(db, TaskCreate(title="mine"), stays)
+            # Frozen by a run that died before copying
+            freeze_users(db, [stays], datetime.utcnow())
+            db.commit()
+            try:
+                service.update_task(db, 1, TaskUpdate(title="renamed"), stays)
+                assert False, "write to a frozen user accepted"
+            except UserMovedError:
+                db.rollback()
+
+        ShardRebalancer(shard_map, pause_seconds=0, grace_seconds=0).recover()
+        with Session(shard_map.default.engine) as db:
+            assert service.update_task(db, 1, TaskUpdate(title="renamed"), stays).title == "renamed"
+        dispose(shard_map)
+
+
+def test_chat_sessions_follow_the_shard_map():
+    with tempfile.TemporaryDirectory() as directory:
+        shard_map = make_map(directory)
+        with Session(shard_map.directory) as db:
+            user = db.get(User, on_ring(shard_map, "east"))
+
+        def bound_engine(dependency, shard: Shard):
+            sessions = dependency(current_user=user, shard=shard)
+            engine = next(sessions).get_bind()
+            sessions.close()
+            return engine
+
+        # Conversations stay with the users on the default shard, the assistant's task tools follow the user
+        assert get_directory_shard() is database.shard_map.default
+        assert bound_engine(get_conversation_db, shard_map.default) is shard_map.default.engine
+        assert bound_engine(get_write_db, shard_map.shard_for(user.id)) is shard_map.shards["east"].engine
+        dispose(shard_map)
+
+
+if __name__ == "__main__":
+    test_hash_ring_and_config()
+    test_users_are_placed_once()
+    test_moving_a_user_keeps_their_tasks()
+    test_interrupted_moves_are_recovered()
+    test_chat_sessions_follow_the_shard_map()
+    print("Sharding tests passed!")
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Test the SQLite production profile: connection PRAGMAs, read-only readers and the group-committing writer
+"""
+
+import asyncio
+import os
+import tempfile
+import threading
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel import SQLModel, Session, create_engine, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from shared.models.user import User
+from shared.models.task import (
+    Task, TaskCreate, TaskTag, UserTaskVersion, UserTaskCounter, TaskTombstone, TaskArchive
+)
+from phase5.backend.app.database import async_database_url
+from phase5.backend.app.read_replicas import ReplicaPool
+from phase5.backend.app.services.async_task_service import AsyncTaskService
+from phase5.backend.app.services.task_cache import TaskReadCache
+from phase5.backend.app.services.task_service import TaskService
+from phase5.backend.app.sqlite_profile import SQLiteWriter, apply_sqlite_profile, is_sqlite_file
+
+TABLES = [
+    User.__table__, Task.__table__, TaskTag.__table__, UserTaskVersion.__table__, UserTaskCounter.__table__,
+    TaskTombstone.__table__, TaskArchive.__table__
+]
+
+
+def make_engine(directory: str):
+    engine = create_engine(f"sqlite:///{os.path.join(directory, 'profile.db')}")
+    apply_sqlite_profile(engine, cache_size_kib=2048, busy_timeout_ms=1500)
+    SQLModel.metadata.create_all(engine, tables=TABLES)
+    with Session(engine) as db:
+        db.add(User(id=1, email="writer@example.com", hashed_password="x"))
+        db.commit()
+    return engine
+
+
+def test_connections_get_the_profile():
+    assert is_sqlite_file("sqlite:///./todo_app.db")
+    for url in ("sqlite://", "sqlite:///:memory:", "postgresql://db/todo"):
+        assert not is_sqlite_file(url)
+
+    with tempfile.TemporaryDirectory() as directory:
+        engine = make_engine(directory)
+        with engine.connect() as connection:
+            pragma = lambda name: connection.exec_driver_sql(f"PRAGMA {name}").scalar()
+            assert (pragma("journal_mode"), pragma("synchronous"), pragma("busy_timeout")) == ("wal", 1, 1500)
+            assert pragma("cache_size") == -2048 and pragma("query_only") == 0
+
+        reader = create_engine(engine.url)
+        apply_sqlite_profile(reader, read_only=True)
+        with reader.connect() as connection:
+            assert connection.execute(select(User.email)).scalar() == "writer@example.com"
+            try:
+                connection.execute(text("DELETE FROM users"))
+                assert False, "read-only connection wrote"
+            except OperationalError as e:
+                assert "readonly" in str(e)
+        reader.dispose()
+        engine.dispose()
+
+
+def test_writer_group_commits():
+    service = TaskService()
+    with tempfile.TemporaryDirectory() as directory:
+        engine = make_engine(directory)
+        writer = SQLiteWriter(engine, max_batch=8)
+        started, release = threading.Event(), threading.Event()
+
+        def blocking(db):
+            started.set()
+            release.wait()
+            return service.create_task(db, TaskCreate(title="first"), 1).title
+
+        first = writer.submit(blocking)
+        started.wait()
+        # Queued while the first batch runs: committed together, eight at a time
+        queued = [
+            writer.submit(service.create_task, TaskCreate(title=f"task {i}", parent_task_id=999 if i == 3 else None), 1)
+            for i in range(10)
+        ]
+        release.set()
+        assert first.result() == "first"
+        try:
+            queued[3].result()
+            assert False, "invalid parent accepted"
+        except ValueError:
+            pass
+        assert [queued[index].result().title for index in (0, 4, 9)] == ["task 0", "task 4", "task 9"]
+        writer.close()
+        assert writer.stats() == {
+            "queued": 0, "batches": 3, "jobs": 11, "failed_jobs": 1, "failed_batches": 0,
+            "largest_batch": 8, "average_batch": 3.67
+        }
+
+        # Only the failing job was rolled back
+        with Session(engine) as db:
+            assert len(db.exec(select(Task)).all()) == 10
+            assert service.get_version(db, 1)[0] == 10 and service.get_stats(db, 1).total == 10
+        try:
+            writer.submit(blocking)
+            assert False, "closed writer accepted a job"
+        except RuntimeError:
+            pass
+        engine.dispose()
+
+
+def test_async_writes_go_through_the_writer():
+    cache = TaskReadCache()
+    service = AsyncTaskService(cache=cache)
+    with tempfile.TemporaryDirectory() as directory:
+        engine = make_engine(directory)
+        url = async_database_url(str(engine.url))
+        primary_async, reader = create_async_engine(url), create_async_engine(url)
+        apply_sqlite_profile(reader.sync_engine, read_only=True)
+        pool = ReplicaPool(engine, primary_async, [], primary_reader=reader, writer=SQLiteWriter(engine))
+        assert pool.read_engine(1) is reader
+
+        async def scenario():
+            async with pool.write_session() as db:
+                created = await asyncio.gather(*(
+                    service.create_task(db, TaskCreate(title=f"task {i}"), 1) for i in range(20)
+                ))
+            async with AsyncSession(pool.read_engine(1)) as db:
+                assert len(await service.get_task_rows(db, 1)) == 20
+                async with pool.write_session() as write_db:
+                    await service.delete_task(write_db, created[0].id, 1)
+                # The cached list was invalidated once the delete committed
+                assert len(await service.get_task_rows(db, 1)) == 19
+            await reader.dispose()
+            await primary_async.dispose()
+
+        asyncio.run(scenario())
+        assert pool.writer.stats()["jobs"] == 21 and pool.writer.stats()["batches"] < 21
+        pool.writer.close()
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    test_connections_get_the_profile()
+    test_writer_group_commits()
+    test_async_writes_go_through_the_writer()
+    print("SQLite profile tests passed!")
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Test hot/cold tiering: moving completed tasks to tasks_archive and reading them back
+"""
+
+from datetime import datetime, timedelta
+from sqlmodel import Session, select
+from shared.models.task import Task, TaskCreate, TaskTag, TaskTombstone, TaskArchive
+from phase5.backend.app.services.task_service import TaskService
+from phase5.backend.app.services.task_archive import TaskArchiver
+from phase5.backend.app.services.task_counters import reconcile_task_counters
+from conftest import task_session
+
+LATER = datetime.utcnow() + timedelta(days=100)
+
+
+def seed(service: TaskService, db: Session):
+    """Five tasks of user 1, three of them completed, and one of user 2"""
+    parent = service.create_task(db, TaskCreate(title="plan trip", priority="high", tags=["travel"]), 1)
+    child = service.create_task(db, TaskCreate(
+        title="book flights", tags=["travel", "urgent"], due_date=datetime(2026, 3, 1), parent_task_id=parent.id
+    ), 1)
+    done = service.create_task(db, TaskCreate(title="pay rent", priority="low", tags=["home"]), 1)
+    service.create_task(db, TaskCreate(title="water plants", tags=["home"]), 1)
+    series = service.create_task(db, TaskCreate(
+        title="weekly review", due_date=datetime(2026, 1, 5), recurring=True, recurrence_pattern="weekly"
+    ), 1)
+    foreign = service.create_task(db, TaskCreate(title="foreign"), 2)
+    for task in (child, parent, done, series, foreign):
+        service.mark_complete(db, task.id, task.user_id)
+    return parent, child, done, series
+
+
+def titles(tasks):
+    return [task.title for task in tasks]
+
+
+def test_archiver_moves_completed_leaves_first(make_session):
+    service = TaskService()
+    with make_session() as db:
+        parent, child, done, series = seed(service, db)
+        stats = service.get_stats(db, 1)
+        version = service.get_version(db, 1)[0]
+        archiver = TaskArchiver(pause_seconds=0)
+
+        # Not old enough yet
+        assert archiver.run_once(db) == 0
+        # The parent still has a subtask in tasks, the series anchors its instances
+        assert archiver.archive_batch(db, LATER) == 3
+        assert set(db.exec(select(TaskArchive.id).where(TaskArchive.user_id == 1)).all()) == {child.id, done.id}
+        assert db.get(Task, parent.id).subtask_count == 0
+        assert archiver.run_once(db, LATER) == 1
+        assert db.get(Task, parent.id) is None and db.get(Task, series.id) is not None
+        assert db.exec(select(TaskTag).where(TaskTag.task_id.in_([child.id, done.id]))).all() == []
+
+        # Archiving changes list ETags but neither counters nor the delta sync
+        assert service.get_version(db, 1)[0] > version
+        assert service.get_stats(db, 1) == stats
+        reconcile_task_counters(db)
+        assert service.get_stats(db, 1) == stats
+        assert db.exec(select(TaskTombstone)).all() == []
+
+
+def test_include_archived_reads(make_session):
+    service = TaskService()
+    with make_session() as db:
+        parent, child, done, series = seed(service, db)
+        TaskArchiver(pause_seconds=0).run_once(db, LATER)
+
+        assert titles(service.get_tasks(db, 1)) == ["water plants", "weekly review"]
+        everything = service.get_tasks(db, 1, include_archived=True)
+        assert titles(everything) == ["plan trip", "book flights", "pay rent", "water plants", "weekly review"]
+        assert everything[1].parent_task_id == parent.id and everything[1].tags == ["travel", "urgent"]
+        assert titles(service.get_tasks(db, 1, include_archived=True, sort_by="priority", sort_order="desc")) == [
+            "plan trip", "weekly review", "water plants", "book flights", "pay rent"
+        ]
+        assert titles(service.get_tasks(db, 1, include_archived=True, tags=["travel", "urgent"])) == ["book flights"]
+        assert titles(service.get_tasks(db, 1, include_archived=True, tags=["home"])) == ["pay rent", "water plants"]
+        assert titles(service.get_tasks(db, 1, include_archived=True, search_query="rent")) == ["pay rent"]
+        assert [row[0] for row in service.get_task_rows(db, 1, include_archived=True, completed=True)] == [
+            "plan trip", "book flights", "pay rent", "weekly review"
+        ]
+
+        # Pages run across both tables
+        seen, cursor = [], None
+        while True:
+            page, cursor = service.get_tasks_page(db, 1, 2, cursor, True, sort_by="created_at", sort_order="desc")
+            seen += titles(page)
+            if cursor is None:
+                break
+        assert seen == list(reversed(titles(everything)))
+
+        exported = service.iter_export_rows(db, service.export_statement(db, 1, include_archived=True))
+        assert [row["title"] for row in exported] == titles(everything)
+
+        assert service.get_task(db, child.id, 1) is None
+        assert service.get_task(db, child.id, 1, include_archived=True).title == "book flights"
+        assert service.get_task(db, child.id, 2, include_archived=True) is None
+
+        calendar = service.get_calendar(db, 1, datetime(2026, 2, 20), datetime(2026, 3, 10))
+        assert ("book flights", False) in [(entry["title"], entry["virtual"]) for entry in calendar]
+
+
+def test_delete_archived_task(make_session):
+    service = TaskService()
+    with make_session() as db:
+        _, child, _, _ = seed(service, db)
+        TaskArchiver(pause_seconds=0).run_once(db, LATER)
+        before = service.get_stats(db, 1)
+
+        assert not service.delete_task(db, child.id, 2)
+        assert service.delete_task(db, child.id, 1)
+        assert db.get(TaskArchive, child.id) is None
+        assert service.get_stats(db, 1).completed == before.completed - 1
+        cursor = service.get_version(db, 1)[0] - 1
+        assert service.get_changes(db, 1, cursor, 10)["deleted"] == [child.id]
+
+
+def test_deleting_a_parent_unlinks_its_archived_children(make_session):
+    service = TaskService()
+    with make_session() as db:
+        parent, child, _, _ = seed(service, db)
+        # Archives the completed child while the parent stays in tasks
+        TaskArchiver(pause_seconds=0).archive_batch(db, LATER)
+        assert db.get(TaskArchive, child.id).parent_task_id == parent.id
+
+        assert service.delete_task(db, parent.id, 1)
+        version = service.get_version(db, 1)[0]
+        db.expire_all()
+        archived = db.get(TaskArchive, child.id)
+        assert (archived.parent_task_id, archived.change_seq) == (None, version)
+        assert service.get_task(db, child.id, 1, include_archived=True).parent_task_id is None
+        listed = {task.id: task for task in service.get_tasks(db, 1, include_archived=True)}
+        assert parent.id not in listed and listed[child.id].parent_task_id is None
+
+
+def test_archived_ids_are_not_reused(make_session):
+    service = TaskService()
+    archiver = TaskArchiver(pause_seconds=0)
+    with make_session() as db:
+        service.create_task(db, TaskCreate(title="open"), 1)
+        top = service.create_task(db, TaskCreate(title="done"), 1)
+        service.mark_complete(db, top.id, 1)
+        assert archiver.run_once(db, LATER) == 1
+
+        # The highest id left tasks for the archive; the next task gets a new one
+        again = service.create_task(db, TaskCreate(title="done again"), 1)
+        assert again.id > top.id
+        service.mark_complete(db, again.id, 1)
+        assert archiver.run_once(db, LATER) == 1
+        listed = [task.id for task in service.get_tasks(db, 1, include_archived=True)]
+        assert sorted(listed) == sorted(set(listed)) and len(listed) == 3
+        assert service.get_task(db, top.id, 1, include_archived=True).title == "done"
+
+
+if __name__ == "__main__":
+    test_archiver_moves_completed_leaves_first(task_session)
+    test_include_archived_reads(task_session)
+    test_delete_archived_task(task_session)
+    test_deleting_a_parent_unlinks_its_archived_children(task_session)
+    test_archived_ids_are_not_reused(task_session)
+    print("Task archive tests passed!")
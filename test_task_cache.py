@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Test the per-user task read cache: invalidation, LRU/TTL/memory bounds and metrics
+"""
+
+import time
+from shared.models.task import TaskCreate
+from phase5.backend.app.services.task_service import TaskService
+from phase5.backend.app.services.task_cache import TaskReadCache
+from conftest import task_session
+
+
+def test_writes_invalidate_the_users_cached_reads(make_session):
+    service = TaskService(cache=TaskReadCache(max_entries=10))
+    with make_session() as db:
+        service.create_task(db, TaskCreate(title="first"), 1)
+        assert len(service.get_task_rows(db, 1, tags=["a", "b"])) == 0
+        assert len(service.get_task_rows(db, 1, tags=["b", "a"])) == 0  # same normalized key
+        assert len(service.get_task_rows(db, 1)) == 1
+        assert len(service.get_task_rows(db, 1)) == 1
+        assert (service.cache.hits, service.cache.misses) == (2, 2)
+
+        task = service.create_task(db, TaskCreate(title="second"), 1)
+        assert len(service.get_task_rows(db, 1)) == 2
+        service.mark_complete(db, task.id, 1)
+        assert len(service.get_task_rows(db, 1, completed=True)) == 1
+        service.bulk_delete_tasks(db, [task.id], 1)
+        assert len(service.get_task_rows(db, 1)) == 1
+
+
+def test_writes_from_other_processes_are_seen(make_session):
+    service = TaskService(cache=TaskReadCache(max_entries=10, ttl=3600))
+    # A background job (scheduler, materializer, archiver) writing with its own service and no cache
+    job = TaskService()
+    with make_session() as db:
+        service.create_task(db, TaskCreate(title="first"), 1)
+        assert len(service.get_task_rows(db, 1)) == 1
+        job.create_task(db, TaskCreate(title="from a job"), 1)
+        assert len(service.get_task_rows(db, 1)) == 2
+        assert len(service.get_task_rows(db, 1)) == 2
+        assert (service.cache.hits, service.cache.misses) == (1, 2)
+
+
+def test_rows_match_the_version_of_their_etag(make_session):
+    # Two workers, each with its own cache, serving GET /tasks for the same user
+    first, second = TaskService(cache=TaskReadCache(ttl=3600)), TaskService(cache=TaskReadCache(ttl=3600))
+    with make_session() as db:
+        first.create_task(db, TaskCreate(title="one"), 1)
+        for service in (first, second):
+            version = service.get_version(db, 1)[0]
+            assert (version, len(service.get_task_rows(db, 1, version=version))) == (1, 1)
+
+        first.create_task(db, TaskCreate(title="two"), 1)
+        version = second.get_version(db, 1)[0]
+        assert (version, len(second.get_task_rows(db, 1, version=version))) == (2, 2)
+        rows, _ = second.get_task_rows_page(db, 1, 10, version=version)
+        assert len(rows) == 2
+
+
+def test_cache_bounds_and_ttl():
+    cache = TaskReadCache(max_entries=2, ttl=60)
+    for name in ("a", "b", "c"):
+        cache.get_or_load(cache.key(1, name), lambda: name)
+    assert cache.stats()["entries"] == 2 and cache.evictions == 1
+    assert cache.get_or_load(cache.key(1, "a"), lambda: "reloaded") == "reloaded"
+
+    cache = TaskReadCache(max_entries=100, max_bytes=2000, ttl=60)
+    for i in range(20):
+        cache.get_or_load(cache.key(1, "rows", page=i), lambda: [("x" * 100,)])
+    assert 0 < cache.stats()["bytes"] <= 2000 and cache.evictions > 0
+
+    cache = TaskReadCache(ttl=0.01)
+    cache.get_or_load(cache.key(1, "list"), lambda: "old")
+    time.sleep(0.02)
+    assert cache.get_or_load(cache.key(1, "list"), lambda: "new") == "new"
+
+
+if __name__ == "__main__":
+    test_writes_invalidate_the_users_cached_reads(task_session)
+    test_writes_from_other_processes_are_seen(task_session)
+    test_rows_match_the_version_of_their_etag(task_session)
+    test_cache_bounds_and_ttl()
+    print("Task cache tests passed!")
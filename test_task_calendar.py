@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Test the calendar view: recurrence expansion and its merge with stored tasks
+"""
+
+import random
+from datetime import datetime, timedelta
+from shared.models.task import Task, TaskCreate, TaskUpdate
+from phase5.backend.app.services import task_calendar
+from phase5.backend.app.services.task_calendar import expand_occurrences
+from phase5.backend.app.services.task_recurrence import occurrence
+from phase5.backend.app.services.task_service import TaskService
+from phase5.backend.app.services.recurrence_materializer import RecurrenceMaterializer
+from conftest import task_session
+
+
+def expand_each(anchors, patterns, start, end):
+    numpy, task_calendar.np = task_calendar.np, None
+    try:
+        return expand_occurrences(anchors, patterns, start, end)
+    finally:
+        task_calendar.np = numpy
+
+
+def test_expansion_matches_the_calendar_engine():
+    rng = random.Random(7)
+    patterns = ["daily", "weekly", "monthly", "yearly", None, "fortnightly"]
+    anchors, series_patterns = [], []
+    for _ in range(300):
+        anchors.append(datetime(2020, 1, 1) + timedelta(minutes=rng.randrange(7 * 365 * 24 * 60)))
+        series_patterns.append(rng.choice(patterns))
+    anchors[:3] = [datetime(2024, 1, 31, 10), datetime(2024, 2, 29, 8), datetime(2025, 12, 31)]
+    series_patterns[:3] = ["monthly", "yearly", "monthly"]
+    start, end = datetime(2025, 11, 15, 12), datetime(2026, 11, 15, 12)
+
+    expected = sorted(zip(*expand_each(anchors, series_patterns, start, end)))
+    assert sorted(zip(*expand_occurrences(anchors, series_patterns, start, end))) == expected
+
+    jan31 = [time for position, time in expected if position == 0]
+    assert jan31[:4] == [occurrence(anchors[0], "monthly", n) for n in range(22, 26)]
+    assert jan31[:4] == [
+        datetime(2025, 11, 30, 10), datetime(2025, 12, 31, 10), datetime(2026, 1, 31, 10), datetime(2026, 2, 28, 10)
+    ]
+    assert [time for position, time in expected if position == 1] == [datetime(2026, 2, 28, 8)]
+    assert all(start <= time <= end for _, time in expected)
+    assert expand_occurrences([], [], start, end) == ([], [])
+
+
+def test_calendar_merges_stored_and_virtual_occurrences(make_session):
+    service = TaskService()
+    with make_session() as db:
+        rent = service.create_task(db, TaskCreate(
+            title="rent", tags=["home"], due_date=datetime(2026, 1, 31, 9), recurring=True, recurrence_pattern="monthly"
+        ), 1)
+        dentist = service.create_task(db, TaskCreate(title="dentist", due_date=datetime(2026, 3, 10, 15)), 1)
+        service.create_task(db, TaskCreate(title="outside", due_date=datetime(2026, 7, 1)), 1)
+
+        # Materialize the February and March occurrences, then move March's
+        # instance out of the range: it still replaces its occurrence
+        RecurrenceMaterializer(horizon=timedelta(days=40)).run_once(db, datetime(2026, 2, 20))
+        march = db.exec(Task.__table__.select().where(Task.occurrence_date == datetime(2026, 3, 31, 9))).first()
+        service.update_task(db, march.id, TaskUpdate(due_date=datetime(2026, 8, 1)), 1)
+        service.mark_complete(db, march.id - 1, 1)
+
+        entries = service.get_calendar(db, 1, datetime(2026, 1, 1), datetime(2026, 5, 31, 23, 59))
+        assert [(entry["title"], entry["due_date"], entry["virtual"]) for entry in entries] == [
+            ("rent", datetime(2026, 1, 31, 9), False),
+            ("rent", datetime(2026, 2, 28, 9), False),
+            ("dentist", datetime(2026, 3, 10, 15), False),
+            ("rent", datetime(2026, 4, 30, 9), True),
+            ("rent", datetime(2026, 5, 31, 9), True),
+        ]
+        stored, virtual = entries[1], entries[3]
+        assert (stored["id"], stored["completed"], stored["series_id"]) == (march.id - 1, True, rent.id)
+        assert virtual["id"] is None and virtual["tags"] == ["home"]
+        assert (virtual["series_id"], virtual["parent_task_id"]) == (rent.id, rent.id)
+        assert virtual["occurrence_date"] == virtual["due_date"]
+        assert dentist.id in [entry["id"] for entry in entries]
+
+        for start, end in ((datetime(2026, 2, 1), datetime(2026, 1, 1)), (datetime(2026, 1, 1), datetime(2027, 6, 1))):
+            try:
+                service.get_calendar(db, 1, start, end)
+                assert False, "invalid range accepted"
+            except ValueError:
+                pass
+
+
+if __name__ == "__main__":
+    test_expansion_matches_the_calendar_engine()
+    test_calendar_merges_stored_and_virtual_occurrences(task_session)
+    print("Task calendar tests passed!")
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Test delta sync: change sequences, tombstones and the pages of GET /tasks/changes
+"""
+
+import json
+from datetime import datetime, timedelta
+from sqlmodel import Session, select
+from shared.models.task import Task, TaskCreate, TaskUpdate, UserTaskVersion
+from phase5.backend.app.services.task_service import TaskService
+from phase5.backend.app.services.task_changes import ExpiredCursorError, prune_task_tombstones
+from phase5.backend.app.services.task_import import TaskImporter, parse_ndjson
+from phase5.backend.app.services.reminder_scheduler import ReminderScheduler
+from phase5.backend.app.services.recurrence_materializer import RecurrenceMaterializer
+from conftest import task_session
+
+NOW = datetime(2026, 10, 17, 9, 0)
+
+
+def sync(service: TaskService, db: Session, since: int, limit: int = 100):
+    """Follow has_more to the end; returns (changed titles by id, deleted ids, cursor, pages)"""
+    changed, deleted, pages = {}, set(), 0
+    while True:
+        page = service.get_changes(db, 1, since, limit)
+        pages += 1
+        for record in page["changed"]:
+            changed[record["id"]] = record["title"]
+            deleted.discard(record["id"])
+        for task_id in page["deleted"]:
+            changed.pop(task_id, None)
+            deleted.add(task_id)
+        since = page["cursor"]
+        if not page["has_more"]:
+            return changed, deleted, since, pages
+
+
+def test_every_write_is_reported_once(make_session):
+    service = TaskService()
+    with make_session() as db:
+        parent = service.create_task(db, TaskCreate(title="parent"), 1)
+        child = service.create_task(db, TaskCreate(title="child", parent_task_id=parent.id), 1)
+        kept = service.create_task(db, TaskCreate(title="kept", due_date=NOW + timedelta(minutes=5)), 1)
+        service.create_task(db, TaskCreate(title="foreign"), 2)
+        changed, deleted, cursor, _ = sync(service, db, 0)
+        assert changed == {parent.id: "parent", child.id: "child", kept.id: "kept"} and not deleted
+        assert cursor == service.get_version(db, 1)[0] == 3
+        assert db.get(Task, kept.id).change_seq == 3
+
+        # Deleting the parent orphans the child, which changes too
+        service.delete_task(db, parent.id, 1)
+        service.update_task(db, kept.id, TaskUpdate(title="renamed"), 1)
+        changed, deleted, cursor, _ = sync(service, db, cursor)
+        assert changed == {child.id: "child", kept.id: "renamed"} and deleted == {parent.id}
+
+        # Writes outside TaskService stamp change_seq as well
+        assert [row.id for row in ReminderScheduler().claim(db, [kept.id], NOW)] == [kept.id]
+        db.commit()
+        series = service.create_task(db, TaskCreate(
+            title="daily", due_date=NOW, recurring=True, recurrence_pattern="daily"
+        ), 1)
+        RecurrenceMaterializer(horizon=timedelta(days=1)).run_once(db, NOW)
+        TaskImporter(db, 1).run(parse_ndjson([json.dumps({"title": "imported"})]))
+        service.bulk_delete_tasks(db, [child.id], 1)
+        changed, deleted, cursor, _ = sync(service, db, cursor)
+        assert sorted(changed.values()) == ["daily", "daily", "imported", "renamed"]
+        assert deleted == {child.id} and series.id in changed
+        assert sync(service, db, cursor)[:3] == ({}, set(), cursor)
+
+
+def test_pages_end_at_write_boundaries(make_session):
+    service = TaskService()
+    with make_session() as db:
+        service.bulk_create_tasks(db, [TaskCreate(title=f"bulk {n}") for n in range(5)], 1)
+        singles = [service.create_task(db, TaskCreate(title=f"single {n}"), 1) for n in range(3)]
+        service.bulk_delete_tasks(db, [singles[0].id, singles[1].id], 1)
+
+        # The bulk write alone exceeds the limit and comes whole
+        first = service.get_changes(db, 1, 0, 2)
+        assert len(first["changed"]) == 5 and first["cursor"] == 1 and first["has_more"]
+        # Deleted before this sync, the first two singles only show up as deletes
+        page = service.get_changes(db, 1, first["cursor"], 2)
+        assert [record["title"] for record in page["changed"]] == ["single 2"] and page["deleted"] == []
+        assert (page["cursor"], page["has_more"]) == (4, True)
+        page = service.get_changes(db, 1, page["cursor"], 2)
+        assert page["deleted"] == [singles[0].id, singles[1].id] and not page["has_more"]
+
+        changed, deleted, _, pages = sync(service, db, 1, limit=1)
+        assert sorted(changed.values()) == ["single 2"] and deleted == {singles[0].id, singles[1].id}
+        assert pages == 2
+
+
+def test_unusable_cursors(make_session):
+    service = TaskService()
+    with make_session() as db:
+        assert service.get_changes(db, 1, 0, 10) == {"changed": [], "deleted": [], "cursor": 0, "has_more": False}
+        task = service.create_task(db, TaskCreate(title="a"), 1)
+        service.delete_task(db, task.id, 1)
+        service.create_task(db, TaskCreate(title="b"), 1)
+        for since in (-1, 4):
+            try:
+                service.get_changes(db, 1, since, 10)
+                assert False, "unknown cursor accepted"
+            except ValueError:
+                pass
+
+        assert prune_task_tombstones(db, datetime.utcnow() - timedelta(days=1)) == 0
+        assert prune_task_tombstones(db, datetime.utcnow() + timedelta(seconds=1)) == 1
+        try:
+            service.get_changes(db, 1, 1, 10)
+            assert False, "expired cursor accepted"
+        except ExpiredCursorError:
+            pass
+        # A cursor after the pruned deletes, and a full sync, still work
+        assert [record["title"] for record in service.get_changes(db, 1, 2, 10)["changed"]] == ["b"]
+        assert [record["title"] for record in service.get_changes(db, 1, 0, 10)["changed"]] == ["b"]
+        assert db.exec(select(UserTaskVersion.pruned_seq).where(UserTaskVersion.user_id == 1)).one() == 2
+
+
+if __name__ == "__main__":
+    test_every_write_is_reported_once(task_session)
+    test_pages_end_at_write_boundaries(task_session)
+    test_unusable_cursors(task_session)
+    print("Task changes tests passed!")
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Test subtree fetching and the incrementally maintained subtask rollups
+"""
+
+import random
+from sqlalchemy import event
+from sqlmodel import Session
+from shared.models.task import TaskCreate, TaskUpdate
+from phase5.backend.app.services.task_service import TaskService
+from phase5.backend.app.services.task_hierarchy import rebuild_rollups
+from phase5.backend.app.services.task_serialization import task_tree
+from conftest import task_session
+
+
+def assert_rollups_consistent(db: Session):
+    # Recomputing from the parent links must not find anything to fix
+    assert rebuild_rollups(db, 1) == 0
+    db.rollback()
+
+
+def test_tree_of_thousands_of_nodes_in_one_query(make_session):
+    service = TaskService()
+    with make_session() as db:
+        root = service.create_task(db, TaskCreate(title="project"), 1)
+        level = [root.id]
+        for depth in range(12):  # 12 levels below the root, 1534 nodes
+            result = service.bulk_create_tasks(db, [
+                TaskCreate(title=f"{depth}-{i}", parent_task_id=parent, completed=i % 3 == 0)
+                for parent in level[:300] for i in range(2 if depth < 8 else 1)
+            ], 1)
+            level = [item.id for item in result.results]
+
+        queries = []
+        event.listen(db.get_bind(), "before_cursor_execute", lambda *args: queries.append(args[2]))
+        tree = task_tree(service.get_task_tree_rows(db, root.id, 1))
+        assert len(queries) == 1
+
+        def walk(node, depth=0):
+            total = sum(1 + child["subtasks_total"] for child in node["children"])
+            done = sum(child["completed"] + child["subtasks_completed"] for child in node["children"])
+            assert (node["subtasks_total"], node["subtasks_completed"]) == (total, done)
+            return max([depth] + [walk(child, depth + 1) for child in node["children"]])
+
+        assert walk(tree) == 12
+        assert tree["subtasks_total"] == 1534
+        assert service.get_task_tree_rows(db, 999999, 1) == []
+        assert_rollups_consistent(db)
+
+
+def test_rollups_follow_every_kind_of_write(make_session):
+    service = TaskService()
+    rng = random.Random(7)
+    with make_session() as db:
+        ids = [service.create_task(db, TaskCreate(title="root"), 1).id]
+        for i in range(40):
+            ids.append(service.create_task(db, TaskCreate(title=f"t{i}", parent_task_id=rng.choice(ids)), 1).id)
+        assert_rollups_consistent(db)
+
+        for step in range(60):
+            task_id = rng.choice(ids)
+            action = step % 6
+            if action == 0:
+                service.mark_complete(db, task_id, 1)
+            elif action == 1:
+                service.update_task(db, task_id, TaskUpdate(completed=False), 1)
+            elif action == 2:
+                try:
+                    service.update_task(db, task_id, TaskUpdate(parent_task_id=rng.choice(ids + [None])), 1)
+                except ValueError:
+                    pass  # would create a cycle
+            elif action == 3:
+                service.bulk_update_tasks(db, rng.sample(ids, 4), TaskUpdate(parent_task_id=ids[0]), 1, atomic=False)
+            elif action == 4:
+                service.bulk_complete_tasks(db, rng.sample(ids, 5), 1)
+            elif len(ids) > 10:
+                doomed = rng.sample(ids, 3)
+                if step % 2:
+                    service.bulk_delete_tasks(db, doomed, 1)
+                else:
+                    service.delete_task(db, doomed[0], 1)
+                    doomed = doomed[:1]
+                ids = [i for i in ids if i not in doomed]
+            assert_rollups_consistent(db)
+
+
+def test_moves_into_own_subtree_are_rejected(make_session):
+    service = TaskService()
+    with make_session() as db:
+        parent = service.create_task(db, TaskCreate(title="parent"), 1)
+        child = service.create_task(db, TaskCreate(title="child", parent_task_id=parent.id), 1)
+        try:
+            service.update_task(db, parent.id, TaskUpdate(parent_task_id=child.id), 1)
+            assert False, "moving a task under its own subtask must fail"
+        except ValueError:
+            pass
+        result = service.bulk_update_tasks(db, [parent.id], TaskUpdate(parent_task_id=child.id), 1)
+        assert not result.committed and result.results[0].status == "invalid"
+        try:
+            service.create_task(db, TaskCreate(title="stray", parent_task_id=12345), 1)
+            assert False, "a missing parent must fail"
+        except ValueError:
+            pass
+
+
+if __name__ == "__main__":
+    test_tree_of_thousands_of_nodes_in_one_query(task_session)
+    test_rollups_follow_every_kind_of_write(task_session)
+    test_moves_into_own_subtree_are_rejected(task_session)
+    print("Task hierarchy tests passed!")
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Test the batched task importer: validation, tags, parent links and resuming
+"""
+
+import io
+import json
+import os
+import tempfile
+from datetime import datetime
+from sqlmodel import select
+from shared.models.task import Task, TaskTag, TaskTombstone, TaskArchive
+from phase5.backend.app.services.task_import import (
+    TaskImporter, ImportCheckpoint, copy_csv, parse_csv, parse_ndjson
+)
+from conftest import task_session
+
+
+def ndjson(records):
+    return io.StringIO("\n".join(r if isinstance(r, str) else json.dumps(r) for r in records))
+
+
+def test_import_links_parents_tags_and_reports_bad_rows(make_session):
+    records = ndjson([
+        {"id": "c", "title": "child", "parent_task_id": "p", "tags": ["work"]},
+        {"id": "p", "title": "parent", "priority": "urgent", "recurring": True, "recurrence_pattern": "weekly"},
+        {"title": "  "},
+        "{not json",
+    ])
+    with make_session() as db:
+        summary = TaskImporter(db, 1, batch_size=2).run(parse_ndjson(records))
+        assert (summary.imported, summary.failed) == (2, 2)
+        assert [error["line"] for error in summary.errors] == [3, 4]
+
+        tasks = {task.title: task for task in db.exec(select(Task)).all()}
+        assert tasks["child"].parent_task_id == tasks["parent"].id
+        assert tasks["parent"].priority_rank == 4
+        assert tasks["parent"].recurrence_pattern == "weekly"
+        assert db.exec(select(TaskTag.tag).where(TaskTag.task_id == tasks["child"].id)).all() == ["work"]
+
+        csv_rows = io.StringIO('title,tags,completed\nexported,"[""a"", ""b""]",true\n')
+        summary = TaskImporter(db, 1).run(parse_csv(csv_rows))
+        exported = db.exec(select(Task).where(Task.title == "exported")).one()
+        assert summary.imported == 1 and exported.completed and json.loads(exported.tags) == ["a", "b"]
+
+
+def test_import_resumes_after_last_committed_batch(make_session):
+    data = [{"id": i, "title": f"task {i}", "parent_task_id": i - 1 if i else None} for i in range(7)]
+
+    class Interrupted(Exception):
+        pass
+
+    def interrupt(summary):
+        if summary.last_line == 4:
+            raise Interrupted
+
+    with make_session() as db, tempfile.TemporaryDirectory() as tmp:
+        checkpoint = ImportCheckpoint(os.path.join(tmp, "import.checkpoint"))
+        try:
+            TaskImporter(db, 1, batch_size=2, checkpoint=checkpoint, on_progress=interrupt).run(
+                parse_ndjson(ndjson(data))
+            )
+        except Interrupted:
+            pass
+
+        summary = TaskImporter(db, 1, batch_size=2, checkpoint=checkpoint).run(parse_ndjson(ndjson(data)))
+        assert summary.imported == 7
+
+        tasks = db.exec(select(Task).order_by(Task.id)).all()
+        assert [task.title for task in tasks] == [f"task {i}" for i in range(7)]
+        assert [task.parent_task_id for task in tasks[1:]] == [task.id for task in tasks[:-1]]
+
+
+def test_import_skips_archived_and_deleted_ids(make_session):
+    with make_session() as db:
+        db.add(TaskArchive(id=50, user_id=1, title="archived", created_at=datetime(2026, 1, 1)))
+        db.add(TaskTombstone(user_id=1, task_id=60, change_seq=1))
+        db.commit()
+
+        summary = TaskImporter(db, 1).run(parse_ndjson(ndjson([{"title": "a"}, {"title": "b"}])))
+        assert summary.imported == 2
+        assert db.exec(select(Task.id).order_by(Task.id)).all() == [61, 62]
+
+        # Later inserts continue after the imported ids
+        task = Task(title="c", user_id=1)
+        db.add(task)
+        db.commit()
+        assert task.id == 63
+
+
+def test_copy_csv_leaves_only_none_unquoted():
+    # COPY reads unquoted empty fields as NULL; text that looks like a NULL marker stays text
+    assert copy_csv([(1, None, r"\N", "", True)]).read() == '"1",,"\\N","","True"\r\n'
+
+
+if __name__ == "__main__":
+    test_import_links_parents_tags_and_reports_bad_rows(task_session)
+    test_import_resumes_after_last_committed_batch(task_session)
+    test_import_skips_archived_and_deleted_ids(task_session)
+    test_copy_csv_leaves_only_none_unquoted()
+    print("Task import tests passed!")
@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""
+Test keyset pagination of the task list for every sort key
+"""
+
+from datetime import datetime, timedelta
+from shared.models.task import TaskCreate
+from phase5.backend.app.services.task_service import TaskService
+from conftest import task_session
+
+
+def test_pages_cover_the_full_ordering_for_every_sort(make_session):
+    service = TaskService()
+    priorities = ["low", "medium", "high", "urgent", None]
+
+    with make_session() as db:
+        for i in range(23):
+            # Repeated values and NULLs exercise the id tie-breaker and NULL handling
+            due_date = datetime(2026, 1, 1) + timedelta(days=i % 4) if i % 3 else None
+            service.create_task(
+                db, TaskCreate(title=f"task {i}", priority=priorities[i % 5], due_date=due_date), 1
+            )
+
+        for sort_by in ["created_at", "due_date", "priority"]:
+            for sort_order in ["asc", "desc"]:
+                expected = [t.id for t in service.get_tasks(db, 1, sort_by=sort_by, sort_order=sort_order)]
+                paged, cursor = [], None
+                while True:
+                    tasks, cursor = service.get_tasks_page(
+                        db, 1, limit=4, cursor=cursor, sort_by=sort_by, sort_order=sort_order
+                    )
+                    paged.extend(t.id for t in tasks)
+                    if cursor is None:
+                        break
+                assert paged == expected, (sort_by, sort_order)
+
+
+if __name__ == "__main__":
+    test_pages_cover_the_full_ordering_for_every_sort(task_session)
+    print("Pagination tests passed!")
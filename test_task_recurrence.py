@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Test the recurrence calendar and the materializer that generates recurring task instances
+"""
+
+import asyncio
+import os
+import tempfile
+from datetime import datetime, timedelta
+from fastapi import BackgroundTasks
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel import SQLModel, Session, create_engine, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from shared.models.user import User
+from shared.models.task import (
+    Task, TaskCreate, TaskUpdate, TaskTag, UserTaskVersion, UserTaskCounter, TaskTombstone, TaskArchive
+)
+from phase5.backend.app.api.routes.tasks import TaskBulkIdsRequest, bulk_complete_tasks, mark_task_complete
+from phase5.backend.app.database import async_database_url
+from phase5.backend.app.read_replicas import ReplicaPool
+from phase5.backend.app.sharding import Shard
+from phase5.backend.app.services.task_events import event_shard, task_events
+from phase5.backend.app.services.task_service import TaskService
+from phase5.backend.app.services.task_counters import reconcile_task_counters
+from phase5.backend.app.services.task_recurrence import occurrence, occurrences
+from phase5.backend.app.services.recurrence_materializer import RecurrenceMaterializer
+from conftest import task_session
+
+NOW = datetime(2026, 10, 17, 9, 0)
+
+
+def instance_dates(db: Session, series_id: int) -> list:
+    return db.exec(
+        select(Task.due_date).where(Task.series_id == series_id).order_by(Task.occurrence_date)
+    ).all()
+
+
+def test_calendar_month_ends():
+    jan31 = datetime(2026, 1, 31, 8, 30)
+    assert [occurrence(jan31, "monthly", n) for n in range(1, 4)] == [
+        datetime(2026, 2, 28, 8, 30), datetime(2026, 3, 31, 8, 30), datetime(2026, 4, 30, 8, 30)
+    ]
+    leap_day = datetime(2024, 2, 29)
+    assert [occurrence(leap_day, "yearly", n) for n in (1, 4)] == [datetime(2025, 2, 28), datetime(2028, 2, 29)]
+    assert TaskService()._calculate_next_occurrence(jan31, "monthly") == datetime(2026, 2, 28, 8, 30)
+    assert TaskService()._calculate_next_occurrence(datetime(2026, 12, 31), "monthly") == datetime(2027, 1, 31)
+
+    # First occurrence on or after start, never the anchor itself
+    series = occurrences(jan31, "monthly", datetime(2026, 4, 30, 9, 0))
+    assert [next(series), next(series)] == [datetime(2026, 5, 31, 8, 30), datetime(2026, 6, 30, 8, 30)]
+    assert next(occurrences(jan31, "weekly", jan31)) == datetime(2026, 2, 7, 8, 30)
+    assert next(occurrences(jan31, None, datetime(2026, 3, 1))) == datetime(2026, 3, 1, 8, 30)
+
+
+def test_materializer_fills_the_horizon_once(make_session):
+    service = TaskService()
+    with make_session() as db:
+        daily = service.create_task(db, TaskCreate(
+            title="standup", tags=["work"], priority="high",
+            due_date=NOW - timedelta(days=3), recurring=True, recurrence_pattern="daily"
+        ), 1)
+        monthly = service.create_task(db, TaskCreate(
+            title="rent", due_date=datetime(2026, 8, 31, 9, 0), recurring=True, recurrence_pattern="monthly"
+        ), 1)
+        service.create_task(db, TaskCreate(title="undated", recurring=True, recurrence_pattern="daily"), 1)
+
+        materializer = RecurrenceMaterializer(horizon=timedelta(days=14), chunk_size=1)
+        assert materializer.run_once(db, NOW) == 15 + 1
+        # Occurrences before now are skipped; today's 09:00 is the first
+        assert instance_dates(db, daily.id)[0] == NOW
+        assert instance_dates(db, daily.id)[-1] == NOW + timedelta(days=14)
+        assert instance_dates(db, monthly.id) == [datetime(2026, 10, 31, 9, 0)]
+        assert db.get(Task, monthly.id).next_occurrence_at == datetime(2026, 11, 30, 9, 0)
+        assert materializer.run_once(db, NOW) == 0
+
+        # The next day only adds the occurrence that entered the horizon
+        assert materializer.run_once(db, NOW + timedelta(days=1)) == 1
+        instance = db.exec(select(Task).where(Task.series_id == daily.id)).first()
+        assert (instance.parent_task_id, instance.priority, instance.recurring) == (daily.id, "high", False)
+        assert db.exec(select(TaskTag.tag).where(TaskTag.task_id == instance.id)).all() == ["work"]
+        assert db.get(Task, daily.id).subtask_count == 16
+
+        stats = service.get_stats(db, 1)
+        assert stats.total == 3 + 17
+        reconcile_task_counters(db)
+        assert service.get_stats(db, 1) == stats
+
+        # Moving the anchor starts the series over; existing instances stay
+        service.update_task(db, monthly.id, TaskUpdate(due_date=datetime(2026, 10, 20, 9, 0)), 1)
+        assert db.get(Task, monthly.id).next_occurrence_at is None
+        materializer.run_once(db, NOW + timedelta(days=20))
+        assert instance_dates(db, monthly.id) == [datetime(2026, 10, 31, 9, 0), datetime(2026, 11, 20, 9, 0)]
+
+
+def test_completion_creates_the_next_occurrence(make_session):
+    service = TaskService()
+    with make_session() as db:
+        yearly = service.create_task(db, TaskCreate(
+            title="renew passport", due_date=datetime(2026, 10, 1), recurring=True, recurrence_pattern="yearly"
+        ), 1)
+        materializer = RecurrenceMaterializer(horizon=timedelta(days=14))
+        assert materializer.run_once(db, NOW) == 0
+
+        first = service.create_recurring_instance(db, yearly.id, 1)
+        assert first.due_date == datetime(2027, 10, 1)
+        assert service.create_recurring_instance(db, yearly.id, 1).id == first.id
+
+        service.mark_complete(db, first.id, 1)
+        assert materializer.complete(db, [first.id, 12345], NOW) == 1
+        assert materializer.complete(db, [first.id], NOW) == 0
+        assert instance_dates(db, yearly.id) == [datetime(2027, 10, 1), datetime(2028, 10, 1)]
+        assert db.get(Task, yearly.id).next_occurrence_at == datetime(2029, 10, 1)
+
+        materializer.on_task_event({"event_type": "task_completed", "data": {"id": first.id}})
+        materializer.on_task_event({"event_type": "task_updated", "data": {"id": yearly.id}})
+        assert materializer._completed == {first.id}
+
+
+def test_completions_reach_the_materializer():
+    service = TaskService()
+    materializer = RecurrenceMaterializer(horizon=timedelta(days=14))
+    published = []
+
+    async def send(event_type: str, data: dict, shard: str = None):
+        published.append({"event_type": event_type, "data": data, "shard": shard})
+
+    with tempfile.TemporaryDirectory() as directory:
+        url = f"sqlite:///{os.path.join(directory, 'tasks.db')}"
+        engine = create_engine(url)
+        SQLModel.metadata.create_all(engine, tables=[
+            User.__table__, Task.__table__, TaskTag.__table__, UserTaskVersion.__table__,
+            UserTaskCounter.__table__, TaskTombstone.__table__, TaskArchive.__table__
+        ])
+        user = User(id=1, email="recurring@example.com", hashed_password="x")
+        with Session(engine) as db:
+            db.add(User(id=1, email="recurring@example.com", hashed_password="x"))
+            db.commit()
+            yearly = service.create_task(db, TaskCreate(
+                title="renew passport", due_date=datetime(2026, 10, 1), recurring=True, recurrence_pattern="yearly"
+            ), 1)
+            monthly = service.create_task(db, TaskCreate(
+                title="pay rent", due_date=datetime(2026, 10, 1), recurring=True, recurrence_pattern="monthly"
+            ), 1)
+            first = service.create_recurring_instance(db, yearly.id, 1)
+        shard = Shard("default", ReplicaPool(engine, create_async_engine(async_database_url(url)), []))
+
+        async def complete():
+            async with AsyncSession(shard.async_engine, expire_on_commit=False) as db:
+                background = BackgroundTasks()
+                await mark_task_complete(first.id, background, current_user=user, shard=shard, db=db)
+                request = TaskBulkIdsRequest(ids=[monthly.id, 12345], atomic=False)
+                await bulk_complete_tasks(request, background, current_user=user, shard=shard, db=db)
+                # Run after the response
+                await background()
+            await shard.async_engine.dispose()
+
+        task_events.send = send
+        try:
+            asyncio.run(complete())
+        finally:
+            task_events.send = None
+
+        # The worker of another shard ignores them
+        published.append({"event_type": "task_completed", "data": {"id": 999}, "shard": "east"})
+        for event in published:
+            if event_shard(event) == shard.name:
+                materializer.on_task_event(event)
+        assert materializer._completed == {first.id, monthly.id}
+        with Session(engine) as db:
+            assert materializer.complete(db, sorted(materializer._completed), NOW) == 2
+            assert instance_dates(db, yearly.id) == [datetime(2027, 10, 1), datetime(2028, 10, 1)]
+            assert instance_dates(db, monthly.id) == [datetime(2026, 11, 1)]
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    test_calendar_month_ends()
+    test_materializer_fills_the_horizon_once(task_session)
+    test_completion_creates_the_next_occurrence(task_session)
+    test_completions_reach_the_materializer()
+    print("Task recurrence tests passed!")
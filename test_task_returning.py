@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Test the single-statement update, complete and delete paths, with and without RETURNING
+"""
+
+from sqlalchemy import event
+from sqlmodel import Session, select
+from shared.models.task import Task, TaskCreate, TaskUpdate, TaskTag
+from phase5.backend.app.services.task_service import TaskService
+from conftest import task_session
+
+
+def count_task_statements(db: Session):
+    statements = []
+
+    @event.listens_for(db.get_bind(), "before_cursor_execute")
+    def _record(conn, cursor, statement, parameters, context, executemany):
+        if "tasks" in statement and "user_task_versions" not in statement:
+            statements.append(statement.split()[0])
+
+    return statements
+
+
+def check_writes(make_session, returning: bool):
+    service = TaskService()
+    with make_session(returning) as db:
+        task = service.create_task(db, TaskCreate(title="a", tags=["x"]), 1)
+        statements = count_task_statements(db)
+
+        updated = service.update_task(db, task.id, TaskUpdate(title="b"), 1)
+        assert (updated.title, updated.tags) == ("b", ["x"])
+        assert statements == (["UPDATE"] if returning else ["UPDATE", "SELECT"])
+
+        # A new priority moves the task between stat counters, so its old
+        # priority is read (and locked) first
+        statements.clear()
+        updated = service.update_task(db, task.id, TaskUpdate(priority="high"), 1)
+        assert (updated.title, updated.priority) == ("b", "high")
+        assert statements == (["SELECT", "UPDATE"] if returning else ["SELECT", "UPDATE", "SELECT"])
+        assert db.get(Task, task.id).priority_rank == 3
+        assert service.get_task(db, task.id, 1).title == "b"
+
+        assert service.mark_complete(db, task.id, 1).completed
+        assert service.update_task(db, task.id, TaskUpdate(title="c"), 2) is None
+        assert not service.delete_task(db, task.id, 2)
+        assert db.exec(select(TaskTag.tag)).all() == ["x"]
+
+        updated = service.update_task(db, task.id, TaskUpdate(tags=["y", "z"]), 1)
+        assert updated.tags == ["y", "z"]
+        assert service.delete_task(db, task.id, 1)
+        assert service.get_task(db, task.id, 1) is None
+        assert db.exec(select(TaskTag)).all() == []
+        assert service.get_version(db, 1)[0] == 6
+
+
+def test_writes_with_returning(make_session):
+    check_writes(make_session, returning=True)
+
+
+def test_writes_without_returning(make_session):
+    check_writes(make_session, returning=False)
+
+
+if __name__ == "__main__":
+    test_writes_with_returning(task_session)
+    test_writes_without_returning(task_session)
+    print("Task RETURNING tests passed!")
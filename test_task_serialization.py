@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Test that the column-tuple list encoding matches the TaskRead response, in full and as sparse fieldsets
+"""
+
+import json
+import warnings
+from datetime import datetime, timedelta
+from sqlalchemy import event
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from shared.models.task import TaskCreate
+from phase5.backend.app.services.task_service import TaskService
+from phase5.backend.app.services.task_archive import TaskArchiver
+from phase5.backend.app.services.task_serialization import encode_tasks, select_fields
+from conftest import task_session
+
+
+def test_encoded_rows_match_task_read_json(make_session):
+    service = TaskService()
+    with make_session() as db:
+        service.create_task(db, TaskCreate(title="plain"), 1)
+        service.create_task(db, TaskCreate(
+            title="réunion", description="notes", tags=["work", "ü"],
+            due_date=datetime(2026, 5, 1, 9, 30, 0, 250), recurring=True, recurrence_pattern="weekly"
+        ), 1)
+
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")  # from_orm stores list tags on a str field
+            expected = JSONResponse(jsonable_encoder(service.get_tasks(db, 1))).body
+
+        assert encode_tasks(service.get_task_rows(db, 1)) == expected
+        rows, next_cursor = service.get_task_rows_page(db, 1, limit=1)
+        assert len(rows) == 1 and next_cursor is not None
+
+
+def test_sparse_fieldsets_select_only_their_columns(make_session):
+    assert select_fields(["priority", " title"]) == ("title", "priority", "id")
+    assert select_fields(["", " "]) is None and select_fields(None) is None
+    try:
+        select_fields(["title", "secret"])
+        assert False, "unknown field accepted"
+    except ValueError as e:
+        assert "secret" in str(e)
+
+    service = TaskService()
+    with make_session() as db:
+        for index in range(5):
+            service.create_task(db, TaskCreate(
+                title=f"task {index}", description="x" * 1000, tags=["work"], due_date=datetime(2026, 5, index + 1)
+            ), 1)
+        service.mark_complete(db, 2, 1)
+        TaskArchiver(pause_seconds=0).run_once(db, datetime.utcnow() + timedelta(days=100))
+
+        statements = []
+        event.listen(db.get_bind(), "before_cursor_execute", lambda *args: statements.append(args[2]))
+        fields = select_fields(["title", "completed", "tags", "due_date"])
+        full = json.loads(encode_tasks(service.get_task_rows(db, 1, include_archived=True, sort_by="due_date")))
+        sparse = json.loads(encode_tasks(
+            service.get_task_rows(db, 1, include_archived=True, sort_by="due_date", fields=fields), fields
+        ))
+        assert sparse == [{key: task[key] for key in ("title", "completed", "tags", "due_date", "id")} for task in full]
+        assert len(sparse) == 5 and sparse[0]["tags"] == ["work"]
+        # Neither the tasks nor the archive query read the descriptions
+        assert len(statements) == 4 and not any("description" in statement for statement in statements[2:])
+
+        pages, cursor = [], None
+        while True:
+            rows, cursor = service.get_task_rows_page(
+                db, 1, 2, cursor, include_archived=True, sort_by="due_date", fields=fields
+            )
+            pages += json.loads(encode_tasks(rows, fields))
+            if cursor is None:
+                break
+        assert pages == sparse
+        assert [row[1] for row in service.get_due_soon_task_rows(db, 1, 3650, ("title", "id"))] == [1, 3, 4, 5]
+        assert service.get_recurring_task_rows(db, 1, ("title", "id")) == []
+
+
+if __name__ == "__main__":
+    test_encoded_rows_match_task_read_json(task_session)
+    test_sparse_fieldsets_select_only_their_columns(task_session)
+    print("Task serialization tests passed!")
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Test the task list statement templates: one cached statement per filter shape, compiled once
+"""
+
+from datetime import datetime, timedelta
+from sqlmodel import Session
+from shared.models.task import TaskCreate
+from phase5.backend.app.services.task_archive import TaskArchiver
+from phase5.backend.app.services.task_service import TaskService
+from phase5.backend.app.services.task_statements import CompiledCacheStats, StatementTemplates, list_statements
+from conftest import task_engine
+
+
+def seed(service: TaskService, db: Session):
+    service.create_task(db, TaskCreate(title="buy milk", priority="high", tags=["home", "shop"]), 1)
+    service.create_task(db, TaskCreate(title="call mom", tags=["home"], due_date=datetime(2026, 2, 1)), 1)
+    service.create_task(db, TaskCreate(title="file 50%_report", priority="low", tags=["work"]), 1)
+    service.create_task(db, TaskCreate(title="buy milk too", tags=["home"]), 2)
+
+
+def titles(rows):
+    return sorted(row[0] for row in rows)
+
+
+def test_templates_are_lru_bounded():
+    templates = StatementTemplates(max_entries=2)
+    built = []
+    build = lambda name: (lambda: built.append(name) or name)
+    assert [templates.get(shape, build(shape)) for shape in ("a", "b", "a", "c", "b")] == ["a", "b", "a", "c", "b"]
+    # "b" was the least recently used when "c" came in
+    assert built == ["a", "b", "c", "b"]
+    assert templates.stats() == {"entries": 2, "max_entries": 2, "hits": 1, "misses": 4}
+
+
+def test_filter_values_share_one_statement(make_engine):
+    service = TaskService()
+    engine = make_engine()
+    compiled = CompiledCacheStats()
+    compiled.track(engine)
+    with Session(engine) as db:
+        seed(service, db)
+        assert titles(service.get_task_rows(db, 1, tags=["home"], tag_match="any")) == ["buy milk", "call mom"]
+        assert titles(service.get_task_rows(db, 1, tags=["work"], tag_match="any")) == ["file 50%_report"]
+        hits, misses = list_statements.hits, list_statements.misses
+        before = compiled.stats()
+        # Same shape with other values, and other tag counts through the expanding IN
+        assert titles(service.get_task_rows(db, 1, tags=["shop", "work"], tag_match="any")) == [
+            "buy milk", "file 50%_report"
+        ]
+        assert titles(service.get_task_rows(db, 2, tags=["home"], tag_match="any")) == ["buy milk too"]
+        assert (list_statements.hits - hits, list_statements.misses - misses) == (2, 0)
+        after = compiled.stats()
+        assert after["hits"] - before["hits"] == 2 and after["misses"] == before["misses"]
+
+        # "all" keys on having a tag count, not on the tags themselves
+        assert titles(service.get_task_rows(db, 1, tags=["home", "shop"])) == ["buy milk"]
+        assert titles(service.get_task_rows(db, 1, tags=["home", "work"])) == []
+        assert titles(service.get_task_rows(db, 1, search_query="milk", sort_by="relevance")) == ["buy milk"]
+        assert titles(service.get_task_rows(db, 1, search_query="mom", sort_by="relevance")) == ["call mom"]
+        assert titles(service.get_task_rows(db, 1, min_priority="medium", due_date_to=datetime(2026, 3, 1))) == [
+            "call mom"
+        ]
+        assert compiled.stats()["hit_ratio"] > 0.5
+    engine.dispose()
+
+
+def test_archived_export_matches_listing(make_engine):
+    service = TaskService()
+    engine = make_engine()
+    with Session(engine) as db:
+        seed(service, db)
+        for task in service.get_tasks(db, 1, search_query="milk"):
+            service.mark_complete(db, task.id, 1)
+        TaskArchiver(pause_seconds=0).run_once(db, datetime.utcnow() + timedelta(days=100))
+        service.create_task(db, TaskCreate(title="more milk", tags=["home"]), 1)
+
+        for filters in (
+            dict(search_query="milk"), dict(search_query="milk", sort_by="relevance"), dict(tags=["home", "shop"]),
+            dict(tags=["home", "work"], tag_match="any", sort_by="priority"), dict(search_query="50%_"),
+        ):
+            listed = [row[9] for row in service.get_task_rows(db, 1, include_archived=True, **filters)]
+            exported = service.iter_export_rows(db, service.export_statement(db, 1, include_archived=True, **filters))
+            assert [row["id"] for row in exported] == listed, filters
+        assert len(service.get_task_rows(db, 1, include_archived=True, search_query="milk")) == 2
+    engine.dispose()
+
+
+def test_queries_without_terms_match_nothing(make_engine):
+    service = TaskService()
+    engine = make_engine()
+    with Session(engine) as db:
+        seed(service, db)
+        service.mark_complete(db, service.get_tasks(db, 1, search_query="mom")[0].id, 1)
+        TaskArchiver(pause_seconds=0).run_once(db, datetime.utcnow() + timedelta(days=100))
+
+        for query in ("!!!", "-", "\"\""):
+            assert service.get_tasks(db, 1, search_query=query) == []
+            assert service.get_task_rows(db, 1, include_archived=True, search_query=query) == []
+            assert service.get_tasks_page(db, 1, limit=2, search_query=query) == ([], None)
+            exported = service.iter_export_rows(
+                db, service.export_statement(db, 1, include_archived=True, search_query=query)
+            )
+            assert list(exported) == []
+        # Blank queries are no search at all
+        assert len(service.get_tasks(db, 1, include_archived=True, search_query="  ")) == 3
+    engine.dispose()
+
+
+if __name__ == "__main__":
+    test_templates_are_lru_bounded()
+    test_filter_values_share_one_statement(task_engine)
+    test_archived_export_matches_listing(task_engine)
+    test_queries_without_terms_match_nothing(task_engine)
+    print("Statement template tests passed!")
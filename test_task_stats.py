@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Test the per-user task counters behind /tasks/stats and their reconcile job
+"""
+
+import io
+import json
+from datetime import datetime, timedelta
+from sqlalchemy import delete
+from sqlmodel import Session
+from shared.models.task import Task, TaskCreate, TaskUpdate, UserTaskCounter
+from phase5.backend.app.services.task_service import TaskService
+from phase5.backend.app.services.task_counters import reconcile_task_counters
+from phase5.backend.app.services.task_import import TaskImporter, parse_ndjson
+from conftest import task_session
+
+
+def assert_counters_consistent(service: TaskService, db: Session):
+    stats = service.get_stats(db, 1)
+    reconcile_task_counters(db)
+    assert service.get_stats(db, 1) == stats
+
+
+def test_every_write_keeps_the_counters_exact(make_session):
+    service = TaskService()
+    past = datetime.utcnow() - timedelta(days=1)
+    with make_session() as db:
+        a = service.create_task(db, TaskCreate(title="a", priority="high", due_date=past), 1)
+        b = service.create_task(db, TaskCreate(title="b", priority="low", parent_task_id=a.id), 1)
+        service.create_task(db, TaskCreate(title="other user"), 2)
+        bulk = service.bulk_create_tasks(db, [TaskCreate(title=f"bulk {i}", priority="urgent") for i in range(3)], 1)
+        bulk_ids = [item.id for item in bulk.results]
+        TaskImporter(db, 1).run(parse_ndjson(io.StringIO(json.dumps({"title": "imported", "completed": True}))))
+
+        stats = service.get_stats(db, 1)
+        assert (stats.total, stats.completed, stats.open, stats.overdue) == (6, 1, 5, 1)
+        assert stats.open_by_priority == {"low": 1, "medium": 0, "high": 1, "urgent": 3, "none": 0}
+        assert stats.completed_by_priority["medium"] == 1
+
+        service.mark_complete(db, a.id, 1)
+        service.mark_complete(db, a.id, 1)  # already complete: no change
+        service.update_task(db, b.id, TaskUpdate(priority="urgent", completed=True), 1)
+        service.update_task(db, b.id, TaskUpdate(completed=False), 1)
+        service.update_task(db, b.id, TaskUpdate(parent_task_id=None, priority="medium"), 1)
+        service.bulk_update_tasks(db, bulk_ids[:2], TaskUpdate(priority="low"), 1)
+        service.bulk_complete_tasks(db, bulk_ids, 1)
+        service.bulk_delete_tasks(db, bulk_ids[1:], 1)
+        service.delete_task(db, a.id, 1)
+
+        stats = service.get_stats(db, 1)
+        assert (stats.total, stats.completed, stats.open, stats.overdue) == (3, 2, 1, 0)
+        assert stats.open_by_priority["medium"] == 1
+        assert stats.completed_by_priority["low"] == 1
+        assert service.get_stats(db, 2).total == 1
+        assert_counters_consistent(service, db)
+
+
+def test_reconcile_repairs_drift(make_session):
+    service = TaskService()
+    with make_session() as db:
+        for i in range(4):
+            service.create_task(db, TaskCreate(title=f"t{i}", completed=i % 2 == 0), 1)
+        # Written behind the service's back
+        db.add(Task(title="raw", user_id=1, priority="urgent"))
+        db.execute(delete(UserTaskCounter).where(UserTaskCounter.completed == True))
+        db.commit()
+        assert service.get_stats(db, 1).total == 2
+
+        assert reconcile_task_counters(db, 1) == 3
+        stats = service.get_stats(db, 1)
+        assert (stats.total, stats.completed, stats.open_by_priority["urgent"]) == (5, 2, 1)
+
+
+if __name__ == "__main__":
+    test_every_write_keeps_the_counters_exact(task_session)
+    test_reconcile_repairs_drift(task_session)
+    print("Task stats tests passed!")
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Test exact tag filtering through the normalized task_tags table
+"""
+
+from sqlmodel import select
+from shared.models.task import Task, TaskCreate, TaskUpdate, TaskTag
+from phase5.backend.app.services.task_service import TaskService
+from phase5.backend.app.services.task_tags import backfill_task_tags
+from conftest import task_session
+
+
+def titles(tasks):
+    return sorted(task.title for task in tasks)
+
+
+def test_tag_filter_is_exact_with_any_and_all(make_session):
+    service = TaskService()
+    with make_session() as db:
+        service.create_task(db, TaskCreate(title="report", tags=["work"]), 1)
+        service.create_task(db, TaskCreate(title="essay", tags=["homework"]), 1)
+        service.create_task(db, TaskCreate(title="deploy", tags=["work", "urgent"]), 1)
+        service.create_task(db, TaskCreate(title="dentist", tags=["urgent"]), 1)
+
+        assert titles(service.get_tasks(db, 1, tags=["work"])) == ["deploy", "report"]
+        assert titles(service.get_tasks(db, 1, tags=["work", "urgent"])) == ["deploy"]
+        assert titles(service.get_tasks(db, 1, tags=["work", "urgent"], tag_match="any")) == [
+            "dentist", "deploy", "report"
+        ]
+
+
+def test_tags_stay_in_sync_on_update_delete_and_backfill(make_session):
+    service = TaskService()
+    with make_session() as db:
+        task = service.create_task(db, TaskCreate(title="report", tags=["work"]), 1)
+        service.update_task(db, task.id, TaskUpdate(tags=["urgent", " urgent "]), 1)
+        assert db.exec(select(TaskTag.tag).where(TaskTag.task_id == task.id)).all() == ["urgent"]
+        assert service.get_tasks(db, 1, tags=["work"]) == []
+
+        # Rows written before task_tags existed only have the JSON column
+        db.add(Task(title="legacy", tags='["work"]', user_id=1))
+        db.commit()
+        assert backfill_task_tags(db, batch_size=1) == 2
+        assert titles(service.get_tasks(db, 1, tags=["work"])) == ["legacy"]
+
+        service.delete_task(db, task.id, 1)
+        assert db.exec(select(TaskTag).where(TaskTag.task_id == task.id)).all() == []
+
+
+if __name__ == "__main__":
+    test_tag_filter_is_exact_with_any_and_all(task_session)
+    test_tags_stay_in_sync_on_update_delete_and_backfill(task_session)
+    print("Tag filtering tests passed!")
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Test the per-user task version behind list ETags and the conditional GET checks
+"""
+
+from datetime import datetime
+from starlette.requests import Request
+from shared.models.task import TaskCreate, TaskUpdate
+from phase5.backend.app.services.task_service import TaskService
+from phase5.backend.app.api.routes.tasks import list_etag, not_modified
+from conftest import task_session
+
+
+def make_request(query: str = "", **headers) -> Request:
+    raw_headers = [(name.replace("_", "-").encode(), value.encode()) for name, value in headers.items()]
+    return Request({"type": "http", "query_string": query.encode(), "headers": raw_headers})
+
+
+def test_every_write_bumps_the_user_version(make_session):
+    service = TaskService()
+    with make_session() as db:
+        assert service.get_version(db, 1) == (0, None)
+        task = service.create_task(db, TaskCreate(title="a"), 1)
+        service.update_task(db, task.id, TaskUpdate(title="b"), 1)
+        service.bulk_complete_tasks(db, [task.id], 1)
+        service.bulk_complete_tasks(db, [999], 1)  # nothing written
+        service.delete_task(db, task.id, 1)
+        version, changed_at = service.get_version(db, 1)
+        assert version == 4 and isinstance(changed_at, datetime)
+
+
+def test_conditional_headers():
+    etag = list_etag(make_request("tags=a&completed=false"), 1, 7)
+    assert etag == list_etag(make_request("completed=false&tags=a"), 1, 7)
+    assert etag != list_etag(make_request("completed=false&tags=a"), 1, 8)
+
+    changed_at = datetime(2026, 5, 1, 12, 0, 0, 500)
+    assert not_modified(make_request(if_none_match=f'W/"other", {etag}'), etag, changed_at)
+    assert not not_modified(make_request(if_none_match='"other"'), etag, changed_at)
+    assert not_modified(make_request(if_modified_since="Fri, 01 May 2026 12:00:00 GMT"), etag, changed_at)
+    assert not not_modified(make_request(if_modified_since="Fri, 01 May 2026 11:59:59 GMT"), etag, changed_at)
+    # If-None-Match wins over If-Modified-Since
+    assert not not_modified(
+        make_request(if_none_match='"other"', if_modified_since="Fri, 01 May 2026 12:00:00 GMT"),
+        etag, changed_at
+    )
+
+
+if __name__ == "__main__":
+    test_every_write_bumps_the_user_version(task_session)
+    test_conditional_headers()
+    print("Task version tests passed!")